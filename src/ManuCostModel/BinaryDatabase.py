@@ -0,0 +1,673 @@
+"""
+Binary Input Databases
+
+A binary alternative to the xml input databases. The xml files remain the
+source of the data, the binary files are created from them with the converter
+and load without any xml parsing or value conversion.
+
+File layout (little-endian):
+
+    1. Fixed header: b'MCMB', format version (uint16), json header length (uint32)
+    2. Source signature: size (uint64) and sha1 digest (20 bytes) of the xml
+       database the binary file was created from
+    3. Json header: categories and parameter names, property columns, the
+       property order of each parameter and all non-numeric values
+    4. For each property column: row indices (int32) and values (float64) of
+       the float values, then row indices (int32) and values (int64) of the
+       integer values
+
+The geometry and cure cycle csv files can also be bundled into a single 
+binary geometry file, read with a memory map so that large span and airfoil 
+distributions are used without parsing or copying:
+
+    1. Fixed header: b'MCMG', format version (uint16), json header length (uint32)
+    2. Json header: shape and data offset of each numeric csv file, and the 
+       shape, byte offset and length of each text csv file
+    3. Padding to a multiple of 8 bytes, then the values (float64) of each 
+       numeric csv file in column order
+    4. The values of each text csv file (utf-8, one value per line in row
+       order), read only when the file is used
+
+Airfoil distributions (csv files of airfoil names) are always stored as text, 
+so names such as "0012" are not converted to numbers. The airfoil profiles
+(Airfoils_<name>.csv) are numeric and mapped like the other distributions.
+
+Usage from the command line:
+
+    mcm-convert "Input Databases"
+    mcm-convert --geometry "Input Databases/CSV Files"
+    python -m ManuCostModel.BinaryDatabase materialsDatabase.xml
+
+Author: Edward Fagan
+"""
+import os
+import sys
+import json
+import struct
+import hashlib
+import argparse
+from array import array
+from collections.abc import Mapping
+from numpy import asarray, loadtxt, memmap
+
+# Binary database file extension
+binaryExtension = '.mcmdb'
+
+binaryMagic = b'MCMB'
+binaryVersion = 2
+
+headerFormat = '<4sHI'
+headerSize = struct.calcsize(headerFormat)
+
+# Size and hash of the source xml database, following the fixed header
+sourceFormat = '<Q20s'
+sourceSize = struct.calcsize(sourceFormat)
+
+# Range of integer values stored in the integer columns
+intLimit = 2**63
+
+# Binary geometry file extension
+geometryExtension = '.mcmgeo'
+
+geometryMagic = b'MCMG'
+geometryVersion = 2
+
+
+def BinaryFileName(dataBase):
+    """
+    Determine the binary database filename for an xml database.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+
+    Returns
+    -------
+    Str
+        Binary database directory and filename.
+
+    """
+
+    if dataBase.endswith(binaryExtension):
+        return dataBase
+
+    return os.path.splitext(dataBase)[0] + binaryExtension
+
+
+def SourceSignature(dataBase):
+    """
+    Determine the signature of an xml database stored in the binary files 
+    created from it.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Xml database directory and filename.
+
+    Returns
+    -------
+    Tuple
+        Size (bytes) and sha1 digest of the database file.
+
+    """
+
+    hashObj = hashlib.sha1()
+    size = 0
+
+    with open(dataBase, 'rb') as dbFile:
+        for block in iter(lambda: dbFile.read(2**20), b''):
+            hashObj.update(block)
+            size += len(block)
+
+    return (size, hashObj.digest())
+
+
+def UseBinaryDatabase(dataBase):
+    """
+    Check if a database should be imported from its binary file. The binary
+    file is used if the xml file is not available, or if the binary file was
+    created from the current xml file (the same size and content hash, 
+    regardless of the file modification times).
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+
+    Returns
+    -------
+    Bool
+        True if the binary database should be used.
+
+    """
+
+    binaryFile = BinaryFileName(dataBase)
+
+    if binaryFile == dataBase:
+        return True
+
+    try:
+        with open(binaryFile, 'rb') as inFile:
+            data = inFile.read(headerSize + sourceSize)
+    except OSError:
+        return False
+
+    if len(data) < headerSize + sourceSize:
+        return False
+
+    magic, version, headerLen = struct.unpack_from(headerFormat, data, 0)
+
+    if magic != binaryMagic or version != binaryVersion:
+        return not os.path.exists(dataBase)
+
+    size, digest = struct.unpack_from(sourceFormat, data, headerSize)
+
+    try:
+        # Sizes are compared first, so changed files are usually not hashed
+        if os.stat(dataBase).st_size != size:
+            return False
+
+        return SourceSignature(dataBase) == (size, digest)
+
+    except OSError:
+        return True
+
+
+def WriteBinaryDatabase(params, binaryFile, source=None):
+    """
+    Write a database dictionary to a binary database file.
+
+    Parameters
+    ----------
+    params : Dict
+        Dictionary of database data, as returned by ReadInputsXML.
+    binaryFile : Str
+        Binary database directory and filename.
+    source : Tuple, optional
+        Signature of the xml database the data was read from, as returned by
+        SourceSignature. The default is None (an unknown source, so the xml
+        database is used instead of the binary file if it is available).
+
+    Returns
+    -------
+    None.
+
+    """
+
+    categories = []
+    layout = []
+
+    columnIndex = {}
+    columnNames = []
+    floatCols = []
+    intCols = []
+    otherCols = []
+
+    row = 0
+
+    for catName, catParams in params.items():
+
+        categories.append([catName, list(catParams.keys())])
+
+        for paramVals in catParams.values():
+
+            rowLayout = []
+
+            for propName, val in paramVals.items():
+
+                # Each property name is stored as a single column
+                try:
+                    col = columnIndex[propName]
+                except KeyError:
+                    col = len(columnNames)
+                    columnIndex[propName] = col
+                    columnNames.append(propName)
+                    floatCols.append((array('i'), array('d')))
+                    intCols.append((array('i'), array('q')))
+                    otherCols.append([])
+
+                rowLayout.append(col)
+
+                # Numeric values are packed, everything else is kept in the header
+                if type(val) is float:
+                    floatCols[col][0].append(row)
+                    floatCols[col][1].append(val)
+
+                elif type(val) is int and -intLimit <= val < intLimit:
+                    intCols[col][0].append(row)
+                    intCols[col][1].append(val)
+
+                else:
+                    otherCols[col].append([row, val])
+
+            layout.append(rowLayout)
+            row += 1
+
+    header = {'categories': categories,
+              'columns': [[name, len(floatCols[i][0]), len(intCols[i][0])] for i, name in enumerate(columnNames)],
+              'layout': layout,
+              'other': otherCols}
+
+    headerBytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+
+    tempFile = binaryFile + '.' + str(os.getpid()) + '.tmp'
+
+    with open(tempFile, 'wb') as outFile:
+
+        outFile.write(struct.pack(headerFormat, binaryMagic, binaryVersion, len(headerBytes)))
+        outFile.write(struct.pack(sourceFormat, *(source if source is not None else (0, b''))))
+        outFile.write(headerBytes)
+
+        for i in range(len(columnNames)):
+            for vals in floatCols[i] + intCols[i]:
+                if sys.byteorder == 'big':
+                    vals.byteswap()
+                outFile.write(vals.tobytes())
+
+    os.replace(tempFile, binaryFile)
+
+
+def ReadBinaryDatabase(binaryFile, saveList=None, recordType=None):
+    """
+    Import variables from a binary database.
+
+    Parameters
+    ----------
+    binaryFile : Str
+        Binary database directory and filename.
+    saveList : List, optional
+        List of the properties to save. The default is None (all properties).
+    recordType : Class, optional
+        Record class of the entries (see DatabaseSchema). The default is None
+        (dictionaries).
+
+    Returns
+    -------
+    params : Dict
+        Dictionary of database data, identical to ReadInputsXML for the xml
+        database the binary file was created from.
+
+    """
+
+    with open(binaryFile, 'rb') as inFile:
+        data = inFile.read()
+
+    magic, version, headerLen = struct.unpack_from(headerFormat, data, 0)
+
+    if magic != binaryMagic or version != binaryVersion:
+        raise ValueError('Unsupported binary database format: ' + binaryFile)
+
+    offset = headerSize + sourceSize
+
+    header = json.loads(data[offset:offset+headerLen].decode('utf-8'))
+
+    offset += headerLen
+
+    # Unpack the values of each column
+    columnNames = []
+    columnVals = []
+
+    for col, (name, numFloat, numInt) in enumerate(header['columns']):
+
+        vals = {}
+
+        for num, code in [(numFloat, 'd'), (numInt, 'q')]:
+
+            rows = array('i')
+            rows.frombytes(data[offset:offset+4*num])
+            offset += 4*num
+
+            values = array(code)
+            values.frombytes(data[offset:offset+8*num])
+            offset += 8*num
+
+            if sys.byteorder == 'big':
+                rows.byteswap()
+                values.byteswap()
+
+            vals.update(zip(rows, values))
+
+        vals.update(header['other'][col])
+
+        columnNames.append(name)
+        columnVals.append(vals)
+
+    # Check which columns should be saved
+    if saveList is None:
+        saveCols = None
+    else:
+        saveCols = set([col for col, name in enumerate(columnNames) if name in saveList])
+
+    # Rebuild the database dictionary
+    params = {}
+    layout = header['layout']
+    row = 0
+
+    for catName, paramNames in header['categories']:
+
+        params[catName] = {}
+
+        for paramName in paramNames:
+
+            params[catName][paramName] = {columnNames[col]: columnVals[col][row] for col in layout[row] if saveCols is None or col in saveCols}
+
+            if recordType is not None:
+                params[catName][paramName] = recordType(params[catName][paramName])
+
+            row += 1
+
+    return params
+
+
+def ConvertDatabase(dataBase, binaryFile=None):
+    """
+    Convert an xml database to a binary database.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Xml database directory and filename.
+    binaryFile : Str, optional
+        Binary database directory and filename. The default is None (the xml
+        filename with the binary extension).
+
+    Returns
+    -------
+    binaryFile : Str
+        Binary database directory and filename.
+
+    """
+
+    from .MapParameters import ParseInputsXML
+
+    if binaryFile is None:
+        binaryFile = BinaryFileName(dataBase)
+
+    source = SourceSignature(dataBase)
+
+    # All properties are stored, properties are selected when importing
+    params = ParseInputsXML(dataBase)
+
+    WriteBinaryDatabase(params, binaryFile, source)
+
+    return binaryFile
+
+
+def ConvertDirectory(directory):
+    """
+    Convert all xml databases in a directory to binary databases.
+
+    Parameters
+    ----------
+    directory : Str
+        Path to the directory of xml databases.
+
+    Returns
+    -------
+    binaryFiles : List
+        List of the binary database files created.
+
+    """
+
+    binaryFiles = []
+
+    for fileName in sorted(os.listdir(directory)):
+        if fileName.lower().endswith('.xml'):
+            binaryFiles.append(ConvertDatabase(os.path.join(directory, fileName)))
+
+    return binaryFiles
+
+
+def WriteGeometryBundle(geometry, bundleFile):
+    """
+    Write csv file data to a binary geometry file.
+
+    Parameters
+    ----------
+    geometry : Dict
+        Dictionary of the csv values (excluding the header row) keyed by csv 
+        file name. Numeric values are arrays with one column per csv column, 
+        text values are lists of rows.
+    bundleFile : Str
+        Binary geometry directory and filename.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    files = {}
+    arrays = []
+    texts = []
+    offset = 0
+    textOffset = 0
+
+    for fileName, vals in geometry.items():
+
+        vals = asarray(vals)
+
+        if vals.ndim == 1:
+            vals = vals.reshape(-1, 1)
+
+        if vals.dtype.kind in 'fiub':
+            files[fileName] = {'shape': list(vals.shape), 'offset': offset}
+            arrays.append(vals.astype('<f8'))
+            offset += vals.size
+
+        else:
+            textBytes = '\n'.join([str(val) for val in vals.ravel()]).encode('utf-8')
+            files[fileName] = {'shape': list(vals.shape), 'textOffset': textOffset, 'textLength': len(textBytes)}
+            texts.append(textBytes)
+            textOffset += len(textBytes)
+
+    headerBytes = json.dumps({'files': files}, separators=(',', ':')).encode('utf-8')
+
+    # Values start at a multiple of 8 bytes so they can be mapped directly
+    padding = -(headerSize + len(headerBytes)) % 8
+
+    tempFile = bundleFile + '.' + str(os.getpid()) + '.tmp'
+
+    with open(tempFile, 'wb') as outFile:
+
+        outFile.write(struct.pack(headerFormat, geometryMagic, geometryVersion, len(headerBytes)))
+        outFile.write(headerBytes)
+        outFile.write(b'\0'*padding)
+
+        # Column order, so that each csv column is contiguous
+        for vals in arrays:
+            outFile.write(vals.tobytes(order='F'))
+
+        for textBytes in texts:
+            outFile.write(textBytes)
+
+    os.replace(tempFile, bundleFile)
+
+
+class GeometryBundle(Mapping):
+    """
+    Read-only view of a binary geometry file.
+    
+    Numeric csv data (including the airfoil profiles) is returned as arrays 
+    mapped directly from the file (one column per csv column), so only the 
+    values used are read and no copies are made. Text csv data, e.g. the 
+    airfoil distribution, is read from the file when first accessed and 
+    returned as read-only arrays of strings. A bundle can be used in place 
+    of the csv file directory, e.g. as the geometry of a Manufacture object.
+    
+    Parameters
+    ----------
+    bundleFile : str
+        Binary geometry directory and filename.
+    """
+
+    def __init__(self, bundleFile):
+
+        self.bundleFile = bundleFile
+
+        with open(bundleFile, 'rb') as inFile:
+            magic, version, headerLen = struct.unpack(headerFormat, inFile.read(headerSize))
+
+            if magic != geometryMagic or version != geometryVersion:
+                raise ValueError('Unsupported binary geometry format: ' + bundleFile)
+
+            self.files = json.loads(inFile.read(headerLen).decode('utf-8'))['files']
+        
+        # Text arrays, created when first accessed
+        self.text = {}
+
+        dataOffset = headerSize + headerLen
+        dataOffset += -dataOffset % 8
+
+        numVals = sum([val['shape'][0]*val['shape'][1] for val in self.files.values() if 'offset' in val])
+
+        # Text values follow the numeric values
+        self.textOffset = dataOffset + 8*numVals
+
+        if numVals > 0:
+            self.data = memmap(bundleFile, dtype='<f8', mode='r', offset=dataOffset, shape=(numVals,))
+        else:
+            self.data = None
+
+    def __getitem__(self, fileName):
+
+        entry = self.files[fileName]
+
+        if 'textOffset' in entry:
+            try:
+                return self.text[fileName]
+            except KeyError:
+                with open(self.bundleFile, 'rb') as inFile:
+                    inFile.seek(self.textOffset + entry['textOffset'])
+                    textBytes = inFile.read(entry['textLength'])
+                
+                rows, cols = entry['shape']
+                vals = textBytes.decode('utf-8').split('\n') if rows*cols > 0 else []
+                
+                vals = asarray(vals, dtype=str).reshape((rows, cols))
+                vals.flags.writeable = False
+                
+                return self.text.setdefault(fileName, vals)
+
+        rows, cols = entry['shape']
+        start = entry['offset']
+
+        return self.data[start:start+rows*cols].reshape((rows, cols), order='F')
+
+    def __iter__(self):
+        return iter(self.files)
+    
+    def __reduce__(self):
+        # Worker processes map the file again instead of copying the values
+        return (self.__class__, (self.bundleFile,))
+
+    def __len__(self):
+        return len(self.files)
+
+
+def ConvertGeometry(csvDirectory, bundleFile=None, textFiles=None):
+    """
+    Convert a directory of geometry and cure cycle csv files to a binary 
+    geometry file.
+
+    Parameters
+    ----------
+    csvDirectory : Str
+        Path to the directory of csv files.
+    bundleFile : Str, optional
+        Binary geometry directory and filename. The default is None (the 
+        directory name with the binary geometry extension).
+    textFiles : List, optional
+        Names of csv files to store as text, in addition to the airfoil 
+        distributions (files of names with an "Airfoils_<name>.csv" file in
+        the directory). The default is None.
+
+    Returns
+    -------
+    bundleFile : Str
+        Binary geometry directory and filename.
+
+    """
+
+    if bundleFile is None:
+        bundleFile = os.path.normpath(csvDirectory) + geometryExtension
+
+    if textFiles is None:
+        textFiles = []
+
+    csvFiles = sorted([fileName for fileName in os.listdir(csvDirectory) if fileName.lower().endswith('.csv')])
+
+    geometry = {}
+
+    for fileName in csvFiles:
+
+        csvFile = os.path.join(csvDirectory, fileName)
+
+        try:
+            textVals = loadtxt(csvFile, dtype='str', delimiter=',', skiprows=1, ndmin=2)
+        except ValueError:
+            print('*** Warning: Unable to convert csv file: ', csvFile)
+            continue
+
+        # Airfoil distributions are read as text, e.g. to keep leading zeros
+        airfoils = textVals.size > 0 and all(["Airfoils_" + val + ".csv" in csvFiles for val in textVals[:, 0]])
+
+        if airfoils or fileName in textFiles:
+            geometry[fileName] = textVals
+            continue
+
+        # Numeric data where possible, otherwise the text values
+        try:
+            geometry[fileName] = loadtxt(csvFile, delimiter=',', skiprows=1, ndmin=2)
+        except ValueError:
+            geometry[fileName] = textVals
+
+    WriteGeometryBundle(geometry, bundleFile)
+
+    return bundleFile
+
+
+def main(argv=None):
+    """
+    Command line converter from xml databases to binary databases.
+
+    Parameters
+    ----------
+    argv : List, optional
+        Command line arguments. The default is None (sys.argv).
+
+    Returns
+    -------
+    None.
+
+    """
+
+    parser = argparse.ArgumentParser(description='Convert ManuCostModel xml input databases to binary databases.')
+    parser.add_argument('paths', nargs='+', help='xml database files or directories of xml databases')
+    parser.add_argument('-o', '--output', help='output file (only for a single xml database or csv directory)')
+    parser.add_argument('-g', '--geometry', action='store_true', help='convert directories of csv files to binary geometry files')
+    parser.add_argument('-t', '--text', action='append', help='csv file stored as text in a binary geometry file (can be repeated)')
+
+    args = parser.parse_args(argv)
+
+    if args.output and (len(args.paths) > 1 or (os.path.isdir(args.paths[0]) and not args.geometry)):
+        parser.error('--output can only be used with a single xml database or csv directory')
+
+    for path in args.paths:
+
+        if args.geometry:
+            print('\t > Binary geometry written to:', ConvertGeometry(path, args.output, args.text))
+            continue
+
+        if os.path.isdir(path):
+            binaryFiles = ConvertDirectory(path)
+        else:
+            binaryFiles = [ConvertDatabase(path, args.output)]
+
+        for binaryFile in binaryFiles:
+            print('\t > Binary database written to:', binaryFile)
+
+
+if __name__ == '__main__':
+    main()
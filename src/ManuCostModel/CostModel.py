@@ -17,10 +17,66 @@ The cost model is structured around three class types:
 """
 
 import os
-from numpy import loadtxt, ceil, array
+from numpy import ceil, array, asarray, broadcast_arrays, broadcast_to, multiply
 import copy
-from .MapParameters import ReadInputs, ReadInputsXML, ConsistencyCheck
-from .PartDecomposition import ScalingVariables, AssemblyScaling
+from .MapParameters import ReadInputs, ReadSharedInputs, ReadInputsXML, ConsistencyCheck, LazyDatabase
+from .MapParameters import saveVarsMethods, saveVarsMaterials, saveVarsEquipment
+from .PartDecomposition import StructuralBreakdown, CachedBreakdown, BreakdownPool, AssemblyScaling, LoadCSV
+from .DataCache import SharedKey
+from .BinaryDatabase import GeometryBundle
+from .Pricing import QuantityTakeoff
+from .DatabaseSchema import MaterialRecord, EquipmentRecord
+
+## Default settings for importing the input databases (see Manufacture)
+loadDefaults = {'cacheDir': None, 'shared': False, 'stream': False, 'lazy': False, 'workers': None, 'processes': False, 'compiled': False}
+
+## Default settings for determining the scaling variables (see Manufacture)
+scaleDefaults = {'blockSize': None, 'workers': None}
+
+## Stages of the manufacturing analysis, in order of evaluation
+analysisStages = ['materials', 'labour', 'lines', 'equipment', 'totals']
+
+## Stages using the results of each stage (all stages are used by the totals)
+stageResults = {'materials': [], 'labour': ['lines'], 'lines': ['equipment'], 'equipment': []}
+
+
+def Options(options, defaults, optionType):
+    """
+    Combine optional settings with their default values.
+
+    Parameters
+    ----------
+    options : dict or None
+        Settings that differ from the defaults.
+    defaults : dict
+        Default value of each setting.
+    optionType : str
+        Description of the settings, used in error messages.
+
+    Raises
+    ------
+    ValueError
+        If a setting is not one of the defaults.
+
+    Returns
+    -------
+    dict
+        Value of each setting.
+
+    """
+    
+    if options is None:
+        return dict(defaults)
+    
+    unknown = [key for key in options if key not in defaults]
+    
+    if len(unknown) > 0:
+        raise ValueError('Unknown ' + optionType + ': ' + ', '.join(sorted(unknown)) + ' (options are: ' + ', '.join(defaults) + ')')
+    
+    combined = dict(defaults)
+    combined.update(options)
+    
+    return combined
 
 
 class component:
@@ -107,6 +163,9 @@ class component:
         self.materials = self.Materials(self.matDetails)
         self.consumables = self.Materials()
         
+        # Material and consumable cost operations, for re-pricing the part
+        self.takeoff = []
+        
         # Labour variables
         self.labour = self.Labour()
         
@@ -231,6 +290,57 @@ class component:
                     
             except:
                 pass
+    
+    
+    def Snapshot(self):
+        """
+        Method for saving the production definition of the part. The 
+        production steps are shared with the snapshot rather than copied, as
+        they are not changed after ProductionStepDefinition creates them (the
+        analysis only reads them); the lists holding them are copied.
+
+        Returns
+        -------
+        tuple
+            Production steps, production step names, equipment of each 
+            activity and equipment of the production steps.
+
+        """
+        
+        equipmentList = {act: list(equipVals) for act, equipVals in self.equipment.equipmentList.items()}
+        
+        return (list(self.productionSteps), list(self.productionNames), equipmentList, list(self.equipment.equipmentCosts.keys()))
+    
+    
+    def Restore(self, state):
+        """
+        Method for resetting the results of the part in place and restoring
+        the production definition of a snapshot. The scaling variables and 
+        materials of the part are kept.
+
+        Parameters
+        ----------
+        state : tuple
+            Production definition of the part, as returned by Snapshot.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        productionSteps, productionNames, equipmentList, equipmentItems = state
+        
+        self.productionSteps = list(productionSteps)
+        self.productionNames = list(productionNames)
+        
+        self.materials.Reset(self.matDetails)
+        self.consumables.Reset()
+        self.labour = self.Labour()
+        self.equipment.Reset(equipmentList, equipmentItems)
+        
+        self.spaceReqs = []
+        self.takeoff = []
             
     
     class Materials:
@@ -253,6 +363,25 @@ class component:
             self.massScrap = {}
             self.matCostScrap = {}
             
+            self.Reset(matDetails)
+        
+        def Reset(self, matDetails=None):
+            """
+            Method for resetting the material variables in place
+
+            Parameters
+            ----------
+            matDetails : dict, str or list, optional
+                Materials of the object. The default is None.
+
+            Returns
+            -------
+            None.
+
+            """
+            for obj in [self.mass, self.matCost, self.massScrap, self.matCostScrap]:
+                obj.clear()
+            
             self.cost = 0.0
             self.materialMass = 0.0
             
@@ -456,6 +585,41 @@ class component:
             
             self.cost = 0.0
             self.power = 0.0
+        
+        
+        def Reset(self, equipmentList, equipmentItems):
+            """
+            Method for resetting the equipment variables in place
+
+            Parameters
+            ----------
+            equipmentList : dict
+                Equipment of each activity.
+            equipmentItems : list
+                Equipment of the production steps.
+
+            Returns
+            -------
+            None.
+
+            """
+            self.equipmentList.clear()
+            
+            for act, equipVals in equipmentList.items():
+                self.equipmentList[act] = list(equipVals)
+            
+            self.equipmentCosts.clear()
+            self.powerCosts.clear()
+            
+            for equip in equipmentItems:
+                self.equipmentCosts[equip] = 0.0
+                self.powerCosts[equip] = 0.0
+            
+            for act in self.activityCosts.keys():
+                self.activityCosts[act] = []
+            
+            self.cost = 0.0
+            self.power = 0.0
             
             
         def ActivityDict(self, activityLevels, equipDict):
@@ -564,40 +728,120 @@ class Manufacture:
 
     scaleFile : str
         Optional name for identifying the scaling variables.
+        
+    databases : dict, optional
+        Optional dictionary of the input database dictionaries, with the keys
+        'manufacturingDB', 'productionVars', 'productionMethods', 
+        'materialVars', 'equipmentVars' and (optionally) 'consInputVars'. If 
+        defined, the databases are not read from the directory and no output
+        directory is created.
+        
+    geometry : dict or str, optional
+        Optional dictionary of the geometry and cure cycle data, keyed by the 
+        csv file names used in the databases. Each entry is an array of the 
+        csv values (excluding the header row). A binary geometry filename 
+        (see BinaryDatabase.ConvertGeometry) can also be used, in which case 
+        the data is memory-mapped from the file. If defined, no csv files are 
+        read.
+        
+    loadOptions : dict, optional
+        Optional settings for importing the input databases (see 
+        loadDefaults for the default values):
+            
+        cacheDir : str
+            Directory for binary snapshots of the input databases. If 
+            defined, unchanged databases are loaded from their snapshots 
+            instead of being re-parsed. The scaling variables determined 
+            from the geometry are also cached in this directory and reused 
+            while their inputs are unchanged.
+        shared : bool
+            If True, the input databases are imported once per process and 
+            shared with other Manufacture objects using the same files. 
+            Changes made to the databases of this object (e.g. 
+            productionVars) are kept in a copy-on-write overlay and do not 
+            affect other objects.
+        stream : bool
+            If True, the input databases are read incrementally, limiting 
+            memory use when importing very large materials or equipment 
+            databases.
+        lazy : bool
+            If True, only the materials and equipment referenced by the 
+            manufacturing and production methods databases are imported when
+            the object is created. Other entries are imported when first 
+            accessed. The lazily imported databases are indexed and read 
+            directly from their xml files, so cacheDir and stream only apply
+            to the other databases.
+        workers : int
+            Number of workers used to import the input databases 
+            concurrently.
+        processes : bool
+            If True, the concurrent imports use worker processes, otherwise
+            threads are used.
+        compiled : bool
+            If True, the entries of the materials and equipment databases 
+            are imported as typed records (see DatabaseSchema), which are 
+            still dictionaries, and a ValueError is raised if a numeric 
+            property has an invalid value. Lazily imported entries are 
+            validated when they are read. Databases provided directly are
+            used as they are.
+        
+    scaleOptions : dict, optional
+        Optional settings for determining the scaling variables from the 
+        geometry (see scaleDefaults for the default values):
+            
+        blockSize : int
+            Number of span locations processed at a time. Limits the memory
+            used for models with a large number of span locations.
+        workers : int
+            Number of worker processes used to determine the scaling 
+            variables of the parts concurrently (the span geometry is 
+            determined once, before the parts are sent to the workers). The
+            worker processes are started on first use and reused by later 
+            analyses.
+
     """
     
-    def __init__(self, directory, inputFile, productName='', processName='', scaleFile=''):
+    def __init__(self, directory, inputFile, productName='', processName='', scaleFile='', databases=None, geometry=None, loadOptions=None, scaleOptions=None):
+        
+        # Settings for importing the databases and determining the scaling variables
+        self.loadOptions = Options(loadOptions, loadDefaults, 'load option')
+        self.scaleOptions = Options(scaleOptions, scaleDefaults, 'scale option')
+        
+        # Check the number of span locations in each block
+        blockSize = self.scaleOptions['blockSize']
+        
+        if blockSize is not None and blockSize < 1:
+            raise ValueError('Block size must be at least one span location: ' + str(blockSize))
         
         # Store the input variables
         self.directory = directory
         self.inputFile = inputFile
         self.productName = productName
         self.processName = processName
+        self.cacheDir = self.loadOptions['cacheDir']
+        self.geometry = GeometryBundle(geometry) if type(geometry) is str else geometry
+        self.stream = self.loadOptions['stream']
+        self.compiled = self.loadOptions['compiled']
+        self.blockSize = blockSize
+        
+        # Worker processes for the scaling variables, reused by each analysis
+        scaleWorkers = self.scaleOptions['workers']
+        
+        if scaleWorkers is not None and scaleWorkers > 1:
+            self.scalePool = BreakdownPool(scaleWorkers)
+        else:
+            self.scalePool = None
         
         # Directory locations
         self.CSVloc = "CSV Files\\"
         self.dirInputDatabases = "\\Input Databases\\"
         self.dirOutputDatabases = "\\Output Databases\\"
         
-        # Create a directory for model results
-        try:
-            os.mkdir(self.directory+self.dirOutputDatabases)
-        except FileExistsError:
-            pass
-        
         ## Import the input databases
         if len(inputFile) == 0:
             # Default manufacturing inputs database name
             self.inputFile = "manufacturingDatabase"
         
-        # Add directory locations to the file names
-        manufacturingInputVars = self.directory + self.dirInputDatabases + self.inputFile + ".xml"
-        consVariables = self.directory + self.dirInputDatabases + "constructionVariablesDatabase.xml"
-        productionVariables = self.directory + self.dirInputDatabases + "productionVariablesDatabase.xml"
-        productionMethods = self.directory + self.dirInputDatabases + "productionMethodsDatabase.xml"
-        materialVariables = self.directory + self.dirInputDatabases + "materialsDatabase.xml"
-        equipmentVariables = self.directory + self.dirInputDatabases + "equipmentVariablesDatabase.xml"
-        
         # Check if the filename for the scaling variables has been entered
         if type(scaleFile) is str:
             self.scalingInputVariables = self.dirInputDatabases + scaleFile
@@ -606,13 +850,108 @@ class Manufacture:
         elif type(scaleFile) is dict:
             self.scalingInputVariables = scaleFile
         
-        # Import the data
-        self.manufacturingDB, self.productionVars, self.productionMethods, self.materialVars, self.equipmentVars, self.consInputVars = ReadInputs(manufacturingInputVars, productionVariables, productionMethods, materialVariables, equipmentVariables, consVariables)
+        if databases is not None:
+            # Use the databases provided, no files are accessed
+            self.manufacturingDB = databases['manufacturingDB']
+            self.productionVars = databases['productionVars']
+            self.productionMethods = databases['productionMethods']
+            self.materialVars = databases['materialVars']
+            self.equipmentVars = databases['equipmentVars']
+            self.consInputVars = databases.get('consInputVars')
+            
+            # No database files to check when reloading
+            self.databaseFiles = {}
+            
+        else:
+            # Create a directory for model results
+            try:
+                os.mkdir(self.directory+self.dirOutputDatabases)
+            except FileExistsError:
+                pass
+            
+            # Add directory locations to the file names
+            manufacturingInputVars = self.directory + self.dirInputDatabases + self.inputFile + ".xml"
+            consVariables = self.directory + self.dirInputDatabases + "constructionVariablesDatabase.xml"
+            productionVariables = self.directory + self.dirInputDatabases + "productionVariablesDatabase.xml"
+            productionMethods = self.directory + self.dirInputDatabases + "productionMethodsDatabase.xml"
+            materialVariables = self.directory + self.dirInputDatabases + "materialsDatabase.xml"
+            equipmentVariables = self.directory + self.dirInputDatabases + "equipmentVariablesDatabase.xml"
+            
+            # Import the data
+            if self.loadOptions['shared'] is True:
+                readFunction = ReadSharedInputs
+            else:
+                readFunction = ReadInputs
+            
+            self.manufacturingDB, self.productionVars, self.productionMethods, self.materialVars, self.equipmentVars, self.consInputVars = readFunction(manufacturingInputVars, productionVariables, productionMethods, materialVariables, equipmentVariables, consVariables, cacheDir=self.cacheDir, stream=self.stream, lazy=self.loadOptions['lazy'], workers=self.loadOptions['workers'], processes=self.loadOptions['processes'], compiled=self.compiled)
+            
+            # Database files and the variables saved from each, used when reloading
+            self.databaseFiles = {'manufacturingDB': (manufacturingInputVars, None),
+                                  'productionVars': (productionVariables, None),
+                                  'productionMethods': (productionMethods, saveVarsMethods),
+                                  'materialVars': (materialVariables, saveVarsMaterials),
+                                  'equipmentVars': (equipmentVariables, saveVarsEquipment),
+                                  'consInputVars': (consVariables, None)}
+        
+        # Databases imported lazily, which are also reloaded lazily
+        self.lazyDatabases = [key for key in ['materialVars', 'equipmentVars'] if isinstance(getattr(self, key), LazyDatabase)]
         
         # Create component objects for each part defined in the manufacturing input file
         self.activityLevels = ['preform', 'cure', 'assembly', 'finishing']
         self.brandTypes = {'spar': 'preform', 'web': 'preform', 'skin': 'preform', 'wing': 'assembly'}
         
+        self.CreateComponents()
+        
+        # Create manufacturing results variables
+        self.equipmentList = {}
+        self.productLines = {}
+        self.assemblyLines = {}
+        self.commonEquipment = {}
+        self.costs_manufacturing = 0.0
+        self.costs_materials = 0.0
+        self.costs_labour = 0.0
+        self.costs_equipment = 0.0
+        self.costs_overheads = 0.0
+        self.cost_building = 0.0
+        self.structure_mass = 0.0
+        self.unit_cost = 0.0
+        
+        # Scrap rates used in place of the production step and consumables 
+        # scrap rates, keyed by material name
+        self.scrapRates = {}
+        
+        # Cure cycle durations, read on first use
+        self.cureCycleHours = {}
+        
+        # Scaling option of the last analysis (None until scaling is performed)
+        self.scaleReadFile = None
+        
+        # Scaling variables database, read on first use
+        self.scalingInputs = None
+        
+        # Analysis stages to be recalculated after changes to the databases
+        self.dirtyStages = set()
+        
+        # State of the input files, used to detect changes when reloading
+        self.fileSignatures = self.FileSignatures()
+        
+        self.analysis_report = ConsistencyCheck(self.manufacturingDB, self.productionVars, self.productionMethods, self.materialVars, self.equipmentVars, self.consInputVars)
+        
+        # if self.consInputVars:
+        #     self.csvFileName()
+    
+    
+    def CreateComponents(self):
+        """
+        Method for creating the component objects for each part defined in the
+        manufacturing input database
+
+        Returns
+        -------
+        None.
+
+        """
+        
         # Create parts and assembly lists
         self.parts = []
         self.assemblies = []
@@ -651,24 +990,236 @@ class Manufacture:
         # Create the combined list of all components in the analysis
         self.partsList = self.parts + self.assemblies
         
-        # Create manufacturing results variables
-        self.equipmentList = {}
-        self.productLines = {}
-        self.assemblyLines = {}
-        self.commonEquipment = {}
-        self.costs_manufacturing = 0.0
-        self.costs_materials = 0.0
-        self.costs_labour = 0.0
-        self.costs_equipment = 0.0
-        self.costs_overheads = 0.0
-        self.cost_building = 0.0
-        self.structure_mass = 0.0
-        self.unit_cost = 0.0
+        # Components indexed by name
+        self.componentMap = {}
+        
+        for compList in self.partsList:
+            for comp in compList:
+                self.componentMap.setdefault(comp.name, []).append(comp)
+        
+        # Production definitions of the components, restored when resetting
+        self.snapshot = None
+        self.restored = False
+    
+    
+    def CureCycleHours(self, cureFile):
+        """
+        Duration of a cure cycle, read from its csv file on first use
+
+        Parameters
+        ----------
+        cureFile : str
+            Name of the cure cycle csv file.
+
+        Returns
+        -------
+        processHours : float
+            Total duration of the cure cycle (hours).
+
+        """
+        
+        try:
+            return self.cureCycleHours[cureFile]
+        except KeyError:
+            pass
+        
+        typeVal = 'float, float, float'
+        columns = [0,1,2]
+        
+        cureCycleVals = array([LoadCSV(self.CSVDirectory(), cureFile, typeVal, columns)])
+        
+        processHours = sum(cureCycleVals[0,1])
+        
+        self.cureCycleHours[cureFile] = processHours
+        
+        return processHours
+    
+    
+    def CSVDirectory(self):
+        """
+        Location of the geometry and cure cycle csv data
+
+        Returns
+        -------
+        str or dict
+            The csv file directory, or the in-memory geometry dictionary if 
+            one has been provided.
+
+        """
+        
+        if self.geometry is not None:
+            return self.geometry
+        
+        return self.directory + self.dirInputDatabases + self.CSVloc
+    
+    
+    def FileSignatures(self):
+        """
+        Determine the current state of the input database and csv files
+
+        Returns
+        -------
+        signatures : dict
+            Modification time and size of each database file (keyed by the 
+            database variable name) and each csv file (keyed by file name).
+
+        """
+        
+        signatures = {}
+        
+        files = [(key, val[0]) for key, val in self.databaseFiles.items() if val[0]]
+        
+        # Scaling variables database (unless entered as a dict)
+        if type(getattr(self, 'scalingInputVariables', None)) is str and self.directory is not None:
+            files.append(('scalingInputVariables', self.directory + self.scalingInputVariables))
+        
+        for key, fileName in files:
+            signatures[key] = SharedKey([fileName])[0]
+        
+        # Geometry and cure cycle csv files
+        if self.geometry is None and self.directory is not None:
+            csvDirectory = self.CSVDirectory()
+            
+            try:
+                csvFiles = os.listdir(csvDirectory)
+            except OSError:
+                csvFiles = []
+            
+            for fileName in csvFiles:
+                if fileName.lower().endswith('.csv'):
+                    signatures[fileName] = SharedKey([csvDirectory + fileName])[0]
+        
+        return signatures
+    
+    
+    def MaterialProperties(self, properties):
+        """
+        Collect properties of the materials used by the components
+
+        Parameters
+        ----------
+        properties : list
+            Names of the material properties.
+
+        Returns
+        -------
+        matProps : dict
+            Property values for each material type and name used.
+
+        """
+        
+        matProps = {}
+        
+        for compList in self.partsList:
+            for comp in compList:
+                for matType, matName in comp.matDetails.items():
+                    try:
+                        matVals = self.materialVars[matType][matName]
+                    except KeyError:
+                        continue
+                    
+                    matProps[(matType, matName)] = [matVals.get(prop) for prop in properties]
+        
+        return matProps
+    
+    
+    def Reload(self, analyse=True):
+        """
+        Method for reloading the input databases and csv files that have 
+        changed since they were last read. Only the results that depend on the
+        changed files are recalculated, e.g. the scaling variables are retained
+        when only prices have changed.
+
+        Parameters
+        ----------
+        analyse : bool, optional
+            If True, the manufacturing analysis is repeated (if an analysis has
+            already been performed). The default is True.
+
+        Returns
+        -------
+        changed : list
+            Names of the databases and csv files that have changed.
+
+        """
+        
+        signatures = self.FileSignatures()
+        
+        changed = [key for key in signatures.keys() if signatures[key] != self.fileSignatures.get(key)]
+        changed += [key for key in self.fileSignatures.keys() if key not in signatures]
+        
+        if len(changed) == 0:
+            return changed
+        
+        # Cure cycles are read during the analysis, other csv files are geometry
+        cureFiles = set([val for vals in self.MaterialProperties(['cure cycle', 'post cure cycle']).values() for val in vals])
+        matDimensions = self.MaterialProperties(['width', 'thickness (cured)', 'thickness'])
+        
+        # Re-import only the databases that have changed
+        for key in changed:
+            
+            if key not in self.databaseFiles.keys():
+                continue
+            
+            fileName, saveList = self.databaseFiles[key]
+            
+            # Record types of the compiled databases
+            if self.compiled is True:
+                recordType = {'materialVars': MaterialRecord, 'equipmentVars': EquipmentRecord}.get(key)
+            else:
+                recordType = None
+            
+            if key in self.lazyDatabases:
+                params = LazyDatabase(fileName, saveList, recordType=recordType)
+            else:
+                params = ReadInputsXML(fileName, saveList, cacheDir=self.cacheDir, stream=self.stream, recordType=recordType)
+            
+            # Check database contains input data
+            if not params:
+                print('*** Error: Input parameters database file is empty: ', fileName)
+            
+            setattr(self, key, params)
+        
+        self.fileSignatures = signatures
+        
+        # Cure cycles are read again on next use
+        for key in changed:
+            self.cureCycleHours.pop(key, None)
+        
+        # Determine if the scaling variables need to be recalculated
+        if 'manufacturingDB' in changed:
+            # The components are recreated without scaling variables
+            self.CreateComponents()
+            
+            reScale = True
+            
+        elif self.scaleReadFile is True:
+            reScale = 'scalingInputVariables' in changed
+            
+        else:
+            geometryFiles = [key for key in changed if key.lower().endswith('.csv') and key not in cureFiles]
+            
+            reScale = 'consInputVars' in changed or len(geometryFiles) > 0 or matDimensions != self.MaterialProperties(['width', 'thickness (cured)', 'thickness'])
         
         self.analysis_report = ConsistencyCheck(self.manufacturingDB, self.productionVars, self.productionMethods, self.materialVars, self.equipmentVars, self.consInputVars)
         
-        # if self.consInputVars:
-        #     self.csvFileName()
+        # Mark the stages depending on the changed files
+        for key in changed:
+            if key in self.databaseFiles.keys():
+                self.Modified(key)
+            elif key in cureFiles:
+                self.Modified('cureCycleHours')
+        
+        # Repeat the analysis, reusing the scaling variables where possible
+        if analyse is True and self.scaleReadFile is not None:
+            if reScale is True:
+                self.ProductionAnalysis(scaling=True, readScaling=self.scaleReadFile, reSet=True)
+            
+            else:
+                # Recalculate only the stages depending on the changed files
+                self.Recompute()
+        
+        return changed
     
     
     def csvFileName(self):
@@ -714,15 +1265,26 @@ class Manufacture:
     
     def ResetManufacture(self):
         """
-        Method for resetting all objects and results variables to their default state
+        Method for resetting all objects and results variables to their default state.
+        If a snapshot of the production definitions is available (see Snapshot),
+        the component results are reset in place and the production definitions
+        are restored, otherwise the components are re-initialised.
 
         Returns
         -------
         None.
 
         """
-        # Reset all components to their default state
-        reSetCheck = [self.ResetComponents(part, self.manufacturingDB, self.activityLevels) for part in self.partsList]
+        if self.snapshot is not None:
+            # Reset the component results in place
+            for comp, state in self.snapshot:
+                comp.Restore(state)
+            
+            self.restored = True
+        
+        else:
+            # Reset all components to their default state
+            reSetCheck = [self.ResetComponents(part, self.manufacturingDB, self.activityLevels) for part in self.partsList]
         
         # for part in self.partsList:
         #     print(part[0].name)
@@ -776,16 +1338,17 @@ class Manufacture:
     
     def ResetComponents(self, compList, manufacturingDB, activityLevels):
         """
-        
+        Method for re-initialising the component objects before an analysis,
+        keeping the product name, brand and scaling variables of each part
 
         Parameters
         ----------
-        compList : TYPE
-            DESCRIPTION.
-        manufParams : TYPE
-            DESCRIPTION.
-        activityLevels : TYPE
-            DESCRIPTION.
+        compList : list
+            Component objects.
+        manufacturingDB : dict
+            Manufacturing input data, keyed by product name.
+        activityLevels : list
+            Activity levels of the components.
 
         Returns
         -------
@@ -796,7 +1359,7 @@ class Manufacture:
         for comp in compList:
             scalingVars = copy.deepcopy(comp.scaleVars)
             manufParams = manufacturingDB[comp.product]
-            comp.__init__(comp.name, comp.type, self.MaterialDictionary(manufParams, comp.type), partBrand=self.brandTypes[comp.type], activityLevels=activityLevels)
+            comp.__init__(comp.name, comp.type, comp.product, matDetails=self.MaterialDictionary(manufParams, comp.type), partBrand=comp.brand, activityLevels=activityLevels)
             comp.scaleVars = copy.deepcopy(scalingVars)
         
     
@@ -842,37 +1405,65 @@ class Manufacture:
         None.
 
         """
-        directory = self.directory + self.dirInputDatabases + self.CSVloc
+        directory = self.CSVDirectory()
+        
+        self.scaleReadFile = readFile
         
         # Default is to calculate scaling variables from structural and 
         # geometric parameters
         if readFile is False:
-            for compList in self.parts:
-                for comp in compList:
-                    ScalingVariables(comp, directory, self.consInputVars, self.materialVars)
+            parts = [comp for compList in self.parts for comp in compList]
+            
+            # All parts share a single pass over the span geometry, unless
+            # the scaling variables of earlier runs are cached
+            if self.cacheDir is None:
+                StructuralBreakdown(parts, directory, self.consInputVars, self.materialVars, self.blockSize, self.scalePool)
+            else:
+                CachedBreakdown(parts, directory, self.consInputVars, self.materialVars, self.cacheDir, self.blockSize, self.scalePool)
         
             AssemblyScaling(self.skins, self.webs, self.wing[0])
             
         # Otherwise read in predefined values from an input database
         else:
-            # Read from an input database unless the data is already entered as a dict
-            if type(self.scalingInputVariables) is str:
-                scalingInputs = ReadInputsXML(self.directory + self.scalingInputVariables)
-                
-            elif type(self.scalingInputVariables) is dict:
-                scalingInputs = self.scalingInputVariables
+            scalingInputs = self.ScalingInputs()
             
             # Apply the scaling variables to each part
             for prod in self.manufacturingDB.keys():
                 
-                for compList in self.partsList:
-                    
-                    for comp in compList:
-                        
-                        try:
-                            comp.scaleVars = scalingInputs[prod][comp.name]
-                        except:
-                            pass
+                try:
+                    prodInputs = scalingInputs[prod]
+                    compNames = list(prodInputs.keys())
+                except (KeyError, TypeError, AttributeError):
+                    continue
+                
+                for compName in compNames:
+                    for comp in self.componentMap.get(compName, []):
+                        comp.scaleVars = prodInputs[compName]
+    
+    
+    def ScalingInputs(self):
+        """
+        Scaling variables database, read from the input database when first 
+        used and again only if the database file changes
+
+        Returns
+        -------
+        dict
+            Scaling variables of each product and component.
+
+        """
+        
+        # Use the data if it is already entered as a dict
+        if type(self.scalingInputVariables) is dict:
+            return self.scalingInputVariables
+        
+        scaleFile = self.directory + self.scalingInputVariables
+        signature = SharedKey([scaleFile])
+        
+        if self.scalingInputs is None or self.scalingInputs[0] != signature:
+            self.scalingInputs = (signature, ReadInputsXML(scaleFile))
+        
+        return self.scalingInputs[1]
     
     
     def DepreciationCost(self, equipName):
@@ -971,17 +1562,29 @@ class Manufacture:
         if scaling is True:
             self.Scale(readScaling)
         
+        # Production definitions are only created if they were not restored
+        define = self.restored is False
+        
+        # Snapshot the definitions if all components are defined from the default state
+        defaultState = define and all([len(comp.productionSteps) == 0 for compList in self.partsList for comp in compList])
+        
         # Analyse the part material and labour costs
         for compList in self.partsList:
             
             for comp in compList:
                 # print(comp.name, comp.product)
                 # print(self.manufacturingDB[comp.product])
-                manufParams = self.manufacturingDB[comp.product]
-                comp.ProductionDefinition(manufParams, self.productionMethods)
+                if define is True:
+                    manufParams = self.manufacturingDB[comp.product]
+                    comp.ProductionDefinition(manufParams, self.productionMethods)
                 
                 self.PartAnalysis(comp, self.materialVars, self.productionVars, runEquip=False)
         
+        self.restored = False
+        
+        if defaultState is True and self.snapshot is None:
+            self.Snapshot()
+        
         # Determine the number of part and assembly production lines
         if len(self.productLines.keys()) == 0:
             self.ProductionLines(self.productLines, self.productionVars, lineType='preform')
@@ -1002,6 +1605,365 @@ class Manufacture:
         # Determine the total costs of manufacturing
         self.TotalCosts()
         
+        self.dirtyStages = set()
+    
+    
+    def Snapshot(self):
+        """
+        A method for saving the production definitions of the components, 
+        which are restored by ResetManufacture instead of re-initialising the
+        components and repeating the definitions. A snapshot is saved by the 
+        first production analysis; changes to the manufacturingDB or 
+        productionMethods databases must be made with Update or marked with 
+        Modified (as done by Reload) to discard it.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        self.snapshot = [(comp, comp.Snapshot()) for compList in self.partsList for comp in compList]
+    
+    
+    def StageReads(self):
+        """
+        A method for determining the database fields read by each stage of 
+        the manufacturing analysis. Fields are tuples of keys, starting with 
+        the Manufacture attribute, e.g. ('productionVars', 'General', 'ppa').
+
+        Returns
+        -------
+        reads : dict
+            Set of fields read by each stage.
+
+        """
+        
+        reads = {stage: set() for stage in analysisStages}
+        
+        flatList = [val for partsList1 in self.partsList for val in partsList1]
+        
+        for comp in flatList:
+            # Part materials, including the cure cycles of the labour costs
+            if type(comp.matDetails) is dict:
+                for matType, matName in comp.matDetails.items():
+                    reads['materials'].add(('materialVars', matType, matName))
+                    reads['labour'].update([('materialVars', matType, matName, cycleType) for cycleType in ['cure cycle', 'post cure cycle']])
+            
+            for i, step in enumerate(comp.productionSteps):
+                if step.consumables is not None and step.consumables[0] != 'N/A':
+                    for consName in step.consumables:
+                        reads['materials'].add(('materialVars', 'consumables', consName))
+                
+                # Production rates of the labour costs
+                reads['labour'].add(('productionVars', comp.productionNames[i]))
+                
+                if step.capitalEquipment is not None and step.capitalEquipment[0] != 'N/A':
+                    for equipVal in step.capitalEquipment:
+                        equipType = 'tooling_and_moulds' if 'mould' in equipVal.lower() else 'capital_equipment'
+                        reads['equipment'].add(('equipmentVars', equipType, equipVal))
+        
+        reads['materials'].update([('scaleVars',), ('scrapRates',)])
+        reads['labour'].update([('scaleVars',), ('cureCycleHours',), ('productionVars', 'General', 'salary')])
+        reads['lines'].update([('productionVars', 'General', key) for key in ['ppa', 'productHours', 'productDays']])
+        reads['equipment'].update([('scaleVars',), ('productionVars', 'General', 'ppa')])
+        
+        return reads
+    
+    
+    def Modified(self, *field):
+        """
+        A method for marking the stages of the manufacturing analysis that 
+        read a changed database field, and the stages using their results, 
+        to be recalculated by Recompute.
+
+        Parameters
+        ----------
+        *field : str
+            Keys of the changed field, starting with the Manufacture attribute,
+            e.g. ('productionVars', 'General', 'ppa'). Changes to the part 
+            definitions (e.g. manufacturingDB or productionMethods) require 
+            the full analysis to be repeated.
+
+        Returns
+        -------
+        set
+            Stages to be recalculated.
+
+        """
+        
+        databases = ['materialVars', 'productionVars', 'equipmentVars', 'scaleVars', 'scrapRates', 'cureCycleHours']
+        
+        if len(field) == 0 or field[0] not in databases:
+            self.dirtyStages.add('definition')
+            
+            # The production definitions are repeated
+            self.snapshot = None
+            
+            return self.dirtyStages
+        
+        reads = self.StageReads()
+        
+        # Stages reading the field, or any field within it
+        dirty = set([stage for stage, fields in reads.items() if any([val[:len(field)] == field or field[:len(val)] == val for val in fields])])
+        
+        for stage in analysisStages[:-1]:
+            if stage in dirty:
+                dirty.update(stageResults[stage])
+        
+        if len(dirty) > 0:
+            dirty.add('totals')
+        
+        self.dirtyStages.update(dirty)
+        
+        return self.dirtyStages
+    
+    
+    def Update(self, field, value):
+        """
+        A method for changing a database value and marking the dependent 
+        stages of the manufacturing analysis to be recalculated.
+
+        Parameters
+        ----------
+        field : tuple
+            Keys of the value, starting with the Manufacture attribute, e.g.
+            ('productionVars', 'General', 'ppa', 'value').
+        value : float
+            New value.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        params = getattr(self, field[0])
+        
+        for key in field[1:-1]:
+            params = params[key]
+        
+        params[field[-1]] = value
+        
+        self.Modified(*field)
+    
+    
+    def Recompute(self):
+        """
+        A method for recalculating the stages of the manufacturing analysis 
+        marked by Modified or Update. The results are identical to repeating
+        the full analysis.
+
+        Returns
+        -------
+        float
+            Total manufacturing costs.
+
+        """
+        
+        if self.scaleReadFile is None:
+            print('*** Error: The production analysis must be performed before the results can be recalculated')
+            return None
+        
+        if len(self.dirtyStages) == 0:
+            return self.costs_manufacturing
+        
+        if 'definition' in self.dirtyStages:
+            self.ProductionAnalysis(scaling=False, reSet=True)
+            return self.costs_manufacturing
+        
+        flatList = [val for partsList1 in self.partsList for val in partsList1]
+        
+        # Analyse the part material and labour costs
+        for comp in flatList:
+            if 'materials' in self.dirtyStages:
+                comp.materials = comp.Materials(comp.matDetails)
+                comp.consumables = comp.Materials()
+                comp.takeoff = []
+            
+            self.PartAnalysis(comp, self.materialVars, self.productionVars, runMats='materials' in self.dirtyStages, runLab='labour' in self.dirtyStages, runEquip=False)
+        
+        # Determine the number of part and assembly production lines
+        if 'lines' in self.dirtyStages:
+            self.productLines = {}
+            self.assemblyLines = {}
+            
+            self.ProductionLines(self.productLines, self.productionVars, lineType='preform')
+            self.ProductionLines(self.assemblyLines, self.productionVars, lineType='assembly')
+        
+        # Analyse the part equipment costs
+        if 'equipment' in self.dirtyStages:
+            for comp in flatList:
+                self.PartAnalysis(comp, self.materialVars, self.productionVars, runMats=False, runLab=False)
+        
+        # Determine the total costs of manufacturing
+        self.TotalCosts()
+        
+        self.dirtyStages = set()
+        
+        return self.costs_manufacturing
+    
+    
+    def BatchAnalysis(self, ppa=None, salary=None, energy=None, materialCosts=None, scrapRates=None, readScaling=False):
+        """
+        A method for performing the manufacturing analysis for many scenarios
+        at once. The scenario values are broadcast against each other and 
+        used as arrays in a single analysis, so the results of each scenario 
+        are identical to a separate analysis with the scenario values. The 
+        input databases and results of the object are unchanged.
+
+        Parameters
+        ----------
+        ppa : array, optional
+            Parts produced per annum. The default is None (database value).
+        salary : array, optional
+            Hourly salary rate. The default is None (database value).
+        energy : array, optional
+            Energy rate. Power costs are not currently included in the total
+            costs, so this does not affect the results. The default is None 
+            (database value).
+        materialCosts : dict, optional
+            Unit costs of the materials and consumables, keyed by material 
+            name (all categories) or by (category, material name), which 
+            takes precedence. The default is None (database values).
+        scrapRates : dict, optional
+            Scrap rates of the materials and consumables, keyed by material 
+            name (see scrapRates). The default is None.
+        readScaling : BOOLEAN, optional
+            If the scaling variables have not been determined yet, readScaling
+            determines if they are calculated within the model (default 
+            option) or read from a file. The default is False.
+
+        Returns
+        -------
+        results : dict
+            Arrays of costs_manufacturing, costs_materials, costs_labour, 
+            costs_equipment and unit_cost, with one value per scenario.
+
+        """
+        
+        materialCosts = {} if materialCosts is None else materialCosts
+        scrapRates = {} if scrapRates is None else scrapRates
+        
+        # Costs by material name first, so that category costs replace them
+        materialCosts = dict(sorted(materialCosts.items(), key=lambda item: type(item[0]) is tuple))
+        
+        general = {'ppa': ppa, 'salary': salary, 'energy': energy}
+        general = {key: val for key, val in general.items() if val is not None}
+        
+        # Broadcast the scenario values against each other
+        scenarioVals = list(general.values()) + list(materialCosts.values()) + list(scrapRates.values())
+        scenarioVals = broadcast_arrays(*[asarray(val, dtype=float) for val in scenarioVals])
+        
+        shape = scenarioVals[0].shape if len(scenarioVals) > 0 else ()
+        
+        scenarioVals = iter(scenarioVals)
+        
+        # Database values replaced for the scenarios, restored afterwards
+        replaced = []
+        
+        def Replace(params, key, value):
+            replaced.append((params, key, params[key] if key in params else KeyError))
+            params[key] = value
+        
+        originalScrapRates = self.scrapRates
+        
+        try:
+            for key in general.keys():
+                if key not in self.productionVars['General']:
+                    Replace(self.productionVars['General'], key, {})
+                
+                Replace(self.productionVars['General'][key], 'value', next(scenarioVals))
+            
+            for matName in materialCosts.keys():
+                values = next(scenarioVals)
+                
+                # A (category, name) key only replaces the cost in that category
+                if type(matName) is tuple:
+                    matCats = [matName[0]] if matName[1] in self.materialVars.get(matName[0], {}) else []
+                    matName = matName[1]
+                else:
+                    matCats = [catName for catName, catParams in self.materialVars.items() if matName in catParams]
+                
+                if len(matCats) == 0:
+                    print('*** Error: Material not found in the materials database: ', matName)
+                
+                for catName in matCats:
+                    Replace(self.materialVars[catName][matName], 'cost', values)
+            
+            self.scrapRates = dict(originalScrapRates)
+            
+            for matName in scrapRates.keys():
+                self.scrapRates[matName] = next(scenarioVals)
+            
+            # Scaling is only performed if it has not been performed already
+            if self.scaleReadFile is None:
+                self.ProductionAnalysis(scaling=True, readScaling=readScaling, reSet=True)
+            else:
+                self.ProductionAnalysis(scaling=False, reSet=True)
+            
+            results = {}
+            
+            for key in ['costs_manufacturing', 'costs_materials', 'costs_labour', 'costs_equipment', 'unit_cost']:
+                results[key] = broadcast_to(asarray(getattr(self, key), dtype=float), shape).copy()
+        
+        finally:
+            # Restore the database values
+            for params, key, value in reversed(replaced):
+                if value is KeyError:
+                    del params[key]
+                else:
+                    params[key] = value
+            
+            self.scrapRates = originalScrapRates
+        
+        # Restore the results of the database values
+        self.ProductionAnalysis(scaling=False, reSet=True)
+        
+        return results
+    
+    
+    def Takeoff(self):
+        """
+        A method for creating the quantity takeoff of the manufacturing 
+        analysis. The takeoff holds the material and consumable masses, 
+        labour hours and equipment costs, and can be re-priced with different
+        unit costs and salary rates without repeating the analysis.
+
+        Returns
+        -------
+        QuantityTakeoff
+            Quantity takeoff of the analysed factory (see Pricing).
+
+        """
+        
+        if self.structure_mass == 0.0:
+            print('*** Error: The production analysis must be performed before the quantity takeoff')
+            return None
+        
+        return QuantityTakeoff(self)
+    
+    
+    def CostPlan(self):
+        """
+        A method for compiling the analysed factory into an array-backed cost
+        plan, for evaluating the costs of many price books (see 
+        Pricing.CostPlan).
+
+        Returns
+        -------
+        CostPlan
+            Cost plan of the analysed factory.
+
+        """
+        
+        takeoff = self.Takeoff()
+        
+        if takeoff is None:
+            return None
+        
+        return takeoff.Compile()
+        
         
     def PartAnalysis(self, comp, materialVars, productionVars, runMats=True, runLab=True, runEquip=True):
         """
@@ -1245,9 +2207,10 @@ class Manufacture:
                     hardenerCost = hardenerMass*unitCost
                     
                     comp.materials.matCost['hardener'] = hardenerCost
+                    comp.takeoff.append(('set', 'materials', 'matCost', 'hardener', hardenerMass, hardenerName, unitCost))
                     
                     # Determine scrap mass and costs for the hardener
-                    scrappage = prodStep.scrapRate
+                    scrappage = self.ScrapRate(hardenerName, prodStep.scrapRate)
                     
                     if scrappage is not None:
                         scrapMass = (scrappage/(1-scrappage))*hardenerMass
@@ -1255,6 +2218,7 @@ class Manufacture:
                         
                         scrapCost = scrapMass*unitCost
                         comp.materials.matCostScrap['hardener'] = scrapCost
+                        comp.takeoff.append(('set', 'materials', 'matCostScrap', 'hardener', scrapMass, hardenerName, unitCost))
                     
                 except:
                     
@@ -1278,9 +2242,10 @@ class Manufacture:
         # Save the cost of materials
         cost = mass*unitCost
         comp.materials.matCost[matType] += cost
+        comp.takeoff.append(('add', 'materials', 'matCost', matType, mass, comp.matDetails[matType], unitCost))
         
         # Determine scrap mass and costs for the material
-        scrappage = prodStep.scrapRate
+        scrappage = self.ScrapRate(comp.matDetails[matType], prodStep.scrapRate)
         
         if scrappage is not None:
             scrapMass = (scrappage/(1-scrappage))*mass
@@ -1288,11 +2253,38 @@ class Manufacture:
             
             scrapCost = scrapMass*unitCost
             comp.materials.matCostScrap[matType] += scrapCost
+            comp.takeoff.append(('add', 'materials', 'matCostScrap', matType, scrapMass, comp.matDetails[matType], unitCost))
             
         
         return mass, cost
 
 
+    def ScrapRate(self, matName, scrapRate):
+        """
+        Determine the scrap rate of a material
+
+        Parameters
+        ----------
+        matName : str
+            Name of the material.
+        scrapRate : float
+            Scrap rate of the production step or consumable (None if no 
+            material is scrapped).
+
+        Returns
+        -------
+        float
+            The scrap rate, replaced by the scrap rate in scrapRates if one is
+            defined for the material.
+
+        """
+        
+        if scrapRate is None:
+            return None
+        
+        return self.scrapRates.get(matName, scrapRate)
+    
+    
     def ConsumablesCost(self, comp, materialVars, stepNum):
         """
         
@@ -1319,6 +2311,7 @@ class Manufacture:
         # Add the consumables to the part object
         consList = prodStep.consumables
         comp.consumables.MaterialAdd(consList)
+        comp.takeoff.append(('reset', 'consumables', consList))
         
         stepConsCost = 0.0
         
@@ -1347,15 +2340,17 @@ class Manufacture:
             
             consCost = mass*unitCost
             comp.consumables.matCost[consName] += consCost
+            comp.takeoff.append(('add', 'consumables', 'matCost', consName, mass, consName, unitCost))
             
             # Determine the mass and cost of scrap consumable materials
-            scrappage = consDatabase['scrap_rate']
+            scrappage = self.ScrapRate(consName, consDatabase['scrap_rate'])
             
             scrapMass = (scrappage/(1-scrappage))*mass
             comp.consumables.massScrap[consName] = scrapMass
             
             scrapCost = scrapMass*unitCost
             comp.consumables.matCostScrap[consName] = scrapCost
+            comp.takeoff.append(('set', 'consumables', 'matCostScrap', consName, scrapMass, consName, unitCost))
             
             stepConsCost += consCost + scrapCost
         
@@ -1447,12 +2442,7 @@ class Manufacture:
             
             cureFile = materialVars[matType][matName][cycleType]
             
-            typeVal = 'float, float, float'
-            columns = [0,1,2]
-            
-            cureCycleVals = array([loadtxt(self.directory+self.dirInputDatabases+self.CSVloc+cureFile, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)])
-            
-            processHours = sum(cureCycleVals[0,1])
+            processHours = self.CureCycleHours(cureFile)
             
             staffNum = prodStep.staff
             
@@ -1590,7 +2580,8 @@ class Manufacture:
         annualHours = productHours * productDays
         
         # Determine the total process hours needed to meet production quotas
-        totalPLtimes = productLineTimes*ppa
+        # (for each scenario if the production variables are arrays)
+        totalPLtimes = multiply.outer(productLineTimes, ppa)
         
         # Determine the number of production lines for each preform
         numProductLines = ceil(totalPLtimes / annualHours)
@@ -1818,7 +2809,7 @@ class Manufacture:
                     
         materialList = list(set(materialList))
         
-        if sum(self.breakdown_consumables_cost.values()) > 0.0:
+        if (asarray(sum(self.breakdown_consumables_cost.values())) > 0.0).any():
             materialList.append('consumables')
         
         for mat in materialList:
@@ -0,0 +1,656 @@
+"""
+Input Database Caching
+
+Stores the converted dictionaries produced from the xml input databases in a
+binary (pickle) snapshot so that unchanged databases are not re-parsed, and
+shares databases that have already been imported between Manufacture objects
+in the same process. Scaling variables determined from the geometry are 
+stored in the same cache directory, keyed by a hash of their inputs.
+
+Author: Edward Fagan
+"""
+import os
+import copy
+import pickle
+import hashlib
+import threading
+from collections.abc import Mapping, MutableMapping
+from .BinaryDatabase import BinaryFileName
+from .DatabaseSchema import Record
+
+# Default maximum size of a snapshot cache directory (bytes)
+snapshotCacheSize = 64*1024**2
+
+# Snapshot file layout version, increment if the stored structure changes
+snapshotVersion = 1
+
+# Scaling variable file layout version, increment if the stored structure or
+# the calculation of the scaling variables changes
+scalingVersion = 1
+
+
+def FileSignature(dataBase):
+    """
+    Determine the signature used to validate a snapshot of a database file.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+
+    Returns
+    -------
+    signature : Dict
+        Dictionary of the absolute path, size, modification time and content
+        hash of the database file.
+
+    """
+
+    path = os.path.abspath(dataBase)
+    stat = os.stat(path)
+
+    with open(path, 'rb') as dbFile:
+        contentHash = hashlib.sha1(dbFile.read()).hexdigest()
+
+    signature = {'path': path,
+                 'size': stat.st_size,
+                 'mtime': stat.st_mtime_ns,
+                 'hash': contentHash}
+
+    return signature
+
+
+def SnapshotName(dataBase, saveList=None, recordType=None):
+    """
+    Determine the snapshot filename for a database and list of saved properties.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+    saveList : List, optional
+        List of the properties saved from the database. The default is None.
+    recordType : Class, optional
+        Record class of the entries. The default is None (dictionaries).
+
+    Returns
+    -------
+    Str
+        Snapshot filename.
+
+    """
+
+    pathKey = hashlib.sha1(os.path.abspath(dataBase).encode('utf-8')).hexdigest()[:16]
+
+    if saveList is None:
+        listKey = 'all'
+    else:
+        listKey = hashlib.sha1('\n'.join(saveList).encode('utf-8')).hexdigest()[:16]
+
+    if recordType is not None:
+        listKey += '_' + recordType.__name__
+
+    return pathKey + '_' + listKey + '.pkl'
+
+
+def LoadSnapshot(dataBase, saveList=None, cacheDir=None, recordType=None):
+    """
+    Load the converted database dictionary from a snapshot if the database
+    file has not changed since the snapshot was taken.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+    saveList : List, optional
+        List of the properties saved from the database. The default is None.
+    cacheDir : Str, optional
+        Snapshot cache directory. The default is None.
+    recordType : Class, optional
+        Record class of the entries. The default is None (dictionaries).
+
+    Returns
+    -------
+    params : Dict or None
+        Dictionary of xml data, or None if no valid snapshot is available.
+
+    """
+
+    if cacheDir is None:
+        return None
+
+    snapFile = os.path.join(cacheDir, SnapshotName(dataBase, saveList, recordType))
+
+    try:
+        with open(snapFile, 'rb') as snap:
+            snapshot = pickle.load(snap)
+    except:
+        return None
+
+    # Check the snapshot matches the current state of the database file
+    try:
+        signature = FileSignature(dataBase)
+    except OSError:
+        return None
+
+    if snapshot.get('version') != snapshotVersion:
+        return None
+
+    for key in signature.keys():
+        if snapshot.get(key) != signature[key]:
+            return None
+
+    # Mark the snapshot as recently used for eviction
+    try:
+        os.utime(snapFile)
+    except OSError:
+        pass
+
+    return snapshot['params']
+
+
+def SaveSnapshot(dataBase, params, saveList=None, cacheDir=None, maxSize=snapshotCacheSize, recordType=None):
+    """
+    Save the converted database dictionary to a snapshot.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+    params : Dict
+        Dictionary of xml data.
+    saveList : List, optional
+        List of the properties saved from the database. The default is None.
+    cacheDir : Str, optional
+        Snapshot cache directory. The default is None.
+    maxSize : Int, optional
+        Maximum size of the cache directory in bytes. The default is
+        snapshotCacheSize.
+    recordType : Class, optional
+        Record class of the entries. The default is None (dictionaries).
+
+    Returns
+    -------
+    None.
+
+    """
+
+    if cacheDir is None:
+        return
+
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+
+        snapshot = FileSignature(dataBase)
+        snapshot['version'] = snapshotVersion
+        snapshot['params'] = params
+
+        snapFile = os.path.join(cacheDir, SnapshotName(dataBase, saveList, recordType))
+
+        # Write to a temporary file first so that readers never see a partial snapshot
+        tempFile = snapFile + '.' + str(os.getpid()) + '.tmp'
+
+        with open(tempFile, 'wb') as snap:
+            pickle.dump(snapshot, snap, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tempFile, snapFile)
+
+    except OSError:
+        print('*** Warning: Unable to write database snapshot for: ', dataBase)
+        return
+
+    EvictSnapshots(cacheDir, maxSize)
+
+
+def EvictSnapshots(cacheDir, maxSize=snapshotCacheSize):
+    """
+    Remove the least recently used snapshots (and cached scaling variables)
+    until the cache directory is within the maximum size.
+
+    Parameters
+    ----------
+    cacheDir : Str
+        Snapshot cache directory.
+    maxSize : Int, optional
+        Maximum size of the cache directory in bytes. The default is
+        snapshotCacheSize.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    snapshots = []
+
+    for fileName in os.listdir(cacheDir):
+        if fileName.endswith('.pkl'):
+            filePath = os.path.join(cacheDir, fileName)
+            try:
+                stat = os.stat(filePath)
+                snapshots.append((stat.st_mtime_ns, stat.st_size, filePath))
+            except OSError:
+                pass
+
+    totalSize = sum([val[1] for val in snapshots])
+
+    # Oldest snapshots are removed first
+    for mtime, size, filePath in sorted(snapshots):
+
+        if totalSize <= maxSize:
+            break
+
+        try:
+            os.remove(filePath)
+            totalSize -= size
+        except OSError:
+            pass
+
+
+def InvalidateSnapshots(cacheDir, dataBase=None):
+    """
+    Remove snapshots from the cache directory.
+
+    Parameters
+    ----------
+    cacheDir : Str
+        Snapshot cache directory.
+    dataBase : Str, optional
+        Database directory and filename. If defined, only the snapshots of
+        this database are removed, otherwise all snapshots are removed. The
+        default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    if not os.path.isdir(cacheDir):
+        return
+
+    if dataBase is None:
+        prefix = ''
+    else:
+        prefix = SnapshotName(dataBase).split('_')[0] + '_'
+
+    for fileName in os.listdir(cacheDir):
+        if fileName.endswith('.pkl') and fileName.startswith(prefix):
+            try:
+                os.remove(os.path.join(cacheDir, fileName))
+            except OSError:
+                pass
+
+
+def InputsHash(*values):
+    """
+    Determine a hash of input values, e.g. for keying cached results.
+
+    Parameters
+    ----------
+    *values : 
+        Input values. Dictionaries (any mapping), lists, tuples, arrays, 
+        bytes and values with a stable repr are supported.
+
+    Returns
+    -------
+    Str
+        Hexadecimal hash of the values.
+
+    """
+    
+    hashObj = hashlib.sha1()
+    
+    def AddValue(value):
+        
+        if isinstance(value, Mapping):
+            hashObj.update(b'{')
+            for key in sorted(value.keys(), key=repr):
+                AddValue(key)
+                AddValue(value[key])
+            hashObj.update(b'}')
+        
+        elif isinstance(value, (list, tuple)):
+            hashObj.update(b'[')
+            for val in value:
+                AddValue(val)
+            hashObj.update(b']')
+        
+        elif isinstance(value, bytes):
+            hashObj.update(b'b' + str(len(value)).encode('utf-8') + b':')
+            hashObj.update(value)
+        
+        elif hasattr(value, 'tobytes'):
+            # Arrays, including the type and shape of the values
+            hashObj.update(('a' + str(value.dtype) + str(value.shape) + ':').encode('utf-8'))
+            hashObj.update(value.tobytes())
+        
+        else:
+            hashObj.update((repr(value) + ';').encode('utf-8'))
+    
+    for value in values:
+        AddValue(value)
+    
+    return hashObj.hexdigest()
+
+
+def ScalingFileName(key, cacheDir):
+    """
+    Determine the filename of cached scaling variables.
+
+    Parameters
+    ----------
+    key : Str
+        Hash of the geometry inputs, from InputsHash.
+    cacheDir : Str
+        Cache directory.
+
+    Returns
+    -------
+    Str
+        Cache directory and filename.
+
+    """
+    
+    return os.path.join(cacheDir, 'scaling_' + key[:32] + '.pkl')
+
+
+def LoadScaling(key, cacheDir=None):
+    """
+    Load the cached scaling variables of the parts for a set of geometry 
+    inputs.
+
+    Parameters
+    ----------
+    key : Str
+        Hash of the geometry inputs, from InputsHash.
+    cacheDir : Str, optional
+        Cache directory. The default is None.
+
+    Returns
+    -------
+    scaleVars : Dict
+        Scaling variables keyed by the hash of the part inputs (empty if 
+        nothing is cached).
+
+    """
+    
+    if cacheDir is None:
+        return {}
+    
+    scaleFile = ScalingFileName(key, cacheDir)
+    
+    try:
+        with open(scaleFile, 'rb') as scale:
+            cached = pickle.load(scale)
+    except:
+        return {}
+    
+    if cached.get('version') != scalingVersion or cached.get('key') != key:
+        return {}
+    
+    # Mark the file as recently used for eviction
+    try:
+        os.utime(scaleFile)
+    except OSError:
+        pass
+    
+    return cached['scaleVars']
+
+
+def SaveScaling(key, scaleVars, cacheDir=None, maxSize=snapshotCacheSize):
+    """
+    Save the scaling variables of the parts for a set of geometry inputs.
+
+    Parameters
+    ----------
+    key : Str
+        Hash of the geometry inputs, from InputsHash.
+    scaleVars : Dict
+        Scaling variables keyed by the hash of the part inputs.
+    cacheDir : Str, optional
+        Cache directory. The default is None.
+    maxSize : Int, optional
+        Maximum size of the cache directory in bytes. The default is
+        snapshotCacheSize.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    if cacheDir is None:
+        return
+    
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        
+        scaleFile = ScalingFileName(key, cacheDir)
+        tempFile = scaleFile + '.' + str(os.getpid()) + '.tmp'
+        
+        with open(tempFile, 'wb') as scale:
+            pickle.dump({'version': scalingVersion, 'key': key, 'scaleVars': scaleVars}, scale, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        os.replace(tempFile, scaleFile)
+    
+    except OSError:
+        print('*** Warning: Unable to write scaling variables to: ', cacheDir)
+        return
+    
+    EvictSnapshots(cacheDir, maxSize)
+
+
+class OverlayDict(MutableMapping):
+    """
+    Copy-on-write view of a shared (read-only) database dictionary.
+    
+    Values are read from the shared dictionary until they are assigned or 
+    deleted, at which point the change is stored in the overlay only. Nested
+    dictionaries are returned as overlays and lists are copied into the 
+    overlay when accessed, so the shared dictionary is never modified.
+    
+    Parameters
+    ----------
+    base : dict
+        The shared database dictionary.
+    """
+    
+    def __init__(self, base):
+        self._base = base
+        self._local = {}
+        self._deleted = set()
+    
+    def __getitem__(self, key):
+        
+        try:
+            return self._local[key]
+        except KeyError:
+            pass
+        
+        if key in self._deleted:
+            raise KeyError(key)
+        
+        value = self._base[key]
+        
+        # Nested values are stored in the overlay so later edits are retained
+        # (records are copied to keep their attributes)
+        if isinstance(value, Record):
+            value = value.copy()
+            self._local[key] = value
+            
+        elif isinstance(value, Mapping):
+            value = OverlayDict(value)
+            self._local[key] = value
+            
+        elif isinstance(value, list):
+            value = list(value)
+            self._local[key] = value
+        
+        return value
+    
+    def __setitem__(self, key, value):
+        self._local[key] = value
+        self._deleted.discard(key)
+    
+    def __delitem__(self, key):
+        
+        if key not in self:
+            raise KeyError(key)
+        
+        self._local.pop(key, None)
+        
+        if key in self._base:
+            self._deleted.add(key)
+    
+    def __contains__(self, key):
+        
+        if key in self._local:
+            return True
+        
+        return key in self._base and key not in self._deleted
+    
+    def __iter__(self):
+        
+        for key in self._base:
+            if key not in self._deleted:
+                yield key
+        
+        for key in self._local:
+            if key not in self._base:
+                yield key
+    
+    def __len__(self):
+        return sum(1 for key in self)
+    
+    def __repr__(self):
+        return repr(self.ToDict())
+    
+    def __copy__(self):
+        return dict(self.items())
+    
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.ToDict(), memo)
+    
+    def ToDict(self):
+        """
+        Method for creating a plain dictionary of the current values
+
+        Returns
+        -------
+        newDict : dict
+            Nested dictionary including any edits made in the overlay.
+
+        """
+        
+        newDict = {}
+        
+        for key in self:
+            value = self[key]
+            
+            if isinstance(value, OverlayDict):
+                value = value.ToDict()
+            
+            newDict[key] = value
+        
+        return newDict
+
+
+# Registry of the databases shared between Manufacture objects
+sharedDatabases = {}
+sharedLock = threading.Lock()
+
+
+def SharedKey(dataBases):
+    """
+    Determine the registry key for a set of database files.
+
+    Parameters
+    ----------
+    dataBases : List
+        List of database directories and filenames (None entries are allowed).
+
+    Returns
+    -------
+    Tuple
+        Absolute path, modification time and size of each database file, and
+        the modification time of its binary database.
+
+    """
+    
+    key = []
+    
+    for dataBase in dataBases:
+        
+        if dataBase is None:
+            key.append(None)
+            continue
+        
+        path = os.path.abspath(dataBase)
+        
+        try:
+            stat = os.stat(path)
+            fileKey = (path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            fileKey = (path, None, None)
+        
+        try:
+            fileKey += (os.stat(BinaryFileName(path)).st_mtime_ns,)
+        except OSError:
+            fileKey += (None,)
+        
+        key.append(fileKey)
+    
+    return tuple(key)
+
+
+def SharedOverlays(key, loader):
+    """
+    Return copy-on-write views of the shared databases, importing the 
+    databases with the loader function if they are not yet registered.
+
+    Parameters
+    ----------
+    key : Tuple
+        Registry key from SharedKey.
+    loader : Function
+        Function returning a tuple of the database dictionaries.
+
+    Returns
+    -------
+    Tuple
+        OverlayDict for each database dictionary (None entries are retained).
+
+    """
+    
+    with sharedLock:
+        
+        try:
+            dataBases = sharedDatabases[key]
+        except KeyError:
+            dataBases = loader()
+            
+            # Remove databases registered for older versions of the same files
+            paths = tuple(val[0] if val else None for val in key)
+            
+            for oldKey in list(sharedDatabases.keys()):
+                if tuple(val[0] if val else None for val in oldKey) == paths:
+                    del sharedDatabases[oldKey]
+            
+            sharedDatabases[key] = dataBases
+    
+    return tuple(OverlayDict(val) if val is not None else None for val in dataBases)
+
+
+def ClearSharedDatabases():
+    """
+    Remove all databases from the shared registry.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    with sharedLock:
+        sharedDatabases.clear()
@@ -0,0 +1,235 @@
+"""
+Database Schema
+
+Typed records of the materials and equipment database entries. Each record is
+a dictionary of the original property values (so existing code using the
+database dictionaries is unchanged) with the numeric properties of the schema
+also stored, converted to float, in slot attributes. Records are created as 
+the entries are imported (see MapParameters.ReadInputsXML), and the numeric
+properties are validated when the database is imported.
+
+Author: Edward Fagan
+"""
+import re
+import copy
+from numpy import ndarray
+
+## Numeric properties of the materials database
+materialSchema = ["width", "length", "thickness (cured)", "areal weight",
+                  "cost", "density of fibres", "density of resin",
+                  "fibre volume fraction", "fibre content",
+                  "resin-hardener ratio", "thickness", "density",
+                  "scrap_rate", "lineal weight"]
+
+## Numeric properties of the equipment database
+equipmentSchema = ["purchase cost", "installation cost", "useful life",
+                   "salvage value", "machine length", "machine width",
+                   "occupancy factor", "lifetime"]
+
+## Placeholders used in the databases for values that are not defined
+missingValues = ['N/A', '___']
+
+
+def AttributeName(propName):
+    """
+    Determine the record attribute name for a database property name.
+
+    Parameters
+    ----------
+    propName : Str
+        Database property name, e.g. 'thickness (cured)'.
+
+    Returns
+    -------
+    Str
+        Attribute name, e.g. 'thicknessCured'.
+
+    """
+
+    words = [val for val in re.split('[^0-9a-zA-Z]+', propName) if val]
+
+    return words[0].lower() + ''.join([val[0].upper() + val[1:] for val in words[1:]])
+
+
+def NumericValue(value):
+    """
+    Validate and convert a numeric property value.
+
+    Parameters
+    ----------
+    value : Float, Int or Str
+        Property value from the database.
+
+    Returns
+    -------
+    Float or None
+        The value as a float, or None if the value is not numeric (e.g. 'N/A').
+        Arrays of values (e.g. scenario values) are returned as float arrays.
+
+    """
+
+    if type(value) is bool:
+        return None
+
+    if isinstance(value, ndarray):
+        try:
+            return value.astype(float)
+        except (TypeError, ValueError):
+            return None
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Record(dict):
+    """
+    Typed record of a database entry.
+
+    The record is a dictionary of the original property values, with the
+    numeric properties of the schema also stored as float attributes (None if
+    a value is missing or not numeric). Changes made through the dictionary
+    interface are applied to the attributes.
+    """
+
+    __slots__ = ()
+
+    # Property name: attribute name, defined for each schema
+    fields = {}
+
+    def __init__(self, *args, **kwargs):
+
+        super().__init__(*args, **kwargs)
+
+        for key, attr in self.fields.items():
+            object.__setattr__(self, attr, NumericValue(self[key]) if key in self else None)
+
+    def __setitem__(self, key, value):
+
+        super().__setitem__(key, value)
+
+        if key in self.fields:
+            object.__setattr__(self, self.fields[key], NumericValue(value))
+
+    def __delitem__(self, key):
+
+        super().__delitem__(key)
+
+        if key in self.fields:
+            object.__setattr__(self, self.fields[key], None)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+    def __copy__(self):
+        return self.__class__(self)
+
+    def copy(self):
+        return self.__class__(self)
+
+    def __deepcopy__(self, memo):
+        return self.__class__(copy.deepcopy(dict(self), memo))
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, value=None):
+        if key not in self:
+            self[key] = value
+        return self[key]
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        if key in self.fields:
+            object.__setattr__(self, self.fields[key], None)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        if key in self.fields:
+            object.__setattr__(self, self.fields[key], None)
+        return key, value
+
+    def clear(self):
+        super().clear()
+        for attr in self.fields.values():
+            object.__setattr__(self, attr, None)
+
+    def Invalid(self):
+        """
+        Determine the numeric properties that do not have a numeric value, 
+        other than the placeholders for values that are not defined
+
+        Returns
+        -------
+        List
+            Names of the invalid properties.
+
+        """
+
+        return [key for key, attr in self.fields.items() if key in self and getattr(self, attr) is None and self[key] is not None and self[key] not in missingValues]
+
+
+def RecordClass(name, schema):
+    """
+    Create a record class for a schema.
+
+    Parameters
+    ----------
+    name : Str
+        Name of the record class.
+    schema : List
+        Names of the numeric properties.
+
+    Returns
+    -------
+    Class
+        Record class with a slot attribute for each numeric property.
+
+    """
+
+    fields = {propName: AttributeName(propName) for propName in schema}
+
+    return type(name, (Record,), {'__slots__': tuple(fields.values()), 'fields': fields})
+
+
+MaterialRecord = RecordClass('MaterialRecord', materialSchema)
+EquipmentRecord = RecordClass('EquipmentRecord', equipmentSchema)
+
+
+def ValidateDatabase(params, dataBase=None):
+    """
+    Check the numeric properties of the records of a database.
+
+    Parameters
+    ----------
+    params : Dict
+        Dictionary of database data, with a record for each entry.
+    dataBase : Str, optional
+        Database directory and filename, used in the error message. The 
+        default is None.
+
+    Raises
+    ------
+    ValueError
+        If any numeric property has a value that is not numeric (other than 
+        the placeholders of missingValues). The message lists the category, 
+        entry, property and value of each invalid value.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    invalid = []
+
+    for catName, catParams in params.items():
+        for paramName, record in catParams.items():
+            for propName in record.Invalid():
+                invalid.append((catName, paramName, propName, record[propName]))
+
+    if len(invalid) > 0:
+        raise ValueError('Invalid numeric values in database ' + str(dataBase) + ': ' + ', '.join([repr(val) for val in invalid]))
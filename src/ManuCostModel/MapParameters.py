@@ -1,6 +1,40 @@
 import xml.etree.ElementTree as ET
 import xml.dom.minidom as md
+from xml.sax.saxutils import unescape
+from collections.abc import MutableMapping
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+import os
+import re
 import string
+from .DataCache import LoadSnapshot, SaveSnapshot, SharedKey, SharedOverlays, OverlayDict, snapshotCacheSize
+from .BinaryDatabase import BinaryFileName, UseBinaryDatabase, ReadBinaryDatabase
+from .DatabaseSchema import MaterialRecord, EquipmentRecord, ValidateDatabase
+
+## Variables that will be saved into the production database
+saveVarsMethods = ["labourHours", "labourScaling", "staff", "activity", 
+                   "capitalEquipment", "materials", "materialScaling", "scrapRate", 
+                   "scrapVar", "consumables", "name"]
+
+## Variables that will be saved into the materials database
+saveVarsMaterials = ["material", "fabric", "resin", "width", "length", "thickness (cured)",
+                     "areal weight", "cost", "density of fibres", "density of resin",
+                     "fibre volume fraction", "fibre content", "resin-hardener ratio",
+                     "thickness", "density", "resin name", "hardener name",
+                     "fabric name", "cure cycle", "post cure cycle", "resin name", 
+                     "scaling variable", "scrap_rate", "lineal weight"]
+
+## Variables that will be saved into the equipment database
+saveVarsEquipment = ["purchase cost", "installation cost", "useful life", 
+                     "salvage value", "floorspace", "machine length", 
+                     "machine width", "occupancy factor", "scaling variables", 
+                     "scaling values", "lifetime"]
+
+## Size of the blocks read when indexing an xml database (bytes)
+indexChunkSize = 2**20
+
+## System level parameters mapped into the construction variables database
+# System parameter name: (element name, parameter name, decimal places)
+systemParameterMap = {'RPA_AF_MWS_Span': ('external_geometry', 'wing length', 2)}
 
 # Import data from parameters list
 def apxml(source):
@@ -32,17 +66,104 @@ def mapMCMinputs(paramsList):
     # Update the construction input database with the new wing length
     source = 'constructionVariablesDatabase.xml'
     
-    src_tree = ET.parse(source)
+    WriteSystemParameters(source, paramsList)
+
+
+def MapSystemParameters(paramsList, consInputVars):
+    """
+    Apply a set of system level parameters to the construction variables 
+    in memory, without modifying the construction variables database file.
+
+    Parameters
+    ----------
+    paramsList : Dict
+        Dictionary of system level parameters, as returned by apxml.
+    consInputVars : Dict
+        Dictionary containing the construction input data.
+
+    Returns
+    -------
+    consInputVars : Dict
+        The updated construction input data. Values are stored as the text 
+        written by mapMCMinputs, so the data matches a re-import of the 
+        updated database file.
+
+    """
     
-    wingLen = src_tree.find('.//parameter[@name="wing length"]')
-    wingVal = wingLen.find('.//property[@name="value"]')
+    for paramName, (elemName, consName, places) in systemParameterMap.items():
+        
+        if paramName in paramsList:
+            consInputVars[elemName][consName]['value'] = str(round(paramsList[paramName], places))
     
-    wingVal.text = str(round(paramsList['RPA_AF_MWS_Span'], 2))
+    return consInputVars
+
+
+def MapParameterSets(paramSets, consInputVars, consVariables=None):
+    """
+    Apply a batch of system level parameter sets (e.g. one per design point)
+    to copy-on-write views of the construction variables. The construction
+    input data and database file are not modified for each design.
+
+    Parameters
+    ----------
+    paramSets : List
+        List of system level parameter dictionaries, as returned by apxml.
+    consInputVars : Dict
+        Dictionary containing the construction input data.
+    consVariables : Str, optional
+        Construction variables input database directory and file name. If 
+        defined, the last parameter set is written to the database file once 
+        all sets have been mapped. The default is None.
+
+    Returns
+    -------
+    designVars : List
+        Construction input data for each parameter set, which can be assigned
+        to the consInputVars of a Manufacture object.
+
+    """
     
-    src_tree.write(source)
+    designVars = [MapSystemParameters(paramsList, OverlayDict(consInputVars)) for paramsList in paramSets]
+    
+    # Single update of the database file for the final design
+    if consVariables and len(paramSets) > 0:
+        WriteSystemParameters(consVariables, paramSets[-1])
+    
+    return designVars
 
 
-def ReadInputs(manufInputVars, productionVariables, productionMethods, materialVariables, equipmentVariables, consVariables=None):
+def WriteSystemParameters(consVariables, paramsList):
+    """
+    Write a set of system level parameters to the construction variables 
+    database file.
+
+    Parameters
+    ----------
+    consVariables : Str
+        Construction variables input database directory and file name.
+    paramsList : Dict
+        Dictionary of system level parameters, as returned by apxml.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    src_tree = ET.parse(consVariables)
+    
+    for paramName, (elemName, consName, places) in systemParameterMap.items():
+        
+        if paramName in paramsList:
+            param = src_tree.find('.//parameter[@name="'+consName+'"]')
+            paramVal = param.find('.//property[@name="value"]')
+            
+            paramVal.text = str(round(paramsList[paramName], places))
+    
+    src_tree.write(consVariables)
+
+
+def ReadInputs(manufInputVars, productionVariables, productionMethods, materialVariables, equipmentVariables, consVariables=None, cacheDir=None, cacheSize=snapshotCacheSize, stream=False, lazy=False, workers=None, processes=False, compiled=False):
     """
     Read in the input variables from the xml database files.
 
@@ -60,6 +181,32 @@ def ReadInputs(manufInputVars, productionVariables, productionMethods, materialV
         Equipment input database directory and file name.
     consVariables : Str, optional
         Construction variables input database directory and file name. The default is None.
+    cacheDir : Str, optional
+        Directory for snapshots of the converted databases. Snapshots are only
+        used if a directory is defined. The default is None.
+    cacheSize : Int, optional
+        Maximum size of the snapshot directory in bytes. The default is snapshotCacheSize.
+    stream : Bool, optional
+        If True, the databases are read incrementally to limit memory use for
+        large databases. The default is False.
+    lazy : Bool, optional
+        If True, only the materials and equipment referenced by the 
+        manufacturing and production methods databases are imported, other 
+        entries are imported when first accessed. The lazily imported 
+        databases are indexed and read directly from their xml files, so 
+        cacheDir and stream only apply to the other databases. The default 
+        is False.
+    workers : Int, optional
+        Number of workers used to import the databases concurrently. The 
+        databases are imported one after another if not defined. The default 
+        is None.
+    processes : Bool, optional
+        If True, the concurrent imports use a process pool, otherwise a thread
+        pool is used. The default is False.
+    compiled : Bool, optional
+        If True, the materials and equipment entries are imported as typed 
+        records (see DatabaseSchema) and their numeric properties are 
+        validated. The default is False.
 
     Returns
     -------
@@ -78,76 +225,254 @@ def ReadInputs(manufInputVars, productionVariables, productionMethods, materialV
 
     """
     
-    ## Import the manufacturing input parameters
-    params1 = ReadInputsXML(manufInputVars)
+    ## Variables that will be saved into the production database
+    saveVars1 = saveVarsMethods
     
-    # Check database contains input data
-    if not params1:
-        print('*** Error: Input parameters database file is empty: ', manufInputVars)
+    ## Variables that will be saved into the materials database
+    saveVars2 = saveVarsMaterials
     
-    ## Import the production variables input parameters
-    params2 = ReadInputsXML(productionVariables)
+    ## Variables that will be saved into the equipment database
+    saveVars3 = saveVarsEquipment
     
-    # Check database contains input data
-    if not params2:
-        print('*** Error: Input parameters database file is empty: ', productionVariables)
+    # Set up a pool to import the databases concurrently
+    if workers:
+        if processes is True:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        executor = None
     
-    ## Import the production methods input parameters
-    # Variables that will be saved into the production database
-    saveVars1 = ["labourHours", "labourScaling", "staff", "activity", 
-                  "capitalEquipment", "materials", "materialScaling", "scrapRate", 
-                  "scrapVar", "consumables", "name"]
+    # Record types of the materials and equipment entries
+    if compiled is True:
+        materialRecord, equipmentRecord = MaterialRecord, EquipmentRecord
+    else:
+        materialRecord, equipmentRecord = None, None
     
-    params3 = ReadInputsXML(productionMethods, saveVars1)
+    def Load(dataBase, saveList=None, recordType=None):
+        # Import now, or start the import in the pool
+        if executor is None:
+            return ReadInputsXML(dataBase, saveList, cacheDir=cacheDir, cacheSize=cacheSize, stream=stream, recordType=recordType)
+        
+        return executor.submit(ReadInputsXML, dataBase, saveList, cacheDir=cacheDir, cacheSize=cacheSize, stream=stream, recordType=recordType)
     
-    # Check database contains input data
-    if not params3:
-        print('*** Error: Input parameters database file is empty: ', productionMethods)
+    def Result(pending):
+        # Wait for an import started in the pool
+        if isinstance(pending, Future):
+            return pending.result()
+        
+        return pending
     
-    ## Import the material input parameters
-    # Variables that will be saved into the materials database
-    saveVars2 = ["material", "fabric", "resin", "width", "length", "thickness (cured)",
-                "areal weight", "cost", "density of fibres", "density of resin",
-                "fibre volume fraction", "fibre content", "resin-hardener ratio",
-                "thickness", "density", "resin name", "hardener name",
-                "fabric name", "cure cycle", "post cure cycle", "resin name", 
-                "scaling variable", "scrap_rate", "lineal weight"]
+    # Binary databases are always imported in full
+    lazyMaterials = lazy is True and not UseBinaryDatabase(materialVariables)
+    lazyEquipment = lazy is True and not UseBinaryDatabase(equipmentVariables)
     
-    params4 = ReadInputsXML(materialVariables, saveVars2)
+    try:
+        # Start all imports before checking any results, results are then 
+        # collected and checked in a fixed order so reporting is unchanged
+        pending1 = Load(manufInputVars)
+        pending2 = Load(productionVariables)
+        pending3 = Load(productionMethods, saveVars1)
+        
+        if lazyMaterials is False:
+            pending4 = Load(materialVariables, saveVars2, materialRecord)
+        
+        if lazyEquipment is False:
+            pending5 = Load(equipmentVariables, saveVars3, equipmentRecord)
+        
+        if consVariables:
+            pending6 = Load(consVariables)
+        
+        ## Import the manufacturing input parameters
+        params1 = Result(pending1)
+        
+        # Check database contains input data
+        if not params1:
+            print('*** Error: Input parameters database file is empty: ', manufInputVars)
+        
+        ## Import the production variables input parameters
+        params2 = Result(pending2)
+        
+        # Check database contains input data
+        if not params2:
+            print('*** Error: Input parameters database file is empty: ', productionVariables)
+        
+        ## Import the production methods input parameters
+        params3 = Result(pending3)
+        
+        # Check database contains input data
+        if not params3:
+            print('*** Error: Input parameters database file is empty: ', productionMethods)
+        
+        ## Import the material input parameters
+        # Determine the materials and equipment referenced by the production data
+        if lazy is True:
+            materialRefs, equipmentRefs = DatabaseReferences(params1, params3)
+        
+        if lazyMaterials is True:
+            params4 = LazyDatabase(materialVariables, saveVars2, preload=materialRefs, recordType=materialRecord)
+        else:
+            params4 = Result(pending4)
+        
+        # Check database contains input data
+        if not params4:
+            print('*** Error: Input parameters database file is empty: ', materialVariables)
+        
+        ## Import the equipment input parameters
+        if lazyEquipment is True:
+            params5 = LazyDatabase(equipmentVariables, saveVars3, preload=equipmentRefs, recordType=equipmentRecord)
+        else:
+            params5 = Result(pending5)
+        
+        # Check database contains input data
+        if not params5:
+            print('*** Error: Input parameters database file is empty: ', equipmentVariables)
+        
+        ## Import the construction input parameters
+        if consVariables:
+            params6 = Result(pending6)
+            
+            # Check database contains input data
+            if not params6:
+                print('*** Error: Input parameters database file is empty: ', consVariables)
+        
+        else:
+            
+            params6 = None
     
-    # Check database contains input data
-    if not params4:
-        print('*** Error: Input parameters database file is empty: ', materialVariables)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
     
-    ## Import the equipment input parameters
-    # Variables that will be saved into the equipment database
-    saveVars3 = ["purchase cost", "installation cost", "useful life", 
-                "salvage value", "floorspace", "machine length", 
-                "machine width", "occupancy factor", "scaling variables", 
-                "scaling values", "lifetime"]
+    return params1, params2, params3, params4, params5, params6
+
+
+def DatabaseReferences(manufParams, productionMethods):
+    """
+    Determine the materials, consumables and equipment referenced by the 
+    manufacturing and production methods databases.
+
+    Parameters
+    ----------
+    manufParams : Dict
+        Dictionary containing the manufacturing input data.
+    productionMethods : Dict
+        Dictionary containing the production methods input data.
+
+    Returns
+    -------
+    materialRefs : Set
+        Names of the materials and consumables referenced.
+    equipmentRefs : Set
+        Names of the capital equipment, tooling and moulds referenced.
+
+    """
     
-    params5 = ReadInputsXML(equipmentVariables, saveVars3)
+    materialCategories = ['fabric', 'resin', 'hardener', 'prepreg', 'core', 'adhesive', 'coating']
     
-    # Check database contains input data
-    if not params5:
-        print('*** Error: Input parameters database file is empty: ', equipmentVariables)
+    materialRefs = set()
+    equipmentRefs = set()
+    methodRefs = set()
     
-    ## Import the construction input parameters
-    if consVariables:
-        params6 = ReadInputsXML(consVariables)
+    # Materials and production methods assigned to each component
+    for product in manufParams.values():
         
-        # Check database contains input data
-        if not params6:
-            print('*** Error: Input parameters database file is empty: ', consVariables)
+        for part in product.values():
+            
+            for key, val in part.items():
+                
+                if key in materialCategories and val != 'N/A':
+                    materialRefs.add(val)
+                
+                elif key in ['preforming', 'curing', 'assembly'] and val != 'N/A':
+                    methodRefs.add(val)
     
-    else:
+    # Consumables and equipment used in each production step
+    for method in methodRefs:
+        
+        try:
+            steps = productionMethods[method]
+        except KeyError:
+            continue
         
-        params6 = None
+        for step in steps.values():
+            
+            for key, refs in [('consumables', materialRefs), ('capitalEquipment', equipmentRefs)]:
+                
+                vals = step.get(key, 'N/A')
+                
+                if type(vals) is str:
+                    vals = [vals]
+                
+                refs.update([val for val in vals if val != 'N/A'])
     
-    return params1, params2, params3, params4, params5, params6
+    return materialRefs, equipmentRefs
+
+
+def ReadSharedInputs(manufInputVars, productionVariables, productionMethods, materialVariables, equipmentVariables, consVariables=None, cacheDir=None, cacheSize=snapshotCacheSize, stream=False, lazy=False, workers=None, processes=False, compiled=False):
+    """
+    Read in the input variables from the xml database files once per process
+    and return copy-on-write views of the shared data. Changes made to the 
+    returned dictionaries are local to each view.
+
+    Parameters
+    ----------
+    manufInputVars : Str
+        Manufacturing input database directory and file name.
+    productionVariables : Str
+        Production variables input database directory and file name.
+    productionMethods : Str
+        Production methods input database directory and file name.
+    materialVariables : Str
+        Materials input database directory and file name.
+    equipmentVariables : Str
+        Equipment input database directory and file name.
+    consVariables : Str, optional
+        Construction variables input database directory and file name. The default is None.
+    cacheDir : Str, optional
+        Directory for snapshots of the converted databases. The default is None.
+    cacheSize : Int, optional
+        Maximum size of the snapshot directory in bytes. The default is snapshotCacheSize.
+    stream : Bool, optional
+        If True, the databases are read incrementally to limit memory use for
+        large databases. The default is False.
+    lazy : Bool, optional
+        If True, only the materials and equipment referenced by the 
+        manufacturing and production methods databases are imported, other 
+        entries are imported when first accessed. The lazily imported 
+        databases are indexed and read directly from their xml files, so 
+        cacheDir and stream only apply to the other databases. The default 
+        is False.
+    workers : Int, optional
+        Number of workers used to import the databases concurrently. The 
+        databases are imported one after another if not defined. The default 
+        is None.
+    processes : Bool, optional
+        If True, the concurrent imports use a process pool, otherwise a thread
+        pool is used. The default is False.
+    compiled : Bool, optional
+        If True, the materials and equipment entries are imported as typed 
+        records (see DatabaseSchema) and their numeric properties are 
+        validated. The default is False.
+
+    Returns
+    -------
+    Tuple
+        OverlayDict views of the six input databases, in the same order as 
+        ReadInputs.
+
+    """
+    
+    dataBases = [manufInputVars, productionVariables, productionMethods, materialVariables, equipmentVariables, consVariables]
+    
+    def loader():
+        return ReadInputs(*dataBases, cacheDir=cacheDir, cacheSize=cacheSize, stream=stream, lazy=lazy, workers=workers, processes=processes, compiled=compiled)
+    
+    # Compiled and plain databases of the same files are shared separately
+    return SharedOverlays(SharedKey(dataBases) + ((compiled,),), loader)
 
 
-def ReadInputsXML(dataBase, saveList=None):
+def ReadInputsXML(dataBase, saveList=None, cacheDir=None, cacheSize=snapshotCacheSize, stream=False, recordType=None):
     """
     Import variables from an xml database.
 
@@ -155,6 +480,75 @@ def ReadInputsXML(dataBase, saveList=None):
     ----------
     dataBase : Str
         Database directory and filename.
+    saveList : List, optional
+        List of the properties to save. The default is None (all properties).
+    cacheDir : Str, optional
+        Directory for snapshots of the converted database. If a valid snapshot
+        exists the xml file is not parsed. The default is None.
+    cacheSize : Int, optional
+        Maximum size of the snapshot directory in bytes. The default is snapshotCacheSize.
+    stream : Bool, optional
+        If True, the database is read incrementally and each parameter is 
+        discarded once converted, so memory use does not grow with the size 
+        of the xml file. The default is False.
+    recordType : Class, optional
+        Record class of the entries (see DatabaseSchema), e.g. MaterialRecord.
+        The entries are created as records as they are imported, and the 
+        numeric properties of the records are validated. The default is None
+        (the entries are dictionaries).
+
+    Raises
+    ------
+    ValueError
+        If a record has an invalid numeric property value.
+
+    Returns
+    -------
+    params : Dict
+        Dictionary of xml data.
+    
+    Notes
+    -----
+    If a binary database (see BinaryDatabase) exists alongside the xml file 
+    and is at least as recent, or the xml file is not available, the data are
+    imported from the binary database instead.
+
+    """
+    
+    # Import from the binary database if one has been created from the xml file
+    if UseBinaryDatabase(dataBase):
+        params = ReadBinaryDatabase(BinaryFileName(dataBase), saveList, recordType)
+    
+    else:
+        # Load the converted values from a snapshot if the database is unchanged
+        params = LoadSnapshot(dataBase, saveList, cacheDir, recordType)
+        
+        if params is None:
+            params = ParseInputsXML(dataBase, saveList, stream, recordType)
+            
+            # Snapshot the converted values for subsequent imports
+            SaveSnapshot(dataBase, params, saveList, cacheDir, cacheSize, recordType)
+    
+    if recordType is not None:
+        ValidateDatabase(params, dataBase)
+    
+    return params
+
+
+def ParseInputsXML(dataBase, saveList=None, stream=False, recordType=None):
+    """
+    Parse and convert the variables of an xml database.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+    saveList : List, optional
+        List of the properties to save. The default is None (all properties).
+    stream : Bool, optional
+        If True, the database is read incrementally. The default is False.
+    recordType : Class, optional
+        Record class of the entries. The default is None (dictionaries).
 
     Returns
     -------
@@ -163,6 +557,9 @@ def ReadInputsXML(dataBase, saveList=None):
 
     """
     
+    if stream is True:
+        return ReadInputsXMLStream(dataBase, saveList, recordType)
+    
     # Read values from the input database
     tree = ET.parse(dataBase)
     root = tree.getroot()
@@ -170,11 +567,6 @@ def ReadInputsXML(dataBase, saveList=None):
     # Dictionary to store the variables
     params = {}
     
-    if saveList is None:
-        saveAll = True
-    else:
-        saveAll = False
-    
     # Iterate thorugh the input parameters and copy values
     for tag in root:
         
@@ -183,40 +575,382 @@ def ReadInputsXML(dataBase, saveList=None):
         # Loop through each parameter
         for param in tag.iter('parameter'):
             
-            params[tag.attrib['name']][param.attrib['name']] = {}
+            params[tag.attrib['name']][param.attrib['name']] = ReadParameter(param, saveList, recordType)
+    
+    return params
+
+
+def ReadInputsXMLStream(dataBase, saveList=None, recordType=None):
+    """
+    Import variables from an xml database incrementally. The returned 
+    dictionary is identical to ReadInputsXML, but elements are cleared from 
+    memory as soon as each parameter has been converted.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+    saveList : List, optional
+        List of the properties to save. The default is None (all properties).
+    recordType : Class, optional
+        Record class of the entries. The default is None (dictionaries).
+
+    Returns
+    -------
+    params : Dict
+        Dictionary of xml data.
+
+    """
+    
+    # Dictionary to store the variables
+    params = {}
+    
+    # Stack of the currently open elements
+    openElems = []
+    
+    for event, elem in ET.iterparse(dataBase, events=('start', 'end')):
+        
+        if event == 'start':
+            
+            openElems.append(elem)
+            
+            # Children of the root element define the database categories
+            if len(openElems) == 2:
+                tagName = elem.attrib['name']
+                params[tagName] = {}
+            
+            continue
+        
+        openElems.pop()
+        
+        if elem.tag == 'parameter' and len(openElems) >= 2:
+            
+            params[tagName][elem.attrib['name']] = ReadParameter(elem, saveList, recordType)
             
-            # If no list of desired properties is defined, save all properties for the parameter
-            if saveAll is True:
-                saveList = [prop.attrib['name'] for prop in param.iter('property')]
+            # Release the parameter once its values have been copied
+            elem.clear()
             
-            # Loop through each property
-            for prop in param.iter('property'):
+            if len(openElems[-1]) > 0 and openElems[-1][-1] is elem:
+                del openElems[-1][-1]
+        
+        elif len(openElems) == 1:
+            
+            # Release the category element once complete
+            elem.clear()
+            
+            if len(openElems[0]) > 0 and openElems[0][-1] is elem:
+                del openElems[0][-1]
+    
+    return params
+
+
+class LazyDatabase(MutableMapping):
+    """
+    Database dictionary that imports parameters from an xml database only 
+    when they are first accessed.
+    
+    The database file is indexed when the object is created, so the 
+    categories and parameter names are available without converting any 
+    property values. Accessing a parameter converts it with ReadParameter and
+    keeps the result, so later edits are retained.
+    
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+    saveList : List, optional
+        List of the properties to save. The default is None (all properties).
+    preload : Set, optional
+        Names of the parameters to import immediately. The default is None.
+    recordType : Class, optional
+        Record class of the entries (see DatabaseSchema). Each record is 
+        validated when it is imported. The default is None (dictionaries).
+    """
+    
+    def __init__(self, dataBase, saveList=None, preload=None, recordType=None):
+        
+        self.dataBase = dataBase
+        self.saveList = saveList
+        self.recordType = recordType
+        
+        self.categories = {}
+        
+        for catName, paramIndex in IndexInputsXML(dataBase).items():
+            self.categories[catName] = LazyCategory(self, paramIndex, catName)
+        
+        # Import the parameters that are known to be required
+        if preload:
+            for category in self.categories.values():
+                for name in preload:
+                    if name in category:
+                        category[name]
+    
+    def __getitem__(self, key):
+        return self.categories[key]
+    
+    def __setitem__(self, key, value):
+        self.categories[key] = value
+    
+    def __delitem__(self, key):
+        del self.categories[key]
+    
+    def __iter__(self):
+        return iter(self.categories)
+    
+    def __len__(self):
+        return len(self.categories)
+    
+    def __repr__(self):
+        return 'LazyDatabase(' + repr(self.dataBase) + ')'
+    
+    def ReadEntry(self, catName, start, end):
+        """
+        Method for importing a single parameter from the database file
+
+        Parameters
+        ----------
+        catName : Str
+            Name of the category of the parameter.
+        start : Int
+            Byte offset of the start of the parameter element.
+        end : Int
+            Byte offset of the end of the parameter element.
+
+        Returns
+        -------
+        Dict
+            Dictionary (or record) of the converted property values.
+
+        """
+        
+        with open(self.dataBase, 'rb') as dbFile:
+            dbFile.seek(start)
+            data = dbFile.read(end - start)
+        
+        param = ET.fromstring(data)
+        paramDict = ReadParameter(param, self.saveList, self.recordType)
+        
+        if self.recordType is not None:
+            ValidateDatabase({catName: {param.attrib['name']: paramDict}}, self.dataBase)
+        
+        return paramDict
+    
+    
+class LazyCategory(MutableMapping):
+    """
+    A single category (element) of a LazyDatabase.
+    
+    Parameters
+    ----------
+    database : LazyDatabase
+        The database the category belongs to.
+    paramIndex : Dict
+        Byte offsets of each parameter in the database file.
+    name : Str, optional
+        Name of the category. The default is None.
+    """
+    
+    def __init__(self, database, paramIndex, name=None):
+        self.database = database
+        self.paramIndex = paramIndex
+        self.name = name
+        self.loaded = {}
+    
+    def __getitem__(self, key):
+        
+        try:
+            return self.loaded[key]
+        except KeyError:
+            pass
+        
+        start, end = self.paramIndex[key]
+        
+        value = self.database.ReadEntry(self.name, start, end)
+        self.loaded[key] = value
+        
+        return value
+    
+    def __setitem__(self, key, value):
+        
+        if key not in self.paramIndex:
+            self.paramIndex[key] = None
+        
+        self.loaded[key] = value
+    
+    def __delitem__(self, key):
+        del self.paramIndex[key]
+        self.loaded.pop(key, None)
+    
+    def __contains__(self, key):
+        return key in self.paramIndex
+    
+    def __iter__(self):
+        return iter(self.paramIndex)
+    
+    def __len__(self):
+        return len(self.paramIndex)
+    
+    def __repr__(self):
+        return 'LazyCategory(' + repr(list(self.paramIndex)) + ')'
+
+
+def IndexInputsXML(dataBase, chunkSize=indexChunkSize):
+    """
+    Locate the categories and parameters in an xml database without parsing
+    the property values. The file is read in blocks, so the whole database 
+    is not held in memory.
+
+    Parameters
+    ----------
+    dataBase : Str
+        Database directory and filename.
+    chunkSize : Int, optional
+        Size of the blocks read from the file (bytes). The default is 
+        indexChunkSize.
+
+    Returns
+    -------
+    index : Dict
+        Dictionary of the byte offsets (start, end) of each parameter element,
+        for each category of the database.
+
+    """
+    
+    tagPattern = re.compile(rb'<(element|parameter)\b[^>]*?\bname\s*=\s*("|\')(.*?)\2[^>]*?(/?)>|</parameter\s*>|<!--.*?-->', re.S)
+    
+    index = {}
+    
+    category = None
+    depth = 0
+    
+    # Unprocessed data, starting at a byte offset of the file
+    data = b''
+    offset = 0
+    
+    with open(dataBase, 'rb') as dbFile:
+        
+        while True:
+            
+            chunk = dbFile.read(chunkSize)
+            data += chunk
+            
+            if chunk:
+                # Only search up to the last tag, which may be incomplete,
+                # or the start of a comment that may be incomplete
+                end = data.rfind(b'<')
                 
-                if (prop.attrib['name'] in saveList):
+                if end < 0:
+                    end = len(data)
+                
+                commentStart = data.rfind(b'<!--')
+                
+                if commentStart >= 0:
+                    commentEnd = data.find(b'-->', commentStart + 4)
                     
-                    # Check if input value should be converted to float or int (default is string)
-                    try:
-                        if prop.attrib['type'] == 'double':
-                            saveVal = float(prop.text)
-                        elif prop.attrib['type'] == 'int':
-                            saveVal = int(float(prop.text))
-                        elif prop.attrib['type'] == 'vars':
-                            saveVal = str.split(prop.text, ', ')
-                        elif prop.attrib['type'] == 'list':
-                            saveVal = str.split(prop.text, ',')
-                            try:
-                                saveVal = [float(val) for val in saveVal]
-                            except:
-                                pass
-                        else:
-                            saveVal = prop.text
-                    except:
-                        saveVal = prop.text
+                    if commentEnd < 0 or commentEnd + 3 > end:
+                        end = commentStart
+                
+                if end == 0:
+                    continue
+            
+            else:
+                end = len(data)
+            
+            for match in tagPattern.finditer(data, 0, end):
+                
+                tagType = match.group(1)
+                
+                # Skip comments
+                if match.group(0).startswith(b'<!--'):
+                    continue
+                
+                if tagType == b'element':
+                    category = {}
+                    index[unescape(match.group(3).decode('utf-8'), {'&quot;': '"', '&apos;': "'"})] = category
+                
+                elif tagType == b'parameter':
+                    
+                    if depth == 0:
+                        paramName = unescape(match.group(3).decode('utf-8'), {'&quot;': '"', '&apos;': "'"})
+                        paramStart = offset + match.start()
                     
-                    # Save the value into the input parameters dictionary
-                    params[tag.attrib['name']][param.attrib['name']][prop.attrib['name']] = saveVal
+                    # Self-closing parameter elements have no properties
+                    if match.group(4) == b'/':
+                        if depth == 0 and category is not None:
+                            category[paramName] = (paramStart, offset + match.end())
+                    else:
+                        depth += 1
                 
-    return params
+                elif depth > 0:
+                    depth -= 1
+                    
+                    if depth == 0 and category is not None:
+                        category[paramName] = (paramStart, offset + match.end())
+            
+            data = data[end:]
+            offset += end
+            
+            if not chunk:
+                break
+    
+    return index
+
+
+def ReadParameter(param, saveList=None, recordType=None):
+    """
+    Convert the properties of a parameter element from an xml database.
+
+    Parameters
+    ----------
+    param : Element
+        The xml parameter element.
+    saveList : List, optional
+        List of the properties to save. The default is None (all properties).
+    recordType : Class, optional
+        Record class of the parameter (see DatabaseSchema). The default is 
+        None (a dictionary).
+
+    Returns
+    -------
+    paramDict : Dict
+        Dictionary (or record) of the converted property values.
+
+    """
+    
+    paramDict = {}
+    
+    # Loop through each property
+    for prop in param.iter('property'):
+        
+        # If no list of desired properties is defined, save all properties for the parameter
+        if saveList is None or prop.attrib['name'] in saveList:
+            
+            # Check if input value should be converted to float or int (default is string)
+            try:
+                if prop.attrib['type'] == 'double':
+                    saveVal = float(prop.text)
+                elif prop.attrib['type'] == 'int':
+                    saveVal = int(float(prop.text))
+                elif prop.attrib['type'] == 'vars':
+                    saveVal = str.split(prop.text, ', ')
+                elif prop.attrib['type'] == 'list':
+                    saveVal = str.split(prop.text, ',')
+                    try:
+                        saveVal = [float(val) for val in saveVal]
+                    except:
+                        pass
+                else:
+                    saveVal = prop.text
+            except:
+                saveVal = prop.text
+            
+            # Save the value into the parameter dictionary
+            paramDict[prop.attrib['name']] = saveVal
+    
+    if recordType is not None:
+        return recordType(paramDict)
+    
+    return paramDict
 
 
 def ConsistencyCheck(manufParams, productionVars, productionMethods, materialVars, equipmentVars, consInputVars=None):
@@ -5,29 +5,714 @@ Author: Edward M Fagan
 
 """
 
-from numpy import array, loadtxt, transpose, zeros, full, ceil, where, sqrt
+import os
+import weakref
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+from numpy import array, asarray, loadtxt, zeros, full, ceil, where, sqrt, concatenate, cumsum, diff, sort, searchsorted, minimum, maximum, isnan, unique, split, argsort, bincount
+from collections.abc import Mapping
+from .DataCache import InputsHash, LoadScaling, SaveScaling
+
+# Geometry data loaded from csv files, shared by all components in the process
+geometryCache = {}
+geometryLock = threading.Lock()
+
+# Maximum number of csv columns held in the geometry cache
+geometryCacheSize = 512
+
+# Airfoil profiles prepared from the cached csv data
+airfoilCache = {}
+
+# Hashes of the geometry csv contents, keyed by the csv file signatures
+contentsCache = {}
+
+"""
+Geometry inputs
+"""
+def LoadCSV(direct, fileName, typeVal='float', columns=0):
+    """
+    Load columns of a geometry or cure cycle csv file, either from the csv 
+    file or from geometry data held in memory.
+
+    Parameters
+    ----------
+    direct : Str or Dict
+        Directory of the csv files, or a dictionary of the file contents 
+        keyed by file name. File contents are arrays of the csv values 
+        (excluding the header row), with one column per csv column.
+    fileName : Str
+        Name of the csv file.
+    typeVal : Str, optional
+        Data type of the values. The default is 'float'.
+    columns : Int or Tuple, optional
+        Column number, or tuple of column numbers. The default is 0.
+
+    Returns
+    -------
+    Array or List
+        The column values (a list of arrays if more than one column is 
+        requested), as returned by loadtxt with unpack=True.
+
+    """
+    
+    if not isinstance(direct, Mapping):
+        return CachedCSV(direct+fileName, typeVal, columns)
+    
+    # Geometry data held in memory
+    if typeVal == 'str':
+        data = asarray(direct[fileName], dtype=str)
+    else:
+        data = asarray(direct[fileName], dtype=float)
+    
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+    
+    # Read-only data (e.g. a memory-mapped geometry bundle) is used without copying
+    if not data.flags.writeable:
+        if type(columns) is int:
+            return data[:, columns]
+        
+        return [data[:, col] for col in columns]
+    
+    if type(columns) is int:
+        return data[:, columns].copy()
+    
+    return [data[:, col].copy() for col in columns]
+
+
+def CachedCSV(csvFile, typeVal='float', columns=0):
+    """
+    Load columns of a csv file, reusing the values already loaded if the 
+    file has not changed (based on its modification time and size). The
+    returned arrays are shared and therefore read-only.
+
+    Parameters
+    ----------
+    csvFile : Str
+        Directory and name of the csv file.
+    typeVal : Str, optional
+        Data type of the values. The default is 'float'.
+    columns : Int or Tuple, optional
+        Column number, or tuple of column numbers. The default is 0.
+
+    Returns
+    -------
+    Array or List
+        The column values, as returned by loadtxt with unpack=True.
+
+    """
+    
+    stat = os.stat(csvFile)
+    
+    key = (os.path.abspath(csvFile), typeVal, columns if type(columns) is int else tuple(columns))
+    signature = (stat.st_mtime_ns, stat.st_size)
+    
+    with geometryLock:
+        try:
+            cached = geometryCache[key]
+        except KeyError:
+            cached = None
+    
+    if cached is not None and cached[0] == signature:
+        data = cached[1]
+        
+    else:
+        data = loadtxt(csvFile, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
+        
+        # Prevent changes to the shared arrays
+        for vals in (data if type(data) is list else [data]):
+            vals.flags.writeable = False
+        
+        with geometryLock:
+            geometryCache.pop(key, None)
+            geometryCache[key] = (signature, data)
+            
+            # Remove the oldest entries if the cache is full
+            while len(geometryCache) > geometryCacheSize:
+                del geometryCache[next(iter(geometryCache))]
+    
+    if type(data) is list:
+        return list(data)
+    
+    return data
+
+
+def ClearGeometryCache():
+    """
+    Remove all csv data from the geometry cache.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    with geometryLock:
+        geometryCache.clear()
+        airfoilCache.clear()
+        contentsCache.clear()
+
+
+def Square(vals):
+    """
+    Square each value of an array with the same floating point operation as
+    a scalar power (x**2.0), so array results are identical to calculations
+    made one value at a time. (Array powers are calculated as x*x, which can 
+    differ in the last bit.)
+
+    Parameters
+    ----------
+    vals : array
+        Values to square.
+
+    Returns
+    -------
+    array
+        Squared values.
+
+    """
+    
+    return array([val**2.0 for val in vals.tolist()], dtype=float)
+
+
+def SpanSum(vals, total=None):
+    """
+    Sum a spanwise distribution in span order, as the built-in sum would, 
+    without looping over the span locations in Python.
+
+    Parameters
+    ----------
+    vals : array
+        Spanwise distribution, one row per span location.
+    total : float, optional
+        Sum of the preceding span locations, when the span is summed in 
+        blocks. The default is None.
+
+    Returns
+    -------
+    float
+        Sum of the first column.
+
+    """
+    
+    if total is not None:
+        return cumsum(concatenate(([total], vals[:, 0])))[-1]
+    
+    return cumsum(vals[:, 0])[-1]
+
+
+def SpanBlock(vals, span):
+    """
+    Values of a spanwise distribution within a block of span locations. 
+    Single values apply to all span locations and are returned unchanged.
+
+    Parameters
+    ----------
+    vals : array
+        Spanwise distribution.
+    span : tuple
+        First and last (exclusive) span location of the block, or None for 
+        the full span.
+
+    Returns
+    -------
+    array
+        Values of the block.
+
+    """
+    
+    if span is None or vals.ndim == 0 or len(vals) == 1:
+        return vals
+    
+    return vals[span[0]:span[1]]
+
+
+def SpanColumn(vals, span):
+    """
+    Values of a spanwise distribution within a block of span locations, as a
+    column with one row per span location. The column is a view of the 
+    distribution (e.g. of a memory-mapped geometry bundle), not a copy.
+
+    Parameters
+    ----------
+    vals : array
+        Spanwise distribution.
+    span : tuple
+        First and last (exclusive) span location of the block, or None for 
+        the full span.
+
+    Returns
+    -------
+    array
+        Values of the block, with shape (number of locations, 1).
+
+    """
+    
+    return SpanBlock(vals, span).reshape(-1, 1)
+
+
+def SpanTotals(outputNames, totals=None):
+    """
+    Sums of the preceding span blocks for each output
+
+    Parameters
+    ----------
+    outputNames : list
+        Names of the outputs.
+    totals : dict, optional
+        Sums of the preceding span blocks, keyed by output name. The default 
+        is None (the first block, or the full span).
+
+    Returns
+    -------
+    list
+        Sum of each output, or None for each output if there are no 
+        preceding blocks.
+
+    """
+    
+    if totals is None:
+        return [None]*len(outputNames)
+    
+    return [totals[name] for name in outputNames]
+
+
+def SpanRanges(seg, blockSize=None):
+    """
+    Divide the span locations into blocks
+
+    Parameters
+    ----------
+    seg : int
+        Number of span locations.
+    blockSize : int, optional
+        Number of span locations in each block, at least one. The default 
+        is None (a single block of the full span).
+
+    Returns
+    -------
+    list
+        First and last (exclusive) span location of each block, or [None]
+        for the full span.
+
+    """
+    
+    if blockSize is None:
+        return [None]
+    
+    if blockSize < 1:
+        raise ValueError('Block size must be at least one span location: ' + str(blockSize))
+    
+    return [(start, min(start + blockSize, seg)) for start in range(0, seg, blockSize)]
+
+
+class AirfoilProfile:
+    """
+    Airfoil profile coordinates, split at the leading edge, with the 
+    cumulative arc length of each surface.
+    
+    The coordinates before the leading edge point (the last point with x = 0)
+    form the lower surface, the remaining coordinates form the upper surface.
+    Surface lengths are found from the cumulative arc lengths instead of 
+    summing the distances between coordinates.
+    
+    Parameters
+    ----------
+    airfoil : list
+        Arrays of the x and y coordinates of the profile (chord normalised).
+    """
+    
+    def __init__(self, airfoil):
+        
+        self.x, self.y = airfoil[0], airfoil[1]
+        
+        # Find the point where the coordinates switch from pressure side to suction side
+        switch = where(self.x == 0.0)
+        self.point = list(switch)[0][-1]
+        
+        # Cumulative arc length along each surface from its first coordinate
+        self.lowerLength = self.ArcLength(self.x[:self.point], self.y[:self.point])
+        self.upperLength = self.ArcLength(self.x[self.point:], self.y[self.point:])
+        
+        # Sorted lower surface and minimum of the remaining upper surface 
+        # coordinates, for locating chordwise positions
+        self.lowerSorted = sort(self.x[:self.point])
+        self.upperMin = minimum.accumulate(self.x[self.point:][::-1])[::-1]
+    
+    def ArcLength(self, x, y):
+        """
+        Cumulative arc length along a surface
+
+        Parameters
+        ----------
+        x : array
+            x coordinates of the surface.
+        y : array
+            y coordinates of the surface.
+
+        Returns
+        -------
+        array
+            Arc length from the first coordinate to each coordinate.
+
+        """
+        
+        return concatenate(([0.0], cumsum(sqrt(Square(diff(x)) + Square(diff(y))))))
+    
+    def LowerLength(self, numPoints):
+        """
+        Length of the lower surface through its first coordinates
+
+        Parameters
+        ----------
+        numPoints : int or array
+            Number of coordinates (for each span location).
+
+        Returns
+        -------
+        float or array
+            Surface length.
+
+        """
+        
+        return self.lowerLength[maximum(asarray(numPoints) - 1, 0)]
+    
+    def UpperLength(self, numPoints):
+        """
+        Length of the upper surface through its first coordinates
+
+        Parameters
+        ----------
+        numPoints : int or array
+            Number of coordinates (for each span location).
+
+        Returns
+        -------
+        float or array
+            Surface length.
+
+        """
+        
+        return self.upperLength[maximum(asarray(numPoints) - 1, 0)]
+    
+    def LowerCount(self, chordLocs):
+        """
+        Number of lower surface coordinates at or before chordwise locations
+
+        Parameters
+        ----------
+        chordLocs : array
+            Chordwise locations (x/c).
+
+        Returns
+        -------
+        array
+            Number of lower surface coordinates with x <= each location.
+
+        """
+        
+        chordLocs = asarray(chordLocs, dtype=float)
+        
+        # No coordinates satisfy a comparison with an undefined location
+        return where(isnan(chordLocs), 0, searchsorted(self.lowerSorted, chordLocs, side='right'))
+    
+    def UpperCount(self, chordLocs):
+        """
+        Number of upper surface coordinates up to the last coordinate at or 
+        before chordwise locations
+
+        Parameters
+        ----------
+        chordLocs : array
+            Chordwise locations (x/c).
+
+        Returns
+        -------
+        array
+            Index of the last upper surface coordinate with x <= each 
+            location, plus one (zero if there is no such coordinate).
+
+        """
+        
+        chordLocs = asarray(chordLocs, dtype=float)
+        
+        return where(isnan(chordLocs), 0, searchsorted(self.upperMin, chordLocs, side='right'))
+
+
+def SpanProfiles(direct, airfoilsDist, seg, start=0, profiles=None):
+    """
+    Group the span locations by airfoil profile
+
+    Parameters
+    ----------
+    direct : Str or Dict
+        Directory of the csv files, or a dictionary of the file contents.
+    airfoilsDist : array
+        Airfoil designation at each span location.
+    seg : int
+        Number of span locations.
+    start : int, optional
+        First span location, the locations are returned relative to this 
+        location. The default is 0.
+    profiles : dict, optional
+        Airfoil profiles already loaded, keyed by file name. Profiles loaded
+        are added to the dictionary. The default is None.
+
+    Raises
+    ------
+    IndexError
+        If the airfoil distribution has fewer values than span locations.
+
+    Returns
+    -------
+    list
+        Airfoil profile and array of span locations for each profile.
+
+    """
+    
+    if len(airfoilsDist) < seg:
+        raise IndexError('Airfoil distribution is shorter than the span distribution')
+    
+    # Group the span locations by airfoil, in order of first appearance
+    sectNames, firstLocs, sectIndex = unique(asarray(airfoilsDist[start:seg], dtype=str), return_index=True, return_inverse=True)
+    
+    spanLocs = split(argsort(sectIndex, kind='stable'), cumsum(bincount(sectIndex))[:-1])
+    
+    stations = {"Airfoils_" + sectNames[i] + ".csv": spanLocs[i] for i in argsort(firstLocs)}
+    
+    if profiles is None:
+        profiles = {}
+    
+    for airfoilSect in stations.keys():
+        if airfoilSect not in profiles:
+            profiles[airfoilSect] = LoadAirfoil(direct, airfoilSect)
+    
+    return [(profiles[airfoilSect], spanLocs) for airfoilSect, spanLocs in stations.items()]
+
+
+def LoadAirfoil(direct, airfoilName):
+    """
+    Load an airfoil profile, reusing the profile already prepared if the csv
+    data has not changed.
+
+    Parameters
+    ----------
+    direct : Str or Dict
+        Directory of the csv files, or a dictionary of the file contents.
+    airfoilName : Str
+        Name of the airfoil csv file.
+
+    Returns
+    -------
+    AirfoilProfile
+        The airfoil profile.
+
+    """
+    
+    airfoil = LoadCSV(direct, airfoilName, 'float,float', (0,1))
+    
+    # Geometry held in memory is not cached
+    if isinstance(direct, Mapping):
+        return AirfoilProfile(airfoil)
+    
+    key = os.path.abspath(direct+airfoilName)
+    
+    with geometryLock:
+        profile = airfoilCache.get(key)
+    
+    # The csv cache returns the same arrays until the file changes
+    if profile is None or profile.x is not airfoil[0]:
+        profile = AirfoilProfile(airfoil)
+        
+        with geometryLock:
+            airfoilCache[key] = profile
+            
+            while len(airfoilCache) > geometryCacheSize:
+                del airfoilCache[next(iter(airfoilCache))]
+    
+    return profile
+
+
+class SpanGeometry:
+    """
+    Spanwise airfoil geometry shared by the skin and web structural 
+    breakdowns. The skin surface lengths (both sides) and the profile 
+    thickness at the webs (both positions) are determined in a single pass 
+    over the span locations, or over a block of the span locations.
+    
+    Parameters
+    ----------
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    chordName : str
+        Name of the chord distribution csv file.
+    airfoilName : str
+        Name of the airfoil distribution csv file.
+    webLocsName : str
+        Name of the web location distribution csv file.
+    sparWidthName : str
+        Name of the spar cap width distribution csv file.
+    span : tuple, optional
+        First and last (exclusive) span location of the block, or None for 
+        the full span. The default is None.
+    profiles : dict, optional
+        Airfoil profiles already loaded, shared between the blocks of a span.
+        The default is None.
+    """
+    
+    def __init__(self, direct, chordName, airfoilName, webLocsName, sparWidthName, span=None, profiles=None):
+        
+        # Inputs
+        chordDist = LoadCSV(direct, chordName, 'float', 0)
+        airfoilsDist = LoadCSV(direct, airfoilName, 'str', 0)
+        webLocation = LoadCSV(direct, webLocsName, 'float', 0)
+        sparWidth = LoadCSV(direct, sparWidthName, 'float', 0)
+        
+        # Total number of span locations, and the span locations of the block
+        self.seg = seg = len(chordDist)
+        self.span = span
+        
+        start, stop = (0, seg) if span is None else span
+        numLocs = stop - start
+        
+        self.lengthDist = {'Lower': zeros((numLocs,1)), 'Upper': zeros((numLocs,1))}
+        self.LElengthDist = {'Lower': zeros((numLocs,1)), 'Upper': zeros((numLocs,1))}
+        self.profileThickDist = {'Fore': zeros((numLocs,1)), 'Aft': zeros((numLocs,1))}
+        self.webCheck = {'Fore': zeros(numLocs, dtype=bool), 'Aft': zeros(numLocs, dtype=bool)}
+        
+        # Errors are reported when the geometry of a skin is requested
+        self.skinErrors = {}
+        
+        if len(webLocation) < seg:
+            self.skinErrors['Lower'] = self.skinErrors['Upper'] = 'Web location distribution is shorter than the chord distribution'
+        
+        # Location of the webs, as a fraction of the chord
+        numAft = min(len(webLocation), len(sparWidth), stop)
+        
+        webPoints = {'Fore': webLocation[start:stop],
+                     'Aft': webLocation[start:numAft] + sparWidth[start:numAft]/chordDist[start:numAft]}
+        
+        chordDist = chordDist[start:stop]
+        webLocation = webLocation[start:stop]
+        
+        # Calculate all span locations using the same airfoil profile at once
+        for profile, spanLocs in SpanProfiles(direct, airfoilsDist, stop, start, profiles):
+            
+            chordVals = chordDist[spanLocs]
+            
+            # Skin surface lengths, in total and to the point where the spar cap begins
+            if len(self.skinErrors) == 0:
+                
+                lowerPoints = profile.LowerCount(webLocation[spanLocs])
+                upperPoints = profile.UpperCount(webLocation[spanLocs])
+                
+                self.lengthDist['Lower'][spanLocs, 0] = profile.LowerLength(profile.point)*chordVals
+                self.LElengthDist['Lower'][spanLocs, 0] = profile.LowerLength(lowerPoints)*chordVals
+                
+                if (upperPoints == 0).any():
+                    self.skinErrors['Upper'] = 'No upper surface coordinates before the spar cap'
+                
+                self.lengthDist['Upper'][spanLocs, 0] = profile.UpperLength(len(profile.x) - profile.point)*chordVals
+                self.LElengthDist['Upper'][spanLocs, 0] = profile.UpperLength(upperPoints)*chordVals
+            
+            # Profile thickness at the fore and aft webs
+            for webType, webPoint in webPoints.items():
+                
+                webLocs = spanLocs[spanLocs < len(webPoint)]
+                
+                # Find the airfoil coordinates where the spar cap begins on the HP and LP skins
+                lowerPoints = profile.LowerCount(webPoint[webLocs])
+                upperPoints = profile.UpperCount(webPoint[webLocs])
+                
+                # Check in case the web location is zero, i.e. no web
+                webCheck = (lowerPoints > 0) & (upperPoints > 0)
+                
+                webLocs = webLocs[webCheck]
+                lowerPoints = lowerPoints[webCheck] - 1
+                upperPoints = profile.point + upperPoints[webCheck] - 1
+                
+                # Determine the height of the profile at the web
+                webDist = sqrt(Square(profile.x[upperPoints] - profile.x[lowerPoints]) + Square(profile.y[upperPoints] - profile.y[lowerPoints]))
+                
+                self.profileThickDist[webType][webLocs, 0] = webDist*chordDist[webLocs]
+                self.webCheck[webType][webLocs] = True
+    
+    def SkinLengths(self, skinType):
+        """
+        Surface length distributions of a skin
+
+        Parameters
+        ----------
+        skinType : str
+            Side of the skin ('Lower', otherwise the upper skin).
+
+        Raises
+        ------
+        IndexError
+            If the spar cap location is not within the skin.
+
+        Returns
+        -------
+        lengthDist : array
+            Spanwise distribution (of the block) of the skin surface length.
+        LElengthDist : array
+            Spanwise distribution of the surface length to the spar cap.
+
+        """
+        
+        if skinType != 'Lower':
+            skinType = 'Upper'
+        
+        if skinType in self.skinErrors:
+            raise IndexError(self.skinErrors[skinType])
+        
+        return self.lengthDist[skinType].copy(), self.LElengthDist[skinType].copy()
+    
+    def ProfileThickness(self, webType):
+        """
+        Profile thickness distribution at a web
+
+        Parameters
+        ----------
+        webType : str
+            Position of the web ('Fore' or 'Aft').
+
+        Returns
+        -------
+        profileThickDist : array
+            Spanwise distribution (of the block) of the profile thickness at 
+            the web.
+        webCheck : array
+            True at the span locations where the web is within the profile.
+
+        """
+        
+        return self.profileThickDist[webType].copy(), self.webCheck[webType].copy()
+
 
 """
 Spars structural breakdown
 """
-def SparStructuralBreakdown(direct, chordName, sparWidthName, sparThickName, wingSpan, plyWidth):
+def SparStructuralBreakdown(direct, chordName, sparWidthName, sparThickName, wingSpan, plyWidth, span=None, totals=None):
 #     Inputs
     typeVal = 'float'
     columns = (0)
     
-    chordDist = loadtxt(direct+chordName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
+    chordDist = LoadCSV(direct, chordName, typeVal, columns)
     
     # Need to decide on keeping SparLocation file setup or changing to a spar width
-    sparWidthArray = transpose(array([loadtxt(direct+sparWidthName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+    sparWidthArray = SpanColumn(LoadCSV(direct, sparWidthName, typeVal, columns), span)
     
-    sparPlyNums = transpose(array([loadtxt(direct+sparThickName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+    sparPlyNums = SpanColumn(LoadCSV(direct, sparThickName, typeVal, columns), span)
     
 #     Processes
     seg = len(chordDist)
     
     segLen = wingSpan/float(seg)
     
-    segments = full((seg,1), segLen)
+    numLocs = seg if span is None else span[1] - span[0]
+    segments = full((numLocs,1), segLen)
     
     sparSA = segments*sparWidthArray
     
@@ -40,97 +725,41 @@ def SparStructuralBreakdown(direct, chordName, sparWidthName, sparThickName, win
 #       Values required for mass calculation: totalSurfArea
 #       Values required for labour calculation: sparSA, totalPlyLength
     
-    outputs = [sum(sparSA)[0], sum(totalSurfArea)[0], sum(totalPlyLength)[0]]
-    outputs = [float(val) for val in outputs]
     outputNames = ['Surface Area', 'Ply Surface Area', 'Ply Length']
+    totals = SpanTotals(outputNames, totals)
+    
+    outputs = [SpanSum(sparSA, totals[0]), SpanSum(totalSurfArea, totals[1]), SpanSum(totalPlyLength, totals[2])]
+    outputs = [float(val) for val in outputs]
     
     return outputs, outputNames
 
 """
 Skins structural breakdown
 """
-def SkinStructuralBreakdown(direct, chordName, airfoilName, sparWidthName, skinThickName, wingSpan, plyWidth, skinType, webLocsName, coreCheck=0, coreVals=None):
+def SkinStructuralBreakdown(direct, chordName, airfoilName, sparWidthName, skinThickName, wingSpan, plyWidth, skinType, webLocsName, coreCheck=0, coreVals=None, geometry=None, span=None, totals=None):
     
-    def distCalc(coord1, coord2):
-        return sqrt((coord2[0] - coord1[0])**2.0 + (coord2[1] - coord1[1])**2.0)
-        
 #    Inputs
-    typeVal = 'float'
-    columns = (0)
-    
-    chordDist = loadtxt(direct+chordName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
-    
-    seg = len(chordDist)
+    # Span geometry shared with the other parts (determined here if not provided)
+    if geometry is None:
+        geometry = SpanGeometry(direct, chordName, airfoilName, webLocsName, sparWidthName, span)
     
-    typeVal = 'str'
-    columns = (0)
-    
-#    chordName = "Chord.csv"
-#    direct = r'C:\Users\0116092S\Dropbox\SFI Industry Fellowship\08 - Tasks & Tools\01 Work Package 1\02 Engineering Analysis\Python Cost Model\Verification\CSV Files\\'
-#    airfoilName = "Airfoils Distribution.csv"
-#    seg = 124
-#    skinType = 'LP'
+    seg = geometry.seg
+    span = geometry.span
     
-    airfoilsDist = loadtxt(direct+airfoilName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
-    
-    lengthDist = zeros((seg,1))
-    LElengthDist = zeros((seg,1))
-    TElengthDist = zeros((seg,1))
-    
-    for spanLoc in range(len(chordDist)):
-        
-        airfoilSect = "Airfoils_" + airfoilsDist[spanLoc] + ".csv"
-        typeVal = 'float,float'
-        columns = (0,1)
-        airfoils = loadtxt(direct+airfoilSect, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
-        
-        # Find the point where the coordinates switch from pressure side to suction side
-        switch = where(airfoils[0] == 0.0)
-        point = list(switch)[0][-1]
-        
-        if(skinType == 'Lower'):
-            skinSide = [airfoils[0][:point], airfoils[1][:point]]
-            
-            # Find the point where the spar cap begins
-            typeVal = 'float'
-            columns = (0)
-            webLocation = loadtxt(direct+webLocsName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
-            
-            # Find the airfoil coordinate where the spar cap begins
-            switch2 = where(airfoils[0] <= webLocation[spanLoc])
-#            point2 = list(switch2)[0][-1] + 1
-            point2 = len(where(array(switch2)<point)[0])
-            LEskinSide = [airfoils[0][:point2], airfoils[1][:point2]]
-            
-        else:
-            skinSide = [airfoils[0][point:], airfoils[1][point:]]
-            
-            # Find the point where the spar cap begins
-            typeVal = 'float'
-            columns = (0)
-            webLocation = loadtxt(direct+webLocsName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
-            
-            # Find the point where the spar cap begins
-            switch2 = where(airfoils[0][point:] <= webLocation[spanLoc])
-            point2 = list(switch2)[0][-1] + 1
-            LEskinSide = [airfoils[0][point:point+point2], airfoils[1][point:point+point2]]
-        
-        surfaceLength = sum([distCalc([skinSide[0][i], skinSide[1][i]], [skinSide[0][i+1], skinSide[1][i+1]]) for i in range(len(skinSide[0])-1)])
-        LEsurfaceLength = sum([distCalc( [LEskinSide[0][i], LEskinSide[1][i]] , [LEskinSide[0][i+1], LEskinSide[1][i+1]] ) for i in range(len(LEskinSide[0])-1)])
-        
-        lengthDist[spanLoc] = surfaceLength*chordDist[spanLoc]
-        LElengthDist[spanLoc] = LEsurfaceLength*chordDist[spanLoc]
+    lengthDist, LElengthDist = geometry.SkinLengths(skinType)
+    numLocs = len(lengthDist)
+    TElengthDist = zeros((numLocs,1))
     
     typeVal = 'float'
     columns = (0)
     
-    sparWidthArray = transpose(array([loadtxt(direct+sparWidthName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+    sparWidthArray = SpanColumn(LoadCSV(direct, sparWidthName, typeVal, columns), span)
     
-    skinPlyNums = transpose(array([loadtxt(direct+skinThickName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+    skinPlyNums = SpanColumn(LoadCSV(direct, skinThickName, typeVal, columns), span)
     
 #     Processes
     segLen = wingSpan/float(seg)
-    segments = full((seg,1), segLen)
+    segments = full((numLocs,1), segLen)
     
     skinSA = segments*lengthDist
     
@@ -143,12 +772,15 @@ def SkinStructuralBreakdown(direct, chordName, airfoilName, sparWidthName, skinT
     # update once data is available
     bondLine = segments*2
     
+    outputNames = ['Surface Area', 'Ply Length', 'Ply Surface Area', 'Bondline', 'Core Surface Area', 'Core Ply Length', 'Core Ply Surface Area']
+    totals = SpanTotals(outputNames, totals)
+    
     """
     Core structural breakdown
     """
     if(coreCheck == 0):
         # Outputs:
-        outputs = [sum(skinSA)[0], sum(totalPlyLength)[0], sum(totalSurfArea)[0], sum(bondLine)[0], 0.0, 0.0, 0.0]
+        outputs = [SpanSum(skinSA, totals[0]), SpanSum(totalPlyLength, totals[1]), SpanSum(totalSurfArea, totals[2]), SpanSum(bondLine, totals[3]), 0.0, 0.0, 0.0]
         outputs = [float(val) for val in outputs]
     
     else:
@@ -159,17 +791,17 @@ def SkinStructuralBreakdown(direct, chordName, airfoilName, sparWidthName, skinT
         # Determine spanwise distribution of the core thickness
         typeVal = 'float'
         columns = (1)
-        LEcoreThickDist = transpose(array([loadtxt(direct+skinThickName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+        LEcoreThickDist = SpanColumn(LoadCSV(direct, skinThickName, typeVal, columns), span)
         
         columns = (2)
-        TEcoreThickDist = transpose(array([loadtxt(direct+skinThickName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+        TEcoreThickDist = SpanColumn(LoadCSV(direct, skinThickName, typeVal, columns), span)
         
         # Check if there's a fraction of the panel without core material
         if('N/A' in coreFrac):
-            coreFracDist = zeros((seg,1))
+            coreFracDist = zeros((numLocs,1))
         else:
             columns = (0)
-            coreFracDist = transpose(array([loadtxt(direct+coreFrac, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+            coreFracDist = SpanColumn(LoadCSV(direct, coreFrac, typeVal, columns), span)
         
         # Calculate the length of the trailing edge panel region
         TElengthDist = lengthDist - sparWidthArray - LElengthDist 
@@ -202,98 +834,54 @@ def SkinStructuralBreakdown(direct, chordName, airfoilName, sparWidthName, skinT
 #        Outputs:
 #           Values required for mass calculation: totalSurfArea, coreTotalSurfArea
 #           Values required for labour calculation: skinSA, skinCoreSA, totalPlyLength, coreTotalPlyLength
-        outputs = [sum(skinSA)[0], sum(totalPlyLength)[0], sum(totalSurfArea)[0], sum(bondLine)[0], sum(skinCoreSA)[0], sum(coreTotalPlyLength)[0], sum(coreTotalSurfArea)[0]]
+        outputs = [SpanSum(skinSA, totals[0]), SpanSum(totalPlyLength, totals[1]), SpanSum(totalSurfArea, totals[2]), SpanSum(bondLine, totals[3]), SpanSum(skinCoreSA, totals[4]), SpanSum(coreTotalPlyLength, totals[5]), SpanSum(coreTotalSurfArea, totals[6])]
         outputs = [float(val) for val in outputs]
     
-    outputNames = ['Surface Area', 'Ply Length', 'Ply Surface Area', 'Bondline', 'Core Surface Area', 'Core Ply Length', 'Core Ply Surface Area']
-    
     return outputs, outputNames
 
 
 """
 Webs structural breakdown
 """
-def WebStructuralBreakdown(direct, chordName, wingSpan, webThickName, skinThickName, sparThickName, sparWidthName, skinPlyThick, plyWidth, sparPlyThick, webLocsName, airfoilName, webType, coreCheck=0, coreVals=None):
+def WebStructuralBreakdown(direct, chordName, wingSpan, webThickName, skinThickName, sparThickName, sparWidthName, skinPlyThick, plyWidth, sparPlyThick, webLocsName, airfoilName, webType, coreCheck=0, coreVals=None, geometry=None, span=None, totals=None):
     
-    def distCalc(coord1, coord2):
-        return sqrt((coord2[0] - coord1[0])**2.0 + (coord2[1] - coord1[1])**2.0)
 #    Inputs
+    # Span geometry shared with the other parts (determined here if not provided)
+    if geometry is None:
+        geometry = SpanGeometry(direct, chordName, airfoilName, webLocsName, sparWidthName, span)
+    
+    span = geometry.span
+    start = 0 if span is None else span[0]
+    
     # Profile thickness should be based on location of the web in the profile
     # update once data is available
     typeVal = 'float'
     columns = (0)
     
-    chordDist = loadtxt(direct+chordName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
-    
-    webPlyNums = transpose(array([loadtxt(direct+webThickName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+    profileThickDist, webCheck = geometry.ProfileThickness(webType)
     
-    skinPlyNums = transpose(array([loadtxt(direct+skinThickName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+    numLocs = len(webCheck)
     
-    sparPlyNums = transpose(array([loadtxt(direct+sparThickName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+    webPlyNums = SpanColumn(LoadCSV(direct, webThickName, typeVal, columns), span)
     
-    sparWidthArray = transpose(array([loadtxt(direct+sparWidthName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+    skinPlyNums = LoadCSV(direct, skinThickName, typeVal, columns)[start:start+numLocs].reshape(-1, 1)
     
-    chordDist = transpose(array([chordDist]))
+    sparPlyNums = LoadCSV(direct, sparThickName, typeVal, columns)[start:start+numLocs].reshape(-1, 1)
     
 #    Processes
-    seg = len(chordDist)
+    seg = geometry.seg
     
     segLen = wingSpan/float(seg)
-    segments = full((seg,1), segLen)
-    
-    typeVal = 'str'
-    columns = (0)
+    segments = full((numLocs,1), segLen)
     
-    airfoilsDist = loadtxt(direct+airfoilName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
+    webHeight = zeros((numLocs,1))
     
-    profileThickDist = zeros((seg,1))
-    webHeight = zeros((seg,1))
+    # Span locations with a web (others have zero web height)
+    webCheck[min(len(skinPlyNums), len(sparPlyNums)):] = False
     
-    typeVal = 'float'
-    columns = (0)
-    webLocation = loadtxt(direct+webLocsName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
+    spanLocs = where(webCheck)[0]
     
-    for spanLoc in range(len(chordDist)):
-#    for spanLoc in range(10):
-        
-        airfoilSect = "Airfoils_" + airfoilsDist[spanLoc] + ".csv"
-        typeVal = 'float,float'
-        columns = (0,1)
-        airfoils = loadtxt(direct+airfoilSect, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)
-        
-        # Find the point where the coordinates switch from pressure side to suction side
-        switch = where(airfoils[0] == 0.0)
-        point = list(switch)[0][-1]
-    
-    
-        # Find the point where the spar cap begins
-        try: # Check in case the web location is zero, i.e. no web
-            if(webType == 'Fore'):
-                webPoint = webLocation[spanLoc]
-            elif(webType == 'Aft'):
-                webPoint = webLocation[spanLoc] + sparWidthArray[spanLoc]/chordDist[spanLoc]
-            
-            # Find the airfoil coordinate where the spar cap begins on HP skin
-            switch2 = where(airfoils[0] <= webPoint)
-            point2 = len(where(array(switch2)<point)[0])
-            skinSideLower = [airfoils[0][:point2], airfoils[1][:point2]]
-            
-            # Find the point where the spar cap begins on the LP skin
-            switch2 = where(airfoils[0][point:] <= webPoint)
-            point2 = list(switch2)[0][-1] + 1
-            skinSideUpper = [airfoils[0][point:point+point2], airfoils[1][point:point+point2]]
-            
-            # Determine the height of the web
-            webDist = distCalc( [skinSideLower[0][-1], skinSideLower[1][-1]] , [skinSideUpper[0][-1], skinSideUpper[1][-1]] )
-            
-            profileThickDist[spanLoc] = webDist*chordDist[spanLoc]
-            
-            webHeight[spanLoc] = profileThickDist[spanLoc] - 2*skinPlyNums[spanLoc]*skinPlyThick - 2*sparPlyNums[spanLoc]*sparPlyThick
-            
-        except IndexError:
-            profileThickDist[spanLoc] = 0.0
-            
-            webHeight[spanLoc] = 0.0
+    webHeight[spanLocs, 0] = profileThickDist[spanLocs, 0] - 2*skinPlyNums[spanLocs, 0]*skinPlyThick - 2*sparPlyNums[spanLocs, 0]*sparPlyThick
     
     
 #    webHeight = profileThickDist - 2*skinPlyNums*skinPlyThick - 2*sparPlyNums*sparPlyThick
@@ -309,12 +897,15 @@ def WebStructuralBreakdown(direct, chordName, wingSpan, webThickName, skinThickN
     # update once data is available
     bondLine = segments*2
     
+    outputNames = ['Surface Area', 'Ply Length', 'Ply Surface Area', 'Bondline', 'Core Surface Area', 'Core Ply Length', 'Core Ply Surface Area']
+    totals = SpanTotals(outputNames, totals)
+    
     """
     Core structural breakdown
     """
     if(coreCheck == 0):
         # Outputs:
-        outputs = [sum(webSA)[0], sum(totalPlyLength)[0], sum(totalSurfArea)[0], sum(bondLine)[0]]
+        outputs = [SpanSum(webSA, totals[0]), SpanSum(totalPlyLength, totals[1]), SpanSum(totalSurfArea, totals[2]), SpanSum(bondLine, totals[3]), 0.0, 0.0, 0.0]
         outputs = [float(val) for val in outputs]
         
     else:
@@ -324,25 +915,19 @@ def WebStructuralBreakdown(direct, chordName, wingSpan, webThickName, skinThickN
         
         typeVal = 'float'
         columns = (1)
-        coreThickDist = transpose(array([loadtxt(direct+webThickName, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+        coreThickDist = SpanColumn(LoadCSV(direct, webThickName, typeVal, columns), span)
         
         if('N/A' in coreFrac):
-            coreFracDist = zeros((seg,1))
+            coreFracDist = zeros((numLocs,1))
         else:
             columns = (0)
-            coreFracDist = transpose(array([loadtxt(direct+coreFrac, dtype=typeVal, delimiter=',', skiprows=1, usecols=columns, unpack=True)]))
+            coreFracDist = SpanColumn(LoadCSV(direct, coreFrac, typeVal, columns), span)
             
         # Processes
         webCorePlyNums = coreThickDist/coreThick
         
         # Calculate the height of the web where core is present
-        webCoreHeight = zeros((seg,1))
-        
-        for spanLoc in range(len(webHeight)):
-            if(webHeight[spanLoc] == 0.0):
-                webCoreHeight[spanLoc] = 0.0
-            else:
-                webCoreHeight[spanLoc] = webHeight[spanLoc] - coreFracDist[spanLoc]
+        webCoreHeight = where(webHeight == 0.0, 0.0, webHeight - coreFracDist)
         
         webCoreSA = segments*webCoreHeight
         
@@ -352,19 +937,20 @@ def WebStructuralBreakdown(direct, chordName, wingSpan, webThickName, skinThickN
         coreTotalPlyLength = segments*webCorePlyNums*corePliesByWidth
         
         # Outputs:
-        outputs = [sum(webSA)[0], sum(totalPlyLength)[0], sum(totalSurfArea)[0], sum(bondLine)[0], sum(webCoreSA)[0], sum(coreTotalPlyLength)[0], sum(coreTotalSurfArea)[0]]
+        outputs = [SpanSum(webSA, totals[0]), SpanSum(totalPlyLength, totals[1]), SpanSum(totalSurfArea, totals[2]), SpanSum(bondLine, totals[3]), SpanSum(webCoreSA, totals[4]), SpanSum(coreTotalPlyLength, totals[5]), SpanSum(coreTotalSurfArea, totals[6])]
         outputs = [float(val) for val in outputs]
-        
-    outputNames = ['Surface Area', 'Ply Length', 'Ply Surface Area', 'Bondline', 'Core Surface Area', 'Core Ply Length', 'Core Ply Surface Area']
     
     return outputs, outputNames
 
 
 # Determine the scaling variables
-def ScalingVariables(comp, direct, consInputVars, materialVars):
+def ScalingVariables(comp, direct, consInputVars, materialVars, geometry=None, span=None):
     """ 
     Determine the scaling variables for material, labour and equipment costs
     Call the individual structural breakdown modules for each of the parts
+    (the span geometry can be shared between parts, see StructuralBreakdown)
+    If a block of the span is given, the sums of the block are added to the 
+    scaling variables of the preceding blocks
     """
     
     wingSpan = float(consInputVars['external_geometry']['wingLen'])
@@ -376,6 +962,9 @@ def ScalingVariables(comp, direct, consInputVars, materialVars):
     webLocsName = consInputVars['internal_structure']['webLocDist']
     airfoilName = consInputVars['external_geometry']['airfoils']
     
+    # Continue the sums of the preceding span blocks
+    totals = comp.scaleVars if span is not None and span[0] > 0 else None
+    
     if comp.type == 'spar':
         # Determine the scaling variables for the spar
         
@@ -392,7 +981,7 @@ def ScalingVariables(comp, direct, consInputVars, materialVars):
         sparPlyThick = float(materialVars[matType][sparMatName]['thickness (cured)'])/1000.0
         
         # Determine the scaling variables for the spar
-        scalingValues, scalingNames = SparStructuralBreakdown(direct, chordName, sparWidthName, sparThickName, wingSpan, sparPlyWidth)
+        scalingValues, scalingNames = SparStructuralBreakdown(direct, chordName, sparWidthName, sparThickName, wingSpan, sparPlyWidth, span, totals)
         
         scalingValues.append(consInputVars['external_geometry']['wingLen'])
         scalingNames.append('Part Length')
@@ -435,7 +1024,7 @@ def ScalingVariables(comp, direct, consInputVars, materialVars):
             skinCoreVals = None
         
         # Determine the scaling variables for the skin
-        scalingValues, scalingNames = SkinStructuralBreakdown(direct, chordName, airfoilName, sparWidthName, skinThickName, wingSpan, skinPlyWidth, skinType, webLocsName, SkinCoreCheck, skinCoreVals)
+        scalingValues, scalingNames = SkinStructuralBreakdown(direct, chordName, airfoilName, sparWidthName, skinThickName, wingSpan, skinPlyWidth, skinType, webLocsName, SkinCoreCheck, skinCoreVals, geometry, span, totals)
         
         scalingValues.append(consInputVars['external_geometry']['wingLen'])
         scalingNames.append('Part Length')
@@ -500,12 +1089,12 @@ def ScalingVariables(comp, direct, consInputVars, materialVars):
             
         except KeyError:
             
-            SkinCoreCheck = 0
+            CoreCheck = 0
             
             coreVals = None
         
         # Determine the scaling variables for the skin
-        scalingValues, scalingNames = WebStructuralBreakdown(direct, chordName, wingSpan, webThickName, skinThickName, sparThickName, sparWidthName, skinPlyThick, webPlyWidth, sparPlyThick, webLocsName, airfoilName, webType, CoreCheck, coreVals)
+        scalingValues, scalingNames = WebStructuralBreakdown(direct, chordName, wingSpan, webThickName, skinThickName, sparThickName, sparWidthName, skinPlyThick, webPlyWidth, sparPlyThick, webLocsName, airfoilName, webType, CoreCheck, coreVals, geometry, span, totals)
         
         scalingValues.append(consInputVars['external_geometry']['wingLen'])
         scalingNames.append('Part Length')
@@ -513,8 +1102,668 @@ def ScalingVariables(comp, direct, consInputVars, materialVars):
     # Assign the scaling variables
     for i, var in enumerate(scalingNames):
         comp.scaleVars[var] = scalingValues[i]
+
+
+
+def StructuralBreakdown(parts, direct, consInputVars, materialVars, blockSize=None, workers=None, geometry=None):
+    """
+    Determine the scaling variables of all parts (spars, skins and webs) 
+    from a single pass over the span geometry.
+    
+    If a block size is given, the span is processed in blocks of span 
+    locations and the scaling variables are accumulated block by block, so 
+    the memory used by the spanwise distributions does not depend on the 
+    number of span locations. The scaling variables are identical to those 
+    determined from the full span.
+    
+    If a number of workers (or a BreakdownPool) is given, the parts are 
+    shared between worker processes. The csv data and the span geometry are
+    sent to each worker once, and the scaling variables are returned to the 
+    parts.
+
+    Parameters
+    ----------
+    parts : list
+        Component objects.
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+    materialVars : dict
+        Materials input data.
+    blockSize : int, optional
+        Number of span locations in each block. The default is None (the 
+        full span at once).
+    workers : int or BreakdownPool, optional
+        Number of worker processes, or a pool of worker processes reused 
+        between calls. The default is None (the parts are determined in this
+        process).
+    geometry : SpanGeometry, optional
+        Span geometry of the full span, if already determined. The default 
+        is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    if len(parts) == 0:
+        return
+    
+    if isinstance(workers, BreakdownPool):
+        workers.Breakdown(parts, direct, consInputVars, materialVars, blockSize)
+        return
+    
+    if workers is not None and workers > 1 and len(parts) > 1:
+        ParallelBreakdown(parts, direct, consInputVars, materialVars, blockSize, workers)
+        return
+    
+    chordName = consInputVars['external_geometry']['chordDist']
+    airfoilName = consInputVars['external_geometry']['airfoils']
+    webLocsName = consInputVars['internal_structure']['webLocDist']
+    sparWidthName = consInputVars['internal_structure']['sparLocDist']
+    
+    if blockSize is None:
+        spans = SpanRanges(None)
+    else:
+        spans = SpanRanges(len(LoadCSV(direct, chordName, 'float', 0)), blockSize)
+    
+    # Airfoil profiles are loaded once for all blocks
+    profiles = {}
+    
+    for span in spans:
+        
+        # The span geometry is only required for the skins and webs
+        if span is not None or geometry is None:
+            geometry = None
+            
+            if any([comp.type in ['skin', 'web'] for comp in parts]):
+                geometry = SpanGeometry(direct, chordName, airfoilName, webLocsName, sparWidthName, span, profiles)
+        
+        for comp in parts:
+            ScalingVariables(comp, direct, consInputVars, materialVars, geometry, span)
+        
+        
+def GeometryFiles(direct, consInputVars):
+    """
+    Determine the csv files used to determine the scaling variables
+
+    Parameters
+    ----------
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+
+    Returns
+    -------
+    fileNames : list
+        Names of the csv files, including the airfoil profiles used.
+
+    """
+    
+    airfoilName = consInputVars['external_geometry']['airfoils']
+    
+    fileNames = [consInputVars['external_geometry']['chordDist'], airfoilName]
+    
+    for var in ['sparLocDist', 'sparThick', 'skinThick', 'webThick', 'webLocDist', 'skinPanelFraction', 'webPanelFraction']:
+        fileName = consInputVars['internal_structure'].get(var)
+        
+        if fileName is not None and 'N/A' not in fileName:
+            fileNames.append(fileName)
+    
+    try:
+        airfoilsDist = asarray(LoadCSV(direct, airfoilName, 'str', 0)).ravel()
+    except (OSError, KeyError, ValueError):
+        airfoilsDist = []
+    
+    fileNames += sorted(set(["Airfoils_" + val + ".csv" for val in airfoilsDist]))
+    
+    return fileNames
+
+
+def GeometryContents(direct, consInputVars):
+    """
+    Determine the contents of the csv files used to determine the scaling 
+    variables, e.g. for keying results that depend on them
+
+    Parameters
+    ----------
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+
+    Returns
+    -------
+    contents : list
+        File name and contents (bytes of the csv file, or the array of the 
+        file contents) of each csv file, None if the file is not available.
+
+    """
+    
+    contents = []
+    
+    for fileName in GeometryFiles(direct, consInputVars):
+        try:
+            if isinstance(direct, Mapping):
+                contents.append((fileName, asarray(direct[fileName])))
+            else:
+                with open(direct+fileName, 'rb') as csvFile:
+                    contents.append((fileName, csvFile.read()))
+                    
+        except (OSError, KeyError):
+            contents.append((fileName, None))
+    
+    return contents
+
+
+def GeometrySignatures(direct, consInputVars):
+    """
+    Determine the signatures of the csv files used to determine the scaling 
+    variables (path, modification time and size, as used by CachedCSV), 
+    e.g. for checking if the files have changed without reading them
+
+    Parameters
+    ----------
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+
+    Returns
+    -------
+    signatures : list
+        Path, modification time and size of each csv file (modification 
+        time and size are None if the file is not available). For a 
+        dictionary, the contents are used as no files are read (see 
+        GeometryContents).
+
+    """
+    
+    if isinstance(direct, Mapping):
+        return GeometryContents(direct, consInputVars)
+    
+    signatures = []
+    
+    for fileName in GeometryFiles(direct, consInputVars):
+        path = os.path.abspath(direct+fileName)
+        
+        try:
+            stat = os.stat(path)
+            signatures.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signatures.append((path, None, None))
+    
+    return signatures
+
+
+def GeometryKey(direct, consInputVars):
+    """
+    Determine the hash of the contents of the csv files used to determine 
+    the scaling variables. The hash is reused, without reading the files, 
+    while the file signatures (see GeometrySignatures) are unchanged
+
+    Parameters
+    ----------
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+
+    Returns
+    -------
+    str
+        Hexadecimal hash of the csv file contents.
+
+    """
+    
+    if isinstance(direct, Mapping):
+        return InputsHash(GeometryContents(direct, consInputVars))
+    
+    signatures = tuple(GeometrySignatures(direct, consInputVars))
+    
+    with geometryLock:
+        key = contentsCache.get(signatures)
+    
+    if key is None:
+        key = InputsHash(GeometryContents(direct, consInputVars))
+        
+        with geometryLock:
+            contentsCache[signatures] = key
+            
+            # Remove the oldest entries if the cache is full
+            while len(contentsCache) > geometryCacheSize:
+                del contentsCache[next(iter(contentsCache))]
+    
+    return key
+
+
+def GeometryData(direct, consInputVars):
+    """
+    Load the csv files used to determine the scaling variables into a 
+    dictionary of the file contents, e.g. to send them to worker processes
+
+    Parameters
+    ----------
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+
+    Returns
+    -------
+    str or dict
+        Dictionary of the file contents (the airfoil distribution as text, 
+        other files as float arrays). The directory is returned unchanged if
+        a file cannot be loaded, and a dictionary is returned unchanged.
+
+    """
+    
+    if isinstance(direct, Mapping):
+        return direct
+    
+    airfoilName = consInputVars['external_geometry']['airfoils']
+    
+    data = {}
+    
+    for fileName in GeometryFiles(direct, consInputVars):
+        typeVal = 'str' if fileName == airfoilName else 'float'
+        
+        try:
+            data[fileName] = loadtxt(direct+fileName, dtype=typeVal, delimiter=',', skiprows=1, ndmin=2)
+        except (OSError, ValueError):
+            return direct
+    
+    return data
+
+
+def ScalingMaterials(comp, consInputVars):
+    """
+    Determine the materials used by the scaling variables of a part.
+
+    Parameters
+    ----------
+    comp : object
+        Component object.
+    consInputVars : dict
+        Construction input data.
+
+    Returns
+    -------
+    matNames : list
+        Material type and name of each material.
+
+    """
+    
+    matNames = list(comp.matDetails.items())
+    
+    # Webs also use the cured ply thickness of the skins and spars
+    if comp.type == 'web':
+        for matName in [consInputVars['internal_structure']['skinThick'].split('_SkinThickness.csv')[0],
+                        consInputVars['internal_structure']['sparThick'].split('_SparThickness.csv')[0]]:
+            matNames += [('prepreg', matName), ('fabric', matName)]
+    
+    return matNames
+
+
+def ScalingInputs(comp, consInputVars, materialVars):
+    """
+    Determine the inputs of the scaling variables of a part, other than the 
+    construction inputs and the csv files.
+
+    Parameters
+    ----------
+    comp : object
+        Component object.
+    consInputVars : dict
+        Construction input data.
+    materialVars : dict
+        Materials input data.
+
+    Returns
+    -------
+    tuple
+        Part type, side, materials and the material properties used.
+
+    """
+    
+    matProps = []
+    
+    for matType, matName in ScalingMaterials(comp, consInputVars):
+        try:
+            matVals = materialVars[matType][matName]
+            matProps.append((matType, matName, [matVals.get(prop) for prop in ['width', 'thickness (cured)', 'thickness']]))
+        except (KeyError, TypeError):
+            matProps.append((matType, matName, None))
+    
+    return (comp.type, getattr(comp, 'side', None), matProps)
+
+
+def CachedBreakdown(parts, direct, consInputVars, materialVars, cacheDir, blockSize=None, workers=None):
+    """
+    Determine the scaling variables of the parts, reusing the scaling 
+    variables stored in the cache directory by earlier runs with the same
+    inputs. Only the parts without cached scaling variables are determined 
+    from the structural breakdown, and these are added to the cache.
+
+    Parameters
+    ----------
+    parts : list
+        Component objects.
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+    materialVars : dict
+        Materials input data.
+    cacheDir : str
+        Cache directory.
+    blockSize : int, optional
+        Number of span locations in each block. The default is None.
+    workers : int or BreakdownPool, optional
+        Number of worker processes, or a pool of worker processes. The 
+        default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    if len(parts) == 0:
+        return
+    
+    # Contents of the csv files used, only read again if the files change
+    key = InputsHash(GeometryKey(direct, consInputVars), consInputVars['external_geometry'], consInputVars['internal_structure'])
+    
+    cached = LoadScaling(key, cacheDir)
+    
+    partKeys = [InputsHash(ScalingInputs(comp, consInputVars, materialVars)) for comp in parts]
+    
+    missing = []
+    
+    for comp, partKey in zip(parts, partKeys):
+        if partKey in cached:
+            comp.scaleVars.update(cached[partKey])
+        else:
+            missing.append((comp, partKey))
+    
+    if len(missing) == 0:
+        return
+    
+    StructuralBreakdown([comp for comp, partKey in missing], direct, consInputVars, materialVars, blockSize, workers)
+    
+    for comp, partKey in missing:
+        cached[partKey] = dict(comp.scaleVars)
+    
+    SaveScaling(key, cached, cacheDir)
+
+
+# Inputs of the structural breakdown, set once in each worker process
+workerInputs = {}
+
+
+def InitialiseWorker(direct, consInputVars, blockSize, geometry):
+    """
+    Store the inputs of the structural breakdown in a worker process.
+
+    Parameters
+    ----------
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+    blockSize : int
+        Number of span locations in each block (None for the full span).
+    geometry : SpanGeometry
+        Span geometry of the full span (None if not required).
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    workerInputs.update(direct=direct, consInputVars=consInputVars, blockSize=blockSize, geometry=geometry)
+
+
+def WorkerScalingVariables(compType, side, matDetails, materialVars):
+    """
+    Determine the scaling variables of a part in a worker process.
+
+    Parameters
+    ----------
+    compType : str
+        Part type ('spar', 'skin' or 'web').
+    side : str
+        Side of a skin or position of a web.
+    matDetails : dict
+        Materials of the part.
+    materialVars : dict
+        Materials input data of the materials used by the part.
+
+    Returns
+    -------
+    dict
+        Scaling variables of the part.
+
+    """
+    
+    comp = SimpleNamespace(type=compType, side=side, matDetails=matDetails, scaleVars={})
+    
+    StructuralBreakdown([comp], workerInputs['direct'], workerInputs['consInputVars'], materialVars, workerInputs['blockSize'], geometry=workerInputs['geometry'])
+    
+    return comp.scaleVars
+
+
+class BreakdownPool:
+    """
+    Pool of worker processes determining the scaling variables of parts,
+    reused for each structural breakdown.
+    
+    The csv data is loaded once and sent to the workers with the span 
+    geometry when the pool is started, and the pool is only restarted if the
+    csv files (based on their modification times and sizes), the 
+    construction inputs or the block size change. The material data used by
+    each part is sent with the part.
+    
+    Only the breakdown of the parts is parallel: without a block size the 
+    span geometry is determined once in the calling process (see Start), 
+    and each worker sums the scaling variables of its parts over the span.
+    
+    Parameters
+    ----------
+    workers : int
+        Number of worker processes.
+    """
+    
+    def __init__(self, workers):
+        
+        self.workers = workers
+        self.executor = None
+        self.finalizer = None
+        
+        # Hash of the csv file signatures and inputs sent to the workers
+        self.key = None
+    
+    
+    def Breakdown(self, parts, direct, consInputVars, materialVars, blockSize=None):
+        """
+        Method for determining the scaling variables of the parts in the 
+        worker processes
+
+        Parameters
+        ----------
+        parts : list
+            Component objects.
+        direct : str or dict
+            Directory of the csv files, or a dictionary of the file contents.
+        consInputVars : dict
+            Construction input data.
+        materialVars : dict
+            Materials input data.
+        blockSize : int, optional
+            Number of span locations in each block. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        if len(parts) == 0:
+            return
+        
+        # The csv files are only read again when the pool is restarted
+        key = InputsHash(GeometrySignatures(direct, consInputVars), consInputVars['external_geometry'], consInputVars['internal_structure'], blockSize)
+        
+        if self.executor is None or key != self.key:
+            self.Start(direct, consInputVars, blockSize)
+            self.key = key
         
+        results = [self.executor.submit(WorkerScalingVariables, comp.type, getattr(comp, 'side', None), dict(comp.matDetails), self.Materials(comp, consInputVars, materialVars)) for comp in parts]
         
+        for comp, result in zip(parts, results):
+            comp.scaleVars.update(result.result())
+    
+    
+    def Start(self, direct, consInputVars, blockSize=None):
+        """
+        Method for starting the worker processes with the inputs of the 
+        structural breakdown. Without a block size, the span geometry is 
+        determined serially here and sent to the workers; with a block size,
+        each worker determines the geometry of the span blocks of its parts.
+
+        Parameters
+        ----------
+        direct : str or dict
+            Directory of the csv files, or a dictionary of the file contents.
+        consInputVars : dict
+            Construction input data.
+        blockSize : int, optional
+            Number of span locations in each block. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        self.Shutdown()
+        
+        # The csv files are read once here instead of in each worker
+        direct = GeometryData(direct, consInputVars)
+        
+        geometry = None
+        
+        # The full span geometry is determined once and sent to each worker, 
+        # otherwise each worker processes the span in blocks
+        if blockSize is None:
+            chordName = consInputVars['external_geometry']['chordDist']
+            airfoilName = consInputVars['external_geometry']['airfoils']
+            webLocsName = consInputVars['internal_structure']['webLocDist']
+            sparWidthName = consInputVars['internal_structure']['sparLocDist']
+            
+            try:
+                geometry = SpanGeometry(direct, chordName, airfoilName, webLocsName, sparWidthName)
+            except (OSError, KeyError, ValueError, IndexError, TypeError):
+                # Errors are reported by the workers for the parts using the geometry
+                geometry = None
+        
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=InitialiseWorker, initargs=(direct, consInputVars, blockSize, geometry))
+        
+        # Stop the workers when the pool is no longer used
+        self.finalizer = weakref.finalize(self, self.executor.shutdown, wait=False)
+    
+    
+    def Materials(self, comp, consInputVars, materialVars):
+        """
+        Method for selecting the material data used by a part
+
+        Parameters
+        ----------
+        comp : object
+            Component object.
+        consInputVars : dict
+            Construction input data.
+        materialVars : dict
+            Materials input data.
+
+        Returns
+        -------
+        materials : dict
+            Materials input data of the materials used by the part.
+
+        """
+        
+        materials = {}
+        
+        for matType, matName in ScalingMaterials(comp, consInputVars):
+            try:
+                materials.setdefault(matType, {})[matName] = dict(materialVars[matType][matName])
+            except (KeyError, TypeError):
+                pass
+        
+        return materials
+    
+    
+    def Shutdown(self):
+        """
+        Method for stopping the worker processes
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        if self.executor is not None:
+            self.finalizer.detach()
+            self.executor.shutdown(wait=True)
+        
+        self.executor = None
+        self.finalizer = None
+        self.key = None
+
+
+def ParallelBreakdown(parts, direct, consInputVars, materialVars, blockSize=None, workers=2):
+    """
+    Determine the scaling variables of the parts in worker processes, with a
+    pool of workers used for this call only (see BreakdownPool). The parts 
+    are processed in parallel, the span geometry is not divided between the
+    workers.
+
+    Parameters
+    ----------
+    parts : list
+        Component objects.
+    direct : str or dict
+        Directory of the csv files, or a dictionary of the file contents.
+    consInputVars : dict
+        Construction input data.
+    materialVars : dict
+        Materials input data.
+    blockSize : int, optional
+        Number of span locations in each block. The default is None.
+    workers : int, optional
+        Number of worker processes. The default is 2.
+
+    Returns
+    -------
+    None.
+
+    """
+    
+    pool = BreakdownPool(min(workers, len(parts)))
+    
+    try:
+        pool.Breakdown(parts, direct, consInputVars, materialVars, blockSize)
+    finally:
+        pool.Shutdown()
+
+
 def AssemblyScaling(skins, webs, wing):
     
     # Determine the scaling variables for the wing
@@ -0,0 +1,475 @@
+"""
+Quantity Takeoff and Pricing
+
+Separates the manufacturing analysis into a quantity takeoff (material and
+consumable masses, labour hours and equipment costs, which depend only on
+the geometry, production methods and production volume) and a pricing phase
+that applies unit costs and the salary rate from a price book. An analysed
+factory can then be re-priced without repeating the production steps.
+
+The pricing phase repeats the cost operations of the analysis in the same
+order, so the costs are identical to a full analysis with the same prices.
+Price book values can be arrays, in which case the costs are determined for
+each set of prices at once.
+
+Prices are keyed by the materials database category and material name, so
+materials with the same name in different categories keep their own prices.
+A price book can set the price of a single category, e.g. ('resin', name), or
+of the material in every category by its name, as in BatchAnalysis.
+
+A takeoff can also be compiled into a cost plan. The plan resolves the cost
+operations once into index arrays into a table of material prices, and the
+quantities of each material into weight vectors, so pricing is a gather and
+a dot product. The plan costs are equal to the analysis costs to rounding
+(the sums are taken in a different order).
+
+Author: Edward Fagan
+"""
+from numpy import array, asarray, bincount, broadcast_arrays, empty
+
+
+def PriceKey(op):
+    """
+    Determine the price key of a material or consumable cost operation.
+
+    Parameters
+    ----------
+    op : tuple
+        Cost operation of a part (see component.takeoff).
+
+    Returns
+    -------
+    tuple
+        Materials database category and name of the material. The costs of
+        materials are stored by category (e.g. 'fabric' or 'hardener').
+
+    """
+
+    if op[1] == 'materials':
+        return (op[3], op[5])
+
+    return ('consumables', op[5])
+
+
+def PriceOverrides(prices, materialCosts):
+    """
+    Determine the prices replaced by the material costs of a price book.
+
+    Parameters
+    ----------
+    prices : dict
+        Prices (or any values) keyed by (category, material name).
+    materialCosts : dict
+        Unit costs keyed by (category, material name), or by material name
+        for the material in all categories. Costs of a single category take
+        precedence over costs by material name.
+
+    Returns
+    -------
+    overrides : dict
+        Unit costs keyed by (category, material name).
+
+    """
+
+    overrides = {}
+
+    # Costs by material name first, so that category costs replace them
+    matKeys = sorted(materialCosts.keys(), key=lambda matKey: type(matKey) is tuple)
+
+    for matKey in matKeys:
+        value = materialCosts[matKey]
+
+        if type(matKey) is tuple:
+            keys = [matKey] if matKey in prices else []
+        else:
+            keys = [key for key in prices if key[1] == matKey]
+
+        if len(keys) == 0:
+            print('*** Warning: Material not used in the analysis: ', matKey)
+
+        for key in keys:
+            overrides[key] = value
+
+    return overrides
+
+
+class QuantityTakeoff:
+    """
+    Quantities of an analysed factory, priced with a price book.
+
+    Parameters
+    ----------
+    manufacture : Manufacture
+        Manufacture object, after the production analysis.
+    """
+
+    def __init__(self, manufacture):
+
+        flatList = [val for partsList1 in manufacture.partsList for val in partsList1]
+
+        self.partNames = [comp.name for comp in flatList]
+
+        # Material and consumable cost operations of each part, in order
+        self.materialOps = [list(comp.takeoff) for comp in flatList]
+        self.materialKeys = [self.MaterialKeys(comp.matDetails) for comp in flatList]
+
+        # Labour hours of each production step of each part
+        self.labourHours = [list(comp.labour.labourHours) for comp in flatList]
+
+        # Equipment costs of each part and of the factory equipment
+        self.equipmentCosts = [comp.equipment.cost for comp in flatList]
+        self.factoryEquipmentCosts = list(manufacture.commonEquipmentCost.values())
+
+        self.structureMass = manufacture.structure_mass
+
+        # Prices used in the analysis, keyed by category and material name
+        self.prices = {}
+
+        for ops in self.materialOps:
+            for op in ops:
+                if op[0] != 'reset':
+                    self.prices[PriceKey(op)] = op[6]
+
+        self.salary = manufacture.productionVars['General']['salary']['value']
+
+
+    def MaterialKeys(self, matDetails):
+        """
+        Method for determining the materials of a part, in the order of the
+        part Materials object
+
+        Parameters
+        ----------
+        matDetails : dict, str or list
+            Material details of the part.
+
+        Returns
+        -------
+        list
+            Materials of the part.
+
+        """
+
+        if matDetails is None:
+            return []
+
+        if type(matDetails) is str:
+            return [matDetails]
+
+        return list(matDetails)
+
+
+    def PriceBook(self):
+        """
+        Method for creating a price book of the prices used in the analysis
+
+        Returns
+        -------
+        dict
+            Unit costs of the materials and consumables ('materials', keyed
+            by category and material name) and the hourly salary rate
+            ('salary').
+
+        """
+
+        return {'materials': dict(self.prices), 'salary': self.salary}
+
+
+    def Compile(self):
+        """
+        Method for compiling the takeoff into a cost plan
+
+        Returns
+        -------
+        CostPlan
+            Array-backed cost plan of the takeoff.
+
+        """
+
+        return CostPlan(self)
+
+
+    def MaterialCosts(self, ops, matKeys, prices):
+        """
+        Method for repeating the material or consumable cost operations of a
+        part
+
+        Parameters
+        ----------
+        ops : list
+            Cost operations of the part.
+        matKeys : list
+            Materials of the part.
+        prices : dict
+            Unit costs keyed by category and material name.
+
+        Returns
+        -------
+        materialsCost : float
+            Total cost of the part materials.
+        consumablesCost : float
+            Total cost of the part consumables.
+
+        """
+
+        costs = {'materials': ({}, {}), 'consumables': ({}, {})}
+
+        for key in matKeys:
+            costs['materials'][0][key] = 0.0
+            costs['materials'][1][key] = 0.0
+
+        for op in ops:
+
+            if op[0] == 'reset':
+                # Materials added to the part, with zero costs
+                keys = [op[2]] if type(op[2]) is str else op[2]
+
+                for key in keys:
+                    costs[op[1]][0][key] = 0.0
+                    costs[op[1]][1][key] = 0.0
+
+                continue
+
+            opType, target, dictName, key, mass = op[:5]
+
+            costDict = costs[target][0] if dictName == 'matCost' else costs[target][1]
+
+            cost = mass*prices[PriceKey(op)]
+
+            if opType == 'add':
+                costDict[key] += cost
+            else:
+                costDict[key] = cost
+
+        materialsCost = sum(costs['materials'][0].values()) + sum(costs['materials'][1].values())
+        consumablesCost = sum(costs['consumables'][0].values()) + sum(costs['consumables'][1].values())
+
+        return materialsCost, consumablesCost
+
+
+    def Price(self, priceBook=None):
+        """
+        Method for pricing the quantities
+
+        Parameters
+        ----------
+        priceBook : dict, optional
+            Unit costs of the materials and consumables ('materials', keyed
+            by category and material name, or by material name for all
+            categories) and the hourly salary rate ('salary'). Prices not in
+            the price book are those used in the analysis. The default is
+            None.
+
+        Returns
+        -------
+        results : dict
+            costs_manufacturing, costs_materials, costs_consumables,
+            costs_labour, costs_equipment, costs_overheads and unit_cost.
+
+        """
+
+        if priceBook is None:
+            priceBook = {}
+
+        prices = dict(self.prices)
+        prices.update(PriceOverrides(self.prices, priceBook.get('materials', {})))
+
+        salary = priceBook.get('salary', self.salary)
+
+        # Material and consumable costs of each part
+        partCosts = [self.MaterialCosts(ops, matKeys, prices) for ops, matKeys in zip(self.materialOps, self.materialKeys)]
+
+        totalMaterialsCosts = sum([val[0] for val in partCosts])
+
+        costsConsumables = sum([val[1] for val in partCosts])
+
+        costsMaterials = totalMaterialsCosts + costsConsumables
+
+        # Labour costs of each production step
+        costsLabour = sum([sum([hours * salary for hours in partHours]) for partHours in self.labourHours])
+
+        costsEquipment = sum(self.equipmentCosts) + sum(self.factoryEquipmentCosts)
+
+        costsManufacturing = costsMaterials + costsLabour + costsEquipment
+
+        # Overhead costs, as in Manufacture.OverheadCost
+        costsOverheads = costsManufacturing * 0.05
+
+        costsManufacturing += costsOverheads
+
+        results = {'costs_manufacturing': costsManufacturing,
+                   'costs_materials': costsMaterials,
+                   'costs_consumables': costsConsumables,
+                   'costs_labour': costsLabour,
+                   'costs_equipment': costsEquipment,
+                   'costs_overheads': costsOverheads,
+                   'unit_cost': costsManufacturing / self.structureMass}
+
+        return results
+
+
+class CostPlan:
+    """
+    Compiled, array-backed cost plan of a quantity takeoff.
+
+    The cost operations of each part are resolved when the plan is compiled:
+    operations replaced by a later operation on the same cost (e.g.
+    consumable scrap costs, or materials added again by a later step) are
+    dropped, and the quantities of the remaining operations are summed for
+    each material. Pricing is then a gather of the material prices and a
+    dot product with the material and consumable weights.
+
+    Parameters
+    ----------
+    takeoff : QuantityTakeoff
+        Quantity takeoff of an analysed factory.
+    """
+
+    def __init__(self, takeoff):
+
+        # Table of materials (category and name) and their prices
+        self.materialKeys = list(takeoff.prices.keys())
+        self.materialIndex = {key: i for i, key in enumerate(self.materialKeys)}
+        self.prices = array([takeoff.prices[key] for key in self.materialKeys], dtype=float)
+
+        # Determine the operations contributing to the final costs
+        opMaterial = []
+        opQuantity = []
+        opConsumable = []
+
+        for ops in takeoff.materialOps:
+            costs = {}
+
+            for op in ops:
+
+                if op[0] == 'reset':
+                    keys = [op[2]] if type(op[2]) is str else op[2]
+
+                    for key in keys:
+                        costs[(op[1], 'matCost', key)] = []
+                        costs[(op[1], 'matCostScrap', key)] = []
+
+                    continue
+
+                opType, target, dictName, key, mass = op[:5]
+
+                if opType == 'add':
+                    costs.setdefault((target, dictName, key), []).append((mass, PriceKey(op)))
+                else:
+                    costs[(target, dictName, key)] = [(mass, PriceKey(op))]
+
+            for (target, dictName, key), vals in costs.items():
+                for mass, matKey in vals:
+                    opMaterial.append(self.materialIndex[matKey])
+                    opQuantity.append(mass)
+                    opConsumable.append(target == 'consumables')
+
+        # Index arrays of the operations into the materials table
+        self.opMaterial = array(opMaterial, dtype=int)
+        self.opQuantity = array(opQuantity, dtype=float)
+        self.opConsumable = array(opConsumable, dtype=bool)
+
+        # Quantities of each material, for the materials and consumables
+        numMats = len(self.materialKeys)
+
+        self.materialWeights = bincount(self.opMaterial[~self.opConsumable], weights=self.opQuantity[~self.opConsumable], minlength=numMats)
+        self.consumableWeights = bincount(self.opMaterial[self.opConsumable], weights=self.opQuantity[self.opConsumable], minlength=numMats)
+
+        # Labour hours and equipment costs of the factory
+        self.labourHours = sum([sum(partHours) for partHours in takeoff.labourHours])
+        self.equipmentCost = sum(takeoff.equipmentCosts) + sum(takeoff.factoryEquipmentCosts)
+
+        self.salary = takeoff.salary
+        self.structureMass = takeoff.structureMass
+
+
+    def Prices(self, materialCosts=None):
+        """
+        Method for creating the table of material prices
+
+        Parameters
+        ----------
+        materialCosts : dict, optional
+            Unit costs keyed by category and material name (or by material
+            name for all categories), replacing the prices of the analysis.
+            Values can be arrays, which are broadcast against each other.
+            The default is None.
+
+        Returns
+        -------
+        prices : array
+            Material prices, of shape (numMaterials,) or, for array unit
+            costs, (numScenarios..., numMaterials).
+
+        """
+
+        if materialCosts is None or len(materialCosts) == 0:
+            return self.prices
+
+        overrides = PriceOverrides(self.materialIndex, materialCosts)
+
+        keys = list(overrides.keys())
+        values = broadcast_arrays(*[asarray(overrides[key], dtype=float) for key in keys])
+
+        if len(values) == 0:
+            return self.prices
+
+        prices = empty(values[0].shape + self.prices.shape)
+        prices[...] = self.prices
+
+        for key, value in zip(keys, values):
+            prices[..., self.materialIndex[key]] = value
+
+        return prices
+
+
+    def Evaluate(self, priceBook=None):
+        """
+        Method for evaluating the costs of the plan
+
+        Parameters
+        ----------
+        priceBook : dict, optional
+            Unit costs of the materials and consumables ('materials', keyed
+            by category and material name, or by material name) and the
+            hourly salary rate ('salary'), as for QuantityTakeoff.Price. The
+            default is None.
+
+        Returns
+        -------
+        results : dict
+            costs_manufacturing, costs_materials, costs_consumables,
+            costs_labour, costs_equipment, costs_overheads and unit_cost.
+
+        """
+
+        if priceBook is None:
+            priceBook = {}
+
+        prices = self.Prices(priceBook.get('materials'))
+
+        salary = asarray(priceBook.get('salary', self.salary), dtype=float)
+
+        totalMaterialsCosts = prices @ self.materialWeights
+
+        costsConsumables = prices @ self.consumableWeights
+
+        costsMaterials = totalMaterialsCosts + costsConsumables
+
+        costsLabour = self.labourHours * salary
+
+        costsManufacturing = costsMaterials + costsLabour + self.equipmentCost
+
+        costsOverheads = costsManufacturing * 0.05
+
+        costsManufacturing = costsManufacturing + costsOverheads
+
+        results = {'costs_manufacturing': costsManufacturing,
+                   'costs_materials': costsMaterials,
+                   'costs_consumables': costsConsumables,
+                   'costs_labour': costsLabour,
+                   'costs_equipment': self.equipmentCost,
+                   'costs_overheads': costsOverheads,
+                   'unit_cost': costsManufacturing / self.structureMass}
+
+        return results
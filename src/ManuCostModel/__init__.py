@@ -29,7 +29,22 @@ Modules include:
     :mod:`ManuCostModel.LaminateSizing`
         The `.LaminateSizing` class for determining laminate thicknesses.
         
+    :mod:`ManuCostModel.DataCache`
+        The `.DataCache` class for caching converted input databases.
+        
+    :mod:`ManuCostModel.BinaryDatabase`
+        The `.BinaryDatabase` class for converting and importing binary 
+        input databases.
+        
+    :mod:`ManuCostModel.DatabaseSchema`
+        The `.DatabaseSchema` class for the typed records of the materials
+        and equipment databases.
+        
+    :mod:`ManuCostModel.Pricing`
+        The `.Pricing` class for re-pricing the quantity takeoff of an 
+        analysed factory.
+        
 ManuCostModel is written and maintained by Edward Fagan.
         
 """
-from . import DataVis, LaminateSizing, CostModel, MapParameters, PartDecomposition, Tools
\ No newline at end of file
+from . import DataVis, LaminateSizing, CostModel, MapParameters, PartDecomposition, Tools, DataCache, BinaryDatabase, DatabaseSchema, Pricing
\ No newline at end of file
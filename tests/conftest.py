@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures and reference values for the ManuCostModel tests.
+
+Manufacture joins its database paths with backslashes, so on other platforms
+the example databases are copied to file names containing the backslash
+separators, with directories of the same names linking to the files.
+"""
+import os
+import sys
+import shutil
+import pytest
+
+testsDir = os.path.dirname(os.path.abspath(__file__))
+rootDir = os.path.dirname(testsDir)
+exampleDir = os.path.join(rootDir, 'examples', 'Aircraft Wing')
+
+sys.path.insert(0, os.path.join(rootDir, 'src'))
+
+from ManuCostModel.CostModel import Manufacture
+
+# Database files in the order used by ReadInputs
+inputDatabases = ['manufacturingDatabase', 'productionVariablesDatabase',
+                  'productionMethodsDatabase', 'materialsDatabase',
+                  'equipmentVariablesDatabase', 'constructionVariablesDatabase']
+
+# Results of the original (per-station, fully re-parsed) implementation:
+# costs_manufacturing, costs_materials, costs_labour, costs_equipment and
+# unit_cost
+wingCosts = (89884.42929381655, 52956.46270201716, 6636.937710546204, 26010.8179625, 32.07571830325371)
+testCosts = (50750.09779678192, 21405.725429309325, 5498.710918816312, 21428.990125, 28.49172793535436)
+
+costNames = ['costs_manufacturing', 'costs_materials', 'costs_labour', 'costs_equipment', 'unit_cost']
+
+
+def ModelDirectory(source, target):
+    """
+    Copy the input databases of a model to a new directory, in the layout
+    used by Manufacture.
+
+    Parameters
+    ----------
+    source : str
+        Model directory containing the 'Input Databases' folder.
+    target : str
+        New model directory.
+
+    Returns
+    -------
+    target : str
+        New model directory.
+
+    """
+
+    inputDir = os.path.join(source, 'Input Databases')
+
+    if os.sep == '\\':
+        shutil.copytree(inputDir, os.path.join(target, 'Input Databases'))
+        return target
+
+    for root, dirs, files in os.walk(inputDir):
+
+        # Directory entries, so that the csv files can also be listed
+        relDir = os.path.relpath(root, source).replace(os.sep, '\\')
+        os.mkdir(target + '\\' + relDir + '\\')
+
+        for fileName in files:
+            fileTarget = target + '\\' + relDir + '\\' + fileName
+            shutil.copy(os.path.join(root, fileName), fileTarget)
+            os.link(fileTarget, os.path.join(target + '\\' + relDir + '\\', fileName))
+
+    return target
+
+
+def InputFiles(directory, extension='.xml'):
+    """
+    Database file names of a model directory, in the order used by ReadInputs.
+    """
+
+    return [directory + '\\Input Databases\\' + name + extension for name in inputDatabases]
+
+
+def Analysis(directory, **kwargs):
+    """
+    Manufacture object of the example wing after a scaled production analysis.
+    """
+
+    model = Manufacture(directory, '', processName='VI', productName='wing', scaleFile='ScalingVariables.xml', **kwargs)
+    model.ProductionAnalysis(scaling=True, readScaling=True)
+
+    return model
+
+
+def Costs(model):
+    """
+    Total costs of an analysed Manufacture object, in the order of costNames.
+    """
+
+    return tuple(float(getattr(model, name)) for name in costNames)
+
+
+@pytest.fixture
+def wingDir(tmp_path):
+    return ModelDirectory(exampleDir, str(tmp_path / 'wing'))
+
+
+@pytest.fixture
+def testDir(tmp_path):
+    return ModelDirectory(testsDir, str(tmp_path / 'tests'))
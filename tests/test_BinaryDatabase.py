@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the binary input databases and binary geometry files.
+"""
+import os
+import shutil
+import pytest
+from numpy import array_equal, shares_memory
+
+from ManuCostModel.MapParameters import ReadInputsXML, ParseInputsXML
+from ManuCostModel.BinaryDatabase import ConvertDatabase, ReadBinaryDatabase, UseBinaryDatabase, BinaryFileName
+from ManuCostModel.BinaryDatabase import ConvertGeometry, GeometryBundle, main
+from ManuCostModel.PartDecomposition import LoadCSV, LoadAirfoil, SpanColumn
+
+from test_MapParameters import xmlDatabases, saveLists
+from conftest import exampleDir, wingCosts, Analysis, Costs, InputFiles
+
+csvDir = os.path.join(exampleDir, 'Input Databases', 'CSV Files')
+
+
+@pytest.mark.parametrize('dataBase', xmlDatabases, ids=os.path.basename)
+def test_binary_round_trip(dataBase, tmp_path):
+    binaryFile = ConvertDatabase(dataBase, str(tmp_path / 'database.mcmdb'))
+
+    for saveList in saveLists:
+        params = ParseInputsXML(dataBase, saveList)
+        binaryParams = ReadBinaryDatabase(binaryFile, saveList)
+
+        assert binaryParams == params
+        assert list(binaryParams) == list(params)
+
+
+def test_binary_database_replaced_by_changed_xml(tmp_path):
+    dataBase = str(tmp_path / 'materialsDatabase.xml')
+    shutil.copy(os.path.join(exampleDir, 'Input Databases', 'materialsDatabase.xml'), dataBase)
+
+    assert UseBinaryDatabase(dataBase) is False
+
+    ConvertDatabase(dataBase)
+
+    assert UseBinaryDatabase(dataBase) is True
+    assert ReadInputsXML(dataBase) == ParseInputsXML(dataBase)
+
+    # Same size and modification time, different content
+    stat = os.stat(dataBase)
+
+    with open(dataBase, 'rb') as dbFile:
+        text = dbFile.read()
+
+    with open(dataBase, 'wb') as dbFile:
+        dbFile.write(text.replace(b'>50.0</property>', b'>51.0</property>', 1))
+
+    os.utime(dataBase, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert UseBinaryDatabase(dataBase) is False
+    assert ReadInputsXML(dataBase) == ParseInputsXML(dataBase)
+    assert 51.0 in [val['cost'] for val in ReadInputsXML(dataBase)['fabric'].values()]
+
+    # Binary files of an unknown format are only used without the xml file
+    with open(BinaryFileName(dataBase), 'wb') as binFile:
+        binFile.write(b'\0'*256)
+
+    assert UseBinaryDatabase(dataBase) is False
+
+    os.remove(dataBase)
+
+    assert UseBinaryDatabase(dataBase) is True
+
+
+def test_binary_analysis(wingDir, tmp_path):
+    dataBases = InputFiles(wingDir) + [wingDir + '\\Input Databases\\ScalingVariables.xml']
+
+    # Model directory with binary databases only
+    for dataBase in dataBases:
+        ConvertDatabase(dataBase)
+        os.remove(dataBase)
+
+    assert Costs(Analysis(wingDir)) == wingCosts
+    assert Costs(Analysis(wingDir, loadOptions={'lazy': True, 'shared': True})) == wingCosts
+
+
+def test_converter_command_line(tmp_path):
+    inputDir = str(tmp_path / 'Input Databases')
+    shutil.copytree(os.path.join(exampleDir, 'Input Databases'), inputDir)
+
+    main([inputDir])
+
+    for fileName in os.listdir(inputDir):
+        if fileName.endswith('.xml'):
+            dataBase = os.path.join(inputDir, fileName)
+            assert UseBinaryDatabase(dataBase) is True
+            assert ReadBinaryDatabase(BinaryFileName(dataBase)) == ParseInputsXML(dataBase)
+
+
+def test_geometry_keeps_airfoil_names_as_text(tmp_path):
+    bundle = GeometryBundle(ConvertGeometry(csvDir, str(tmp_path / 'geometry.mcmgeo')))
+
+    airfoils = bundle['Airfoils Distribution.csv']
+
+    assert airfoils.dtype.kind == 'U'
+    assert array_equal(LoadCSV(bundle, 'Airfoils Distribution.csv', 'str', 0), LoadCSV(csvDir + os.sep, 'Airfoils Distribution.csv', 'str', 0))
+    assert array_equal(LoadCSV(bundle, 'Chord.csv', 'float', 0), LoadCSV(csvDir + os.sep, 'Chord.csv', 'float', 0))
+
+    for bundleVals, csvVals in zip(LoadCSV(bundle, 'WebLocation.csv', 'float', (0, 1)), LoadCSV(csvDir + os.sep, 'WebLocation.csv', 'float', (0, 1))):
+        assert array_equal(bundleVals, csvVals)
+
+
+def test_geometry_values_mapped_from_file(tmp_path):
+    bundle = GeometryBundle(ConvertGeometry(csvDir, str(tmp_path / 'geometry.mcmgeo')))
+
+    # Text values are read when first used, not stored in the header
+    assert all('text' not in entry for entry in bundle.files.values())
+    assert bundle.text == {}
+
+    airfoilName = 'Airfoils_' + str(bundle['Airfoils Distribution.csv'][0, 0]) + '.csv'
+
+    assert list(bundle.text) == ['Airfoils Distribution.csv']
+
+    # Airfoil profiles and span distributions are views of the mapped values
+    profile = LoadAirfoil(bundle, airfoilName)
+
+    assert shares_memory(profile.x, bundle.data) and shares_memory(profile.y, bundle.data)
+
+    chord = SpanColumn(LoadCSV(bundle, 'Chord.csv', 'float', 0), (2, 6))
+
+    assert chord.shape == (4, 1)
+    assert shares_memory(chord, bundle.data)
+    assert array_equal(chord[:, 0], LoadCSV(csvDir + os.sep, 'Chord.csv', 'float', 0)[2:6])
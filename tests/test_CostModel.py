@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that the alternative ways of constructing and re-analysing a
+Manufacture object give the same results as a fresh analysis.
+"""
+import os
+import io
+import copy
+import builtins
+import pytest
+import xml.etree.ElementTree as ET
+from numpy import loadtxt
+
+import ManuCostModel.CostModel as CostModel
+from ManuCostModel.CostModel import Manufacture
+from ManuCostModel.MapParameters import ReadInputs, ReadInputsXML
+from ManuCostModel.DataCache import ClearSharedDatabases
+
+from conftest import wingCosts, testCosts, costNames, Analysis, Costs, InputFiles
+
+databaseNames = ['manufacturingDB', 'productionVars', 'productionMethods', 'materialVars', 'equipmentVars', 'consInputVars']
+
+
+def InMemoryInputs(directory):
+    """
+    Databases, scaling variables and cure cycles of a model directory.
+    """
+
+    inputDir = directory + '\\Input Databases\\'
+
+    databases = dict(zip(databaseNames, ReadInputs(*InputFiles(directory))))
+    scaleVars = ReadInputsXML(inputDir + 'ScalingVariables.xml')
+
+    geometry = {}
+
+    for catParams in databases['materialVars'].values():
+        for matParams in catParams.values():
+            for key in ['cure cycle', 'post cure cycle']:
+                cureFile = matParams.get(key, 'N/A')
+
+                if cureFile != 'N/A' and cureFile not in geometry:
+                    geometry[cureFile] = loadtxt(inputDir + 'CSV Files\\' + cureFile, delimiter=',', skiprows=1, ndmin=2)
+
+    return databases, scaleVars, geometry
+
+
+def NoFileAccess(*args, **kwargs):
+    raise AssertionError('file system accessed: ' + repr(args))
+
+
+@pytest.mark.parametrize('directory, costs', [('wingDir', wingCosts), ('testDir', testCosts)])
+def test_in_memory_construction(directory, costs, request, monkeypatch):
+    databases, scaleVars, geometry = InMemoryInputs(request.getfixturevalue(directory))
+
+    for module, name in [(builtins, 'open'), (io, 'open'), (os, 'open'), (os, 'stat'), (os, 'mkdir'), (os, 'listdir')]:
+        monkeypatch.setattr(module, name, NoFileAccess)
+
+    model = Manufacture(None, '', processName='VI', productName='wing', scaleFile=scaleVars, databases=databases, geometry=geometry)
+    model.ProductionAnalysis(scaling=True, readScaling=True)
+
+    monkeypatch.undo()
+
+    assert Costs(model) == costs
+
+
+# Database files of the Manufacture attributes
+databaseFiles = {'productionVars': 'productionVariablesDatabase',
+                 'materialVars': 'materialsDatabase',
+                 'equipmentVars': 'equipmentVariablesDatabase'}
+
+# Changes to the example wing databases: field and new property text
+databaseEdits = {'ppa': (('productionVars', 'General', 'ppa', 'value'), '150.0'),
+                 'salary': (('productionVars', 'General', 'salary', 'value'), '42.5'),
+                 'material cost': (('materialVars', 'fabric', 'Optimat MD3 BIAX Fabric', 'cost'), '9.5'),
+                 'areal weight': (('materialVars', 'fabric', 'Optimat MD3 BIAX Fabric', 'areal weight'), '1250.0'),
+                 'cure cycle': (('materialVars', 'resin', 'Araldite LY1564', 'cure cycle'), 'M21_cureCycle.csv'),
+                 'purchase cost': (('equipmentVars', 'capital_equipment', 'Ply cutter', 'purchase cost'), '40000.0'),
+                 'production rate': (('productionVars', 'VI', 'fabricCutRate', 'value'), '0.001,1.0')}
+
+loadModes = [{}, {'compiled': True}, {'shared': True}, {'lazy': True}]
+
+resultNames = ['costs_manufacturing', 'costs_materials', 'costs_labour', 'costs_equipment', 'unit_cost',
+               'costs_consumables', 'costs_overheads', 'structure_mass']
+
+breakdownNames = ['breakdown_material_cost_struct', 'breakdown_consumables_cost', 'breakdown_labour_cost',
+                  'breakdown_labour_hours', 'breakdown_equipment_cost', 'breakdown_equipment_item_cost']
+
+
+def Results(model):
+    """
+    Total costs and cost breakdowns of an analysed Manufacture object.
+    """
+
+    return [getattr(model, name) for name in resultNames] + [dict(getattr(model, name)) for name in breakdownNames]
+
+
+def Touch(fileName):
+    """
+    Advance the modification time of a file, so the change is detected 
+    regardless of the file system time resolution.
+    """
+
+    stat = os.stat(fileName)
+    os.utime(fileName, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def EditDatabase(directory, field, text):
+    """
+    Change a property of a database file of a model directory.
+    """
+
+    dataBase = directory + '\\Input Databases\\' + databaseFiles[field[0]] + '.xml'
+
+    tree = ET.parse(dataBase)
+
+    element = tree.getroot().find('./*[@name="' + field[1] + '"]')
+    param = element.find('.//parameter[@name="' + field[2] + '"]')
+    param.find('./property[@name="' + field[3] + '"]').text = text
+
+    tree.write(dataBase, encoding='utf-8', xml_declaration=True)
+    Touch(dataBase)
+
+
+def EditCureCycle(directory, cureFile):
+    """
+    Extend the first step of a cure cycle csv file of a model directory.
+    """
+
+    cureFile = directory + '\\Input Databases\\CSV Files\\' + cureFile
+
+    with open(cureFile) as csvFile:
+        lines = csvFile.readlines()
+
+    step = lines[1].split(',')
+    step[1] = ' ' + str(float(step[1]) + 1.5)
+    lines[1] = ','.join(step)
+
+    with open(cureFile, 'w') as csvFile:
+        csvFile.writelines(lines)
+
+    Touch(cureFile)
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    ClearSharedDatabases()
+    yield
+    ClearSharedDatabases()
+
+
+@pytest.mark.parametrize('edit', list(databaseEdits))
+@pytest.mark.parametrize('loadOptions', loadModes, ids=str)
+def test_reload_matches_fresh_analysis(wingDir, loadOptions, edit):
+    model = Analysis(wingDir, loadOptions=loadOptions)
+
+    field, text = databaseEdits[edit]
+    EditDatabase(wingDir, field, text)
+
+    assert model.Reload() == [field[0]]
+
+    fresh = Analysis(wingDir, loadOptions=loadOptions)
+
+    assert Costs(fresh) != wingCosts
+    assert Results(model) == Results(fresh)
+
+    # Nothing has changed since the last reload
+    assert model.Reload() == []
+
+
+@pytest.mark.parametrize('loadOptions', loadModes, ids=str)
+def test_reload_cure_cycle_file(wingDir, loadOptions):
+    model = Analysis(wingDir, loadOptions=loadOptions)
+
+    EditCureCycle(wingDir, 'LY1564_cureCycle.csv')
+
+    assert model.Reload() == ['LY1564_cureCycle.csv']
+
+    fresh = Analysis(wingDir, loadOptions=loadOptions)
+
+    assert Costs(fresh) != wingCosts
+    assert Results(model) == Results(fresh)
+
+
+def FieldValue(model, field):
+    """
+    Value of a database field of a Manufacture object.
+    """
+
+    value = getattr(model, field[0])
+
+    for key in field[1:]:
+        value = value[key]
+
+    return value
+
+
+@pytest.mark.parametrize('edit', list(databaseEdits))
+@pytest.mark.parametrize('loadOptions', loadModes, ids=str)
+def test_update_matches_fresh_analysis(wingDir, loadOptions, edit):
+    model = Analysis(wingDir, loadOptions=loadOptions)
+
+    field, text = databaseEdits[edit]
+    EditDatabase(wingDir, field, text)
+
+    fresh = Analysis(wingDir, loadOptions=loadOptions)
+
+    model.Update(field, FieldValue(fresh, field))
+
+    assert len(model.dirtyStages) > 0
+
+    model.Recompute()
+
+    assert Costs(fresh) != wingCosts
+    assert Results(model) == Results(fresh)
+    assert len(model.dirtyStages) == 0
+
+    # Repeating the full analysis gives the same results
+    model.ProductionAnalysis(scaling=False, reSet=True)
+
+    assert Results(model) == Results(fresh)
+
+
+@pytest.mark.parametrize('loadOptions', loadModes, ids=str)
+def test_updates_recomputed_together(wingDir, loadOptions):
+    model = Analysis(wingDir, loadOptions=loadOptions)
+
+    for field, text in databaseEdits.values():
+        EditDatabase(wingDir, field, text)
+
+    fresh = Analysis(wingDir, loadOptions=loadOptions)
+
+    for field, text in databaseEdits.values():
+        model.Update(field, FieldValue(fresh, field))
+
+    model.Recompute()
+
+    assert Results(model) == Results(fresh)
+
+
+def test_cure_cycle_hours(wingDir, monkeypatch):
+    model = Analysis(wingDir)
+
+    assert len(model.cureCycleHours) > 0
+
+    for cureFile, processHours in model.cureCycleHours.items():
+        cureCycle = loadtxt(wingDir + '\\Input Databases\\CSV Files\\' + cureFile, delimiter=',', skiprows=1, ndmin=2)
+
+        assert processHours == sum(cureCycle[:,1])
+
+    # Repeated analyses use the cure cycles already read
+    monkeypatch.setattr(CostModel, 'LoadCSV', NoFileAccess)
+
+    for i in range(2):
+        model.ProductionAnalysis(scaling=False, reSet=True)
+
+        assert Costs(model) == wingCosts
+
+
+def ComponentScaling(model):
+    """
+    Scaling variables of each component of a Manufacture object.
+    """
+
+    return {(comp.product, comp.name): comp.scaleVars for comps in model.componentMap.values() for comp in comps}
+
+
+def test_read_scaling_matches_database(wingDir):
+    scaling = ReadInputsXML(wingDir + '\\Input Databases\\ScalingVariables.xml')
+
+    model = Analysis(wingDir)
+    compScaling = ComponentScaling(model)
+
+    assert compScaling == {(prod, name): scaling[prod][name] for prod, name in compScaling}
+    assert sorted(compScaling) == sorted((prod, name) for prod in scaling for name in scaling[prod])
+
+    # Scaling variables given as a dictionary
+    model = Manufacture(wingDir, '', processName='VI', productName='wing', scaleFile=scaling)
+    model.ProductionAnalysis(scaling=True, readScaling=True)
+
+    assert ComponentScaling(model) == compScaling
+    assert Costs(model) == wingCosts
+
+
+# Scenarios of the batch analyses: general values, material costs by 
+# (category, material name) and scrap rates by material name
+scenarios = {'ppa': [100.0, 25.0, 1000.0, 350.0],
+             'salary': [35.0, 20.0, 42.5, 60.0],
+             'materialCosts': {('fabric', 'Optimat MD3 BIAX Fabric'): [6.0, 9.5, 3.2, 12.0],
+                               ('resin', 'Araldite LY1564'): [3.35, 5.0, 2.1, 4.4],
+                               ('consumables', 'Peel ply'): [0.5, 1.25, 0.8, 2.0]},
+             'scrapRates': {'Optimat MD3 BIAX Fabric': [0.0, 0.05, 0.12, 0.3],
+                            'Peel ply': [0.1, 0.0, 0.2, 0.05]}}
+
+
+def ScenarioAnalysis(model, scenario):
+    """
+    Results of a separate analysis of each scenario, with the database values
+    replaced in the Manufacture object.
+    """
+
+    results = []
+
+    for i in range(len(scenario['ppa'])):
+        for key in ['ppa', 'salary']:
+            model.productionVars['General'][key]['value'] = scenario[key][i]
+
+        for (catName, matName), costs in scenario['materialCosts'].items():
+            model.materialVars[catName][matName]['cost'] = costs[i]
+
+        model.scrapRates = {matName: rates[i] for matName, rates in scenario['scrapRates'].items()}
+
+        model.ProductionAnalysis(scaling=False, reSet=True)
+
+        results.append(Costs(model))
+
+    return results
+
+
+@pytest.mark.parametrize('loadOptions', [{}, {'compiled': True}], ids=str)
+def test_batch_matches_scalar_analyses(wingDir, loadOptions):
+    model = Analysis(wingDir, loadOptions=loadOptions)
+
+    results = model.BatchAnalysis(**scenarios)
+
+    expected = ScenarioAnalysis(Analysis(wingDir, loadOptions=loadOptions), scenarios)
+
+    assert [tuple(float(results[name][i]) for name in costNames) for i in range(len(expected))] == expected
+
+    # Material costs by name, for a material in a single category
+    fabricCosts = scenarios['materialCosts'][('fabric', 'Optimat MD3 BIAX Fabric')]
+
+    byName = model.BatchAnalysis(materialCosts={'Optimat MD3 BIAX Fabric': fabricCosts})
+    byCategory = model.BatchAnalysis(materialCosts={('fabric', 'Optimat MD3 BIAX Fabric'): fabricCosts})
+
+    for name in costNames:
+        assert list(byName[name]) == list(byCategory[name])
+
+
+def test_batch_restores_databases(wingDir):
+    model = Analysis(wingDir)
+
+    databases = copy.deepcopy([model.productionVars, model.materialVars, model.scrapRates])
+    results = Results(model)
+
+    model.BatchAnalysis(**scenarios)
+
+    assert [model.productionVars, model.materialVars, model.scrapRates] == databases
+    assert Results(model) == results
+    assert Costs(model) == wingCosts
+
+
+def Definitions(model):
+    """
+    Production definitions of the components of a Manufacture object.
+    """
+
+    return [(comp.name, [vars(step) for step in comp.productionSteps], comp.productionNames, comp.equipment.equipmentList, list(comp.equipment.equipmentCosts))
+            for compList in model.partsList for comp in compList]
+
+
+def test_component_reset(wingDir):
+    model = Analysis(wingDir)
+
+    parts = [(comp.name, comp.type, comp.product, comp.brand, dict(comp.matDetails), dict(comp.scaleVars)) for compList in model.partsList for comp in compList]
+
+    # The components are re-initialised with their product name and brand
+    model.snapshot = None
+    model.ProductionAnalysis(scaling=False, reSet=True)
+
+    assert [(comp.name, comp.type, comp.product, comp.brand, dict(comp.matDetails), dict(comp.scaleVars)) for compList in model.partsList for comp in compList] == parts
+    assert Costs(model) == wingCosts
+
+
+def test_snapshot_reset_matches_component_reset(wingDir):
+    model = Analysis(wingDir)
+    fresh = Analysis(wingDir)
+
+    assert model.snapshot is not None
+
+    for ppa in [100.0, 350.0, 25.0]:
+        model.Update(('productionVars', 'General', 'ppa', 'value'), ppa)
+        fresh.productionVars['General']['ppa']['value'] = ppa
+
+        model.ProductionAnalysis(scaling=False, reSet=True)
+
+        # Components re-initialised and defined again
+        fresh.snapshot = None
+        fresh.ProductionAnalysis(scaling=False, reSet=True)
+
+        assert Results(model) == Results(fresh)
+        assert Definitions(model) == Definitions(fresh)
+
+
+def test_snapshot_discarded_by_definition_edits(wingDir):
+    model = Analysis(wingDir)
+
+    assert model.snapshot is not None
+
+    model.Update(('manufacturingDB', 'wing', 'spar', 'fabric'), 'Optimat MD3 BIAX Fabric')
+
+    assert model.snapshot is None
+
+    model.Recompute()
+
+    # The components are defined from the edited database
+    assert all([comp.matDetails['fabric'] == 'Optimat MD3 BIAX Fabric' for comp in model.componentMap['spar1'] + model.componentMap['spar2']])
+    assert Costs(model) != wingCosts
+    assert model.snapshot is not None
+
+    fresh = Analysis(wingDir)
+    fresh.manufacturingDB['wing']['spar']['fabric'] = 'Optimat MD3 BIAX Fabric'
+    fresh.snapshot = None
+    fresh.ProductionAnalysis(scaling=False, reSet=True)
+
+    assert Results(model) == Results(fresh)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the input database caching and sharing (DataCache).
+"""
+import os
+import copy
+import shutil
+import pytest
+
+import ManuCostModel.MapParameters as mp
+from ManuCostModel.MapParameters import ReadInputsXML, ParseInputsXML
+from ManuCostModel.DataCache import LoadSnapshot, SaveSnapshot, EvictSnapshots, SnapshotName
+from ManuCostModel.DataCache import OverlayDict, ClearSharedDatabases, sharedDatabases
+from ManuCostModel.CostModel import Manufacture
+
+from conftest import exampleDir, wingCosts, Analysis, Costs
+
+
+@pytest.fixture
+def materials(tmp_path):
+    dataBase = str(tmp_path / 'materialsDatabase.xml')
+    shutil.copy(os.path.join(exampleDir, 'Input Databases', 'materialsDatabase.xml'), dataBase)
+    return dataBase
+
+
+def NoParsing(*args, **kwargs):
+    raise AssertionError('database parsed instead of loaded from the snapshot')
+
+
+def test_snapshot_round_trip(materials, tmp_path, monkeypatch):
+    cacheDir = str(tmp_path / 'cache')
+    saveList = mp.saveVarsMaterials
+
+    params = ReadInputsXML(materials, saveList, cacheDir=cacheDir)
+
+    assert os.path.isfile(os.path.join(cacheDir, SnapshotName(materials, saveList)))
+
+    # The second import is loaded from the snapshot without parsing the xml
+    monkeypatch.setattr(mp, 'ParseInputsXML', NoParsing)
+
+    assert ReadInputsXML(materials, saveList, cacheDir=cacheDir) == params
+    assert params == ParseInputsXML(materials, saveList)
+
+    # Snapshots are kept per list of saved properties
+    assert LoadSnapshot(materials, None, cacheDir) is None
+
+
+def test_snapshot_invalidated_by_file_changes(materials, tmp_path):
+    cacheDir = str(tmp_path / 'cache')
+
+    params = ReadInputsXML(materials, cacheDir=cacheDir)
+    assert LoadSnapshot(materials, None, cacheDir) == params
+
+    # Same size and modification time, different content
+    stat = os.stat(materials)
+
+    with open(materials, 'rb') as dbFile:
+        text = dbFile.read()
+
+    with open(materials, 'wb') as dbFile:
+        dbFile.write(text.replace(b'>50.0</property>', b'>51.0</property>', 1))
+
+    os.utime(materials, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert os.stat(materials).st_size == stat.st_size
+    assert LoadSnapshot(materials, None, cacheDir) is None
+
+    newParams = ReadInputsXML(materials, cacheDir=cacheDir)
+
+    assert newParams == ParseInputsXML(materials)
+    assert newParams != params
+    assert LoadSnapshot(materials, None, cacheDir) == newParams
+
+    # Removing the database invalidates its snapshot
+    os.remove(materials)
+
+    assert LoadSnapshot(materials, None, cacheDir) is None
+
+
+def test_snapshot_eviction(materials, tmp_path):
+    cacheDir = str(tmp_path / 'cache')
+    params = ParseInputsXML(materials)
+
+    # Snapshots of three copies of the database, oldest first
+    dataBases = []
+
+    for i in range(3):
+        dataBase = str(tmp_path / ('materials' + str(i) + '.xml'))
+        shutil.copy(materials, dataBase)
+        SaveSnapshot(dataBase, params, cacheDir=cacheDir)
+
+        snapFile = os.path.join(cacheDir, SnapshotName(dataBase))
+        os.utime(snapFile, ns=(i*10**9, i*10**9))
+        dataBases.append(dataBase)
+
+    snapSize = os.path.getsize(os.path.join(cacheDir, SnapshotName(dataBases[0])))
+
+    # Loading marks the oldest snapshot as recently used
+    assert LoadSnapshot(dataBases[0], None, cacheDir) == params
+
+    EvictSnapshots(cacheDir, 2*snapSize)
+
+    assert LoadSnapshot(dataBases[1], None, cacheDir) is None
+    assert LoadSnapshot(dataBases[0], None, cacheDir) == params
+    assert LoadSnapshot(dataBases[2], None, cacheDir) == params
+
+    # Saving beyond the maximum size evicts the least recently used snapshots
+    for dataBase in [dataBases[0], dataBases[2]]:
+        os.utime(os.path.join(cacheDir, SnapshotName(dataBase)), ns=(0, 0))
+
+    SaveSnapshot(dataBases[1], params, cacheDir=cacheDir, maxSize=snapSize)
+
+    assert sorted(os.listdir(cacheDir)) == [SnapshotName(dataBases[1])]
+
+
+@pytest.fixture
+def registry():
+    ClearSharedDatabases()
+    yield sharedDatabases
+    ClearSharedDatabases()
+
+
+def test_overlay_edits_are_local():
+    base = {'fabric': {'Fabric 1': {'cost': 5.0, 'width': 1000.0}},
+            'steps': {'Step 1': {'consumables': ['Peel ply', 'Vacuum film']}}}
+    reference = copy.deepcopy(base)
+
+    first = OverlayDict(base)
+    second = OverlayDict(base)
+
+    first['fabric']['Fabric 1']['cost'] = 7.5
+    first['fabric']['Fabric 2'] = {'cost': 1.0}
+    first['steps']['Step 1']['consumables'].append('Flow media')
+    del second['fabric']['Fabric 1']['width']
+
+    assert first['fabric']['Fabric 1'] == {'cost': 7.5, 'width': 1000.0}
+    assert first.ToDict()['steps']['Step 1']['consumables'] == ['Peel ply', 'Vacuum film', 'Flow media']
+    assert 'Fabric 2' not in second['fabric']
+    assert second.ToDict() == {'fabric': {'Fabric 1': {'cost': 5.0}},
+                               'steps': {'Step 1': {'consumables': ['Peel ply', 'Vacuum film']}}}
+    assert copy.deepcopy(second) == second.ToDict()
+
+    # The shared dictionary is never modified
+    assert base == reference
+
+
+def test_shared_databases_are_local_to_each_model(wingDir, registry):
+    loadOptions = {'shared': True}
+
+    first = Analysis(wingDir, loadOptions=loadOptions)
+    second = Manufacture(wingDir, '', processName='VI', productName='wing', scaleFile='ScalingVariables.xml', loadOptions=loadOptions)
+
+    assert len(registry) == 1
+
+    dataBases = next(iter(registry.values()))
+    reference = copy.deepcopy(dataBases)
+
+    # Edit the databases of the second model only
+    fabric = next(iter(second.materialVars['fabric']))
+    second.materialVars['fabric'][fabric]['cost'] *= 2.0
+    second.productionVars['General']['salary']['value'] = 50.0
+    second.ProductionAnalysis(scaling=True, readScaling=True)
+
+    third = Analysis(wingDir, loadOptions=loadOptions)
+
+    assert Costs(first) == wingCosts
+    assert Costs(third) == Costs(first)
+    assert Costs(second)[0] > Costs(first)[0]
+    assert first.materialVars['fabric'][fabric]['cost'] == reference[3]['fabric'][fabric]['cost']
+    assert dataBases == reference
+    assert len(registry) == 1
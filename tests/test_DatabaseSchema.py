@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the typed records of the materials and equipment databases, which
+are created while the databases are imported and validated on import.
+"""
+import os
+import copy
+import pickle
+import shutil
+import pytest
+import xml.etree.ElementTree as ET
+
+from ManuCostModel.DatabaseSchema import MaterialRecord, EquipmentRecord, ValidateDatabase
+from ManuCostModel.MapParameters import ReadInputsXML, LazyDatabase, ReadSharedInputs, saveVarsMaterials, saveVarsEquipment
+from ManuCostModel.BinaryDatabase import ConvertDatabase
+from ManuCostModel.DataCache import ClearSharedDatabases
+
+from conftest import exampleDir, wingCosts, Analysis, Costs, InputFiles
+
+materialsDatabase = os.path.join(exampleDir, 'Input Databases', 'materialsDatabase.xml')
+
+
+def test_record_attributes():
+    record = MaterialRecord({'cost': 9.5, 'thickness (cured)': '0.5', 'density of fibres': '___', 'name': 'fabric'})
+
+    assert record.cost == 9.5
+    assert record.thicknessCured == 0.5
+    assert record.densityOfFibres is None
+    assert record.arealWeight is None
+    assert record.Invalid() == []
+
+    # Changes made through the dictionary interface are applied to the attributes
+    record['cost'] = 11
+    record.update({'areal weight': 0.8})
+    del record['thickness (cured)']
+
+    assert record.cost == 11.0
+    assert record.arealWeight == 0.8
+    assert record.thicknessCured is None
+
+    assert record.pop('cost') == 11
+    assert record.cost is None
+
+    # Only the schema attributes are defined
+    with pytest.raises(AttributeError):
+        record.name = 'fabric'
+
+
+def test_record_dictionary_behaviour():
+    values = {'purchase cost': 1000.0, 'useful life': 10, 'machine length': 'N/A'}
+    record = EquipmentRecord(values)
+
+    assert isinstance(record, dict)
+    assert record == values
+    assert dict(record) == values
+    assert list(record.items()) == list(values.items())
+
+    # Copies keep the record type and attributes
+    for duplicate in [record.copy(), copy.copy(record), copy.deepcopy(record), pickle.loads(pickle.dumps(record))]:
+        assert type(duplicate) is EquipmentRecord
+        assert duplicate == record
+        assert duplicate.purchaseCost == 1000.0
+        assert duplicate.usefulLife == 10.0
+
+
+def LoadModes(dataBase, saveList, recordType, cacheDir):
+    """
+    Databases imported as records in each way of importing a database.
+    """
+
+    databases = {'plain': ReadInputsXML(dataBase, saveList, recordType=recordType),
+                 'stream': ReadInputsXML(dataBase, saveList, stream=True, recordType=recordType)}
+
+    # The second import is loaded from the snapshot
+    ReadInputsXML(dataBase, saveList, cacheDir=cacheDir, recordType=recordType)
+    databases['snapshot'] = ReadInputsXML(dataBase, saveList, cacheDir=cacheDir, recordType=recordType)
+
+    lazy = LazyDatabase(dataBase, saveList, recordType=recordType)
+    databases['lazy'] = {catName: {name: category[name] for name in category} for catName, category in lazy.items()}
+
+    ConvertDatabase(dataBase)
+    databases['binary'] = ReadInputsXML(dataBase, saveList, recordType=recordType)
+
+    return databases
+
+
+@pytest.mark.parametrize('fileName, saveList, recordType', [('materialsDatabase.xml', saveVarsMaterials, MaterialRecord),
+                                                            ('equipmentVariablesDatabase.xml', saveVarsEquipment, EquipmentRecord)])
+def test_records_created_on_import(fileName, saveList, recordType, tmp_path):
+    dataBase = str(tmp_path / fileName)
+    shutil.copy(os.path.join(exampleDir, 'Input Databases', fileName), dataBase)
+
+    params = ReadInputsXML(dataBase, saveList)
+
+    for mode, database in LoadModes(dataBase, saveList, recordType, str(tmp_path / 'cache')).items():
+        assert database == params, mode
+
+        for catParams in database.values():
+            assert all(type(record) is recordType for record in catParams.values()), mode
+
+
+def test_compiled_analysis(wingDir):
+    model = Analysis(wingDir, loadOptions={'compiled': True})
+
+    assert Costs(model) == wingCosts
+
+    fabric = model.materialVars['fabric']['Optimat MD3 BIAX Fabric']
+
+    assert type(fabric) is MaterialRecord
+    assert fabric.cost == fabric['cost']
+
+
+def test_shared_records(wingDir):
+    ClearSharedDatabases()
+
+    try:
+        shared = ReadSharedInputs(*InputFiles(wingDir), compiled=True)
+        plain = ReadSharedInputs(*InputFiles(wingDir))
+
+        fabric = shared[3]['fabric']['Optimat MD3 BIAX Fabric']
+
+        # Records are copied into the overlay, so edits are not shared
+        assert type(fabric) is MaterialRecord
+        assert type(plain[3]['fabric']['Optimat MD3 BIAX Fabric']) is not MaterialRecord
+
+        fabric['cost'] = 1.0
+
+        assert fabric.cost == 1.0
+        assert ReadSharedInputs(*InputFiles(wingDir), compiled=True)[3]['fabric']['Optimat MD3 BIAX Fabric'].cost != 1.0
+
+    finally:
+        ClearSharedDatabases()
+
+
+def InvalidDatabase(tmp_path):
+    """
+    Copy of the materials database with a cost that is not numeric.
+    """
+
+    dataBase = str(tmp_path / 'materialsDatabase.xml')
+
+    tree = ET.parse(materialsDatabase)
+
+    param = tree.getroot().find('./*[@name="fabric"]').find('.//parameter[@name="Optimat MD3 BIAX Fabric"]')
+    param.find('./property[@name="cost"]').text = 'unknown'
+
+    tree.write(dataBase, encoding='utf-8', xml_declaration=True)
+
+    return dataBase
+
+
+def test_invalid_values_raise(tmp_path):
+    dataBase = InvalidDatabase(tmp_path)
+
+    # Only the records are validated
+    assert ReadInputsXML(dataBase, saveVarsMaterials)['fabric']['Optimat MD3 BIAX Fabric']['cost'] == 'unknown'
+
+    for stream in [False, True]:
+        with pytest.raises(ValueError, match="'fabric', 'Optimat MD3 BIAX Fabric', 'cost', 'unknown'"):
+            ReadInputsXML(dataBase, saveVarsMaterials, stream=stream, recordType=MaterialRecord)
+
+    # Lazily imported entries are validated when they are read
+    lazy = LazyDatabase(dataBase, saveVarsMaterials, recordType=MaterialRecord)
+
+    assert lazy['resin']['Araldite LY1564'].cost is not None
+
+    with pytest.raises(ValueError, match='unknown'):
+        lazy['fabric']['Optimat MD3 BIAX Fabric']
+
+
+def test_validate_database():
+    params = {'fabric': {'valid': MaterialRecord({'cost': 9.5, 'width': 'N/A'}),
+                         'invalid': MaterialRecord({'cost': 9.5, 'width': 'wide', 'thickness': '1 mm'})}}
+
+    with pytest.raises(ValueError) as error:
+        ValidateDatabase(params, 'materials.xml')
+
+    assert 'materials.xml' in str(error.value)
+    assert "('fabric', 'invalid', 'width', 'wide')" in str(error.value)
+    assert "('fabric', 'invalid', 'thickness', '1 mm')" in str(error.value)
+    assert "'valid'" not in str(error.value)
+
+    del params['fabric']['invalid']
+
+    ValidateDatabase(params)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that each way of importing the input databases gives the same data as
+a plain import of the xml databases.
+"""
+import os
+import copy
+import glob
+import shutil
+import pytest
+
+from ManuCostModel.MapParameters import ReadInputsXML, saveVarsMethods, saveVarsMaterials, saveVarsEquipment
+from ManuCostModel.MapParameters import LazyDatabase, IndexInputsXML, DatabaseReferences, ReadInputs
+from ManuCostModel.MapParameters import MapParameterSets, WriteSystemParameters
+
+from conftest import exampleDir, testsDir, wingCosts, testCosts, Analysis, Costs, InputFiles
+
+xmlDatabases = sorted(glob.glob(os.path.join(exampleDir, 'Input Databases', '*.xml')) +
+                      glob.glob(os.path.join(testsDir, 'Input Databases', '*.xml')))
+
+saveLists = [None, saveVarsMethods, saveVarsMaterials, saveVarsEquipment]
+
+
+@pytest.mark.parametrize('dataBase', xmlDatabases, ids=os.path.basename)
+@pytest.mark.parametrize('saveList', saveLists)
+def test_stream_matches_plain_import(dataBase, saveList):
+    params = ReadInputsXML(dataBase, saveList)
+    streamed = ReadInputsXML(dataBase, saveList, stream=True)
+
+    assert streamed == params
+    assert list(streamed) == list(params)
+
+
+def test_stream_analysis(wingDir, testDir):
+    assert Costs(Analysis(wingDir, loadOptions={'stream': True})) == wingCosts
+    assert Costs(Analysis(testDir, loadOptions={'stream': True})) == testCosts
+
+
+def LazyContents(database):
+    return {catName: {name: category[name] for name in category} for catName, category in database.items()}
+
+
+@pytest.mark.parametrize('dataBase', xmlDatabases, ids=os.path.basename)
+@pytest.mark.parametrize('saveList', saveLists)
+def test_lazy_matches_plain_import(dataBase, saveList):
+    params = ReadInputsXML(dataBase, saveList)
+    database = LazyDatabase(dataBase, saveList)
+
+    assert all(len(category.loaded) == 0 for category in database.values())
+    assert LazyContents(database) == params
+    assert list(database) == list(params)
+
+
+@pytest.mark.parametrize('dataBase', xmlDatabases, ids=os.path.basename)
+def test_index_independent_of_chunk_size(dataBase):
+    index = IndexInputsXML(dataBase)
+
+    for chunkSize in [1, 7, 64, 1000]:
+        assert IndexInputsXML(dataBase, chunkSize) == index
+
+
+def test_lazy_analysis_loads_referenced_entries(wingDir):
+    model = Analysis(wingDir, loadOptions={'lazy': True})
+
+    assert Costs(model) == wingCosts
+
+    materialRefs, equipmentRefs = DatabaseReferences(model.manufacturingDB, model.productionMethods)
+
+    for database, references in [(model.materialVars, materialRefs), (model.equipmentVars, equipmentRefs)]:
+        assert isinstance(database, LazyDatabase)
+
+        loaded = set()
+
+        for category in database.values():
+            loaded.update(category.loaded)
+
+        assert loaded <= references
+        assert sum(len(category) for category in database.values()) > len(loaded)
+
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_concurrent_matches_serial_import(wingDir, processes):
+    dataBases = InputFiles(wingDir)
+    params = ReadInputs(*dataBases)
+
+    assert ReadInputs(*dataBases, workers=3, processes=processes) == params
+
+
+def test_concurrent_analysis(wingDir):
+    model = Analysis(wingDir, loadOptions={'workers': 6})
+
+    assert Costs(model) == wingCosts
+
+
+def test_parameter_sets_match_rewritten_database(tmp_path):
+    consVariables = str(tmp_path / 'constructionVariablesDatabase.xml')
+    shutil.copy(os.path.join(exampleDir, 'Input Databases', 'constructionVariablesDatabase.xml'), consVariables)
+
+    consInputVars = ReadInputsXML(consVariables)
+    reference = copy.deepcopy(consInputVars)
+
+    paramSets = [{'RPA_AF_MWS_Span': span} for span in [25.126, 30.0, 41.5]]
+
+    designVars = MapParameterSets(paramSets, consInputVars)
+
+    # The construction variables and database file are not modified
+    assert consInputVars == reference
+    assert ReadInputsXML(consVariables) == reference
+
+    # Each design matches a re-import of the rewritten database file
+    for paramsList, design in zip(paramSets, designVars):
+        WriteSystemParameters(consVariables, paramsList)
+
+        assert design.ToDict() == ReadInputsXML(consVariables)
+
+    assert designVars[0]['external_geometry']['wing length']['value'] == '25.13'
+
+    # The last design is written to the database file once
+    shutil.copy(os.path.join(exampleDir, 'Input Databases', 'constructionVariablesDatabase.xml'), consVariables)
+
+    designVars = MapParameterSets(paramSets, consInputVars, consVariables)
+
+    assert ReadInputsXML(consVariables) == designVars[-1].ToDict()
+    assert consInputVars == reference
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that each way of determining the part scaling variables gives the
+results of the original per-station structural breakdown.
+
+scalingReference.json holds the scaling variables of the example wing parts
+determined by the original implementation. The original web breakdown
+without core returns no core values, so zero core values are expected (as
+for the skins without core).
+"""
+import os
+import copy
+import json
+import shutil
+import pytest
+from collections.abc import Mapping
+from numpy import loadtxt, array_equal
+
+import ManuCostModel.PartDecomposition as pd
+from ManuCostModel.PartDecomposition import StructuralBreakdown, ScalingVariables, LoadCSV, LoadAirfoil, ClearGeometryCache
+from ManuCostModel.CostModel import Manufacture, component
+from ManuCostModel.MapParameters import ReadInputsXML
+from ManuCostModel.BinaryDatabase import ConvertGeometry, GeometryBundle
+
+from conftest import exampleDir, testsDir
+
+inputDir = os.path.join(exampleDir, 'Input Databases')
+csvDir = os.path.join(inputDir, 'CSV Files') + os.sep
+
+skinFabric = 'Optimat MD3 BIAX Fabric'
+sparFabric = 'Saertex Zoltek PX35 Fabric'
+coreName = 'Rohacell 51 RIST'
+
+consInputVars = {'external_geometry': {'wingLen': '30.0',
+                                       'chordDist': 'Chord.csv',
+                                       'airfoils': 'Airfoils Distribution.csv'},
+                 'internal_structure': {'sparLocDist': 'SparLocation.csv',
+                                        'sparThick': sparFabric + '_SparThickness.csv',
+                                        'skinThick': skinFabric + '_SkinThickness.csv',
+                                        'webThick': skinFabric + '_WebThickness.csv',
+                                        'webLocDist': 'WebLocation.csv',
+                                        'skinPanelFraction': 'PanelWithoutCore.csv',
+                                        'webPanelFraction': 'N/A'}}
+
+# Part name: part type, side and materials
+partDefinitions = {'spar': ('spar', None, {'fabric': sparFabric}),
+                   'skin Lower': ('skin', 'Lower', {'fabric': skinFabric}),
+                   'skin Upper': ('skin', 'Upper', {'fabric': skinFabric, 'core': coreName}),
+                   'web Fore': ('web', 'Fore', {'fabric': skinFabric}),
+                   'web Aft': ('web', 'Aft', {'fabric': skinFabric, 'core': coreName})}
+
+materialVars = ReadInputsXML(os.path.join(inputDir, 'materialsDatabase.xml'))
+
+with open(os.path.join(testsDir, 'scalingReference.json')) as jsonFile:
+    reference = json.load(jsonFile)
+
+
+def Parts(names=None):
+    """
+    Component objects of the example wing parts.
+    """
+
+    parts = []
+
+    for name in (partDefinitions if names is None else names):
+        partType, side, matDetails = partDefinitions[name]
+
+        comp = component(name, partType, 'wing', matDetails=dict(matDetails))
+        comp.side = side
+
+        parts.append(comp)
+
+    return parts
+
+
+def ScaleVars(parts):
+    return {comp.name: comp.scaleVars for comp in parts}
+
+
+@pytest.fixture(autouse=True)
+def geometryCache():
+    ClearGeometryCache()
+    yield pd.geometryCache
+    ClearGeometryCache()
+
+
+def test_csv_cache_matches_csv_files(tmp_path, geometryCache):
+    csvFiles = [val for val in consInputVars['internal_structure'].values() if val != 'N/A'] + ['Chord.csv']
+
+    for fileName in csvFiles:
+        vals = LoadCSV(csvDir, fileName, 'float', 0)
+
+        assert array_equal(vals, loadtxt(csvDir + fileName, delimiter=',', skiprows=1, usecols=0))
+        assert vals.flags.writeable is False
+
+        # Cached values are returned until the file changes
+        assert LoadCSV(csvDir, fileName, 'float', 0) is vals
+
+    assert len(geometryCache) == len(csvFiles)
+
+    # Changed files are read again
+    direct = str(tmp_path) + os.sep
+    shutil.copy(csvDir + 'Chord.csv', direct + 'Chord.csv')
+
+    chord = LoadCSV(direct, 'Chord.csv', 'float', 0)
+
+    with open(direct + 'Chord.csv', 'a') as csvFile:
+        csvFile.write('0.5\n')
+
+    stat = os.stat(direct + 'Chord.csv')
+    os.utime(direct + 'Chord.csv', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert array_equal(LoadCSV(direct, 'Chord.csv', 'float', 0), list(chord) + [0.5])
+
+
+def test_cached_csv_breakdown():
+    for i in range(2):
+        parts = Parts()
+        StructuralBreakdown(parts, csvDir, consInputVars, materialVars)
+
+        assert ScaleVars(parts) == reference
+
+
+def test_airfoil_profile_matches_point_sums():
+    airfoil = loadtxt(csvDir + 'Airfoils_NACA-2412.csv', delimiter=',', skiprows=1, usecols=(0, 1), unpack=True)
+    profile = LoadAirfoil(csvDir, 'Airfoils_NACA-2412.csv')
+
+    x, y = list(airfoil[0]), list(airfoil[1])
+    point = profile.point
+
+    assert x[point] == 0.0 and 0.0 not in x[point+1:]
+
+    # Surface lengths as the sum of the distances between the coordinates
+    for surface, Length in [((x[:point], y[:point]), profile.LowerLength), ((x[point:], y[point:]), profile.UpperLength)]:
+        length = 0.0
+
+        for i in range(len(surface[0])):
+            assert Length(i + 1) == length
+
+            if i + 1 < len(surface[0]):
+                length += ((surface[0][i+1] - surface[0][i])**2.0 + (surface[1][i+1] - surface[1][i])**2.0)**0.5
+
+    # Coordinates before chordwise locations
+    for chordLoc in [0.0, 0.1, 0.25, 0.4, 0.65, 1.0]:
+        upperIndex = [i for i, val in enumerate(x[point:]) if val <= chordLoc]
+
+        assert profile.LowerCount([chordLoc])[0] == len([val for val in x[:point] if val <= chordLoc])
+        assert profile.UpperCount([chordLoc])[0] == (upperIndex[-1] + 1 if len(upperIndex) > 0 else 0)
+
+
+def test_airfoil_profile_cache():
+    profile = LoadAirfoil(csvDir, 'Airfoils_NACA-2412.csv')
+
+    assert LoadAirfoil(csvDir, 'Airfoils_NACA-2412.csv') is profile
+
+    ClearGeometryCache()
+
+    assert LoadAirfoil(csvDir, 'Airfoils_NACA-2412.csv') is not profile
+
+    # Profiles of geometry held in memory are not cached
+    geometry = {'Airfoils_NACA-2412.csv': loadtxt(csvDir + 'Airfoils_NACA-2412.csv', delimiter=',', skiprows=1)}
+
+    assert LoadAirfoil(geometry, 'Airfoils_NACA-2412.csv') is not LoadAirfoil(geometry, 'Airfoils_NACA-2412.csv')
+
+
+@pytest.mark.parametrize('name', list(partDefinitions))
+def test_part_scaling_variables(name):
+    comp, = Parts([name])
+    ScalingVariables(comp, csvDir, consInputVars, materialVars)
+
+    assert comp.scaleVars == reference[name]
+
+
+def test_web_without_core():
+    comp, = Parts(['web Fore'])
+    ScalingVariables(comp, csvDir, consInputVars, materialVars)
+
+    assert 'core' not in comp.matDetails
+    assert [comp.scaleVars[name] for name in ['Core Surface Area', 'Core Ply Length', 'Core Ply Surface Area']] == [0.0, 0.0, 0.0]
+    assert comp.scaleVars == reference['web Fore']
+
+
+def SharedGeometry():
+    """
+    Span geometry of the full span of the example wing.
+    """
+
+    return pd.SpanGeometry(csvDir, consInputVars['external_geometry']['chordDist'], consInputVars['external_geometry']['airfoils'],
+                           consInputVars['internal_structure']['webLocDist'], consInputVars['internal_structure']['sparLocDist'])
+
+
+@pytest.mark.parametrize('names', [['web Aft', 'spar', 'skin Upper'], ['skin Lower', 'web Fore'], list(reversed(list(partDefinitions)))], ids=len)
+def test_single_pass_breakdown(names):
+    parts = Parts(names)
+    StructuralBreakdown(parts, csvDir, consInputVars, materialVars)
+
+    assert ScaleVars(parts) == {name: reference[name] for name in names}
+
+
+def test_shared_span_geometry():
+    geometry = SharedGeometry()
+
+    parts = Parts()
+    StructuralBreakdown(parts, csvDir, consInputVars, materialVars, geometry=geometry)
+
+    assert ScaleVars(parts) == reference
+
+    # The same geometry for each part on its own
+    parts = Parts()
+
+    for comp in parts:
+        ScalingVariables(comp, csvDir, consInputVars, materialVars, geometry)
+
+    assert ScaleVars(parts) == reference
+
+
+def GeometrySources(tmp_path):
+    """
+    Binary geometry bundle and in-memory contents of the example csv files.
+    """
+
+    bundle = GeometryBundle(ConvertGeometry(csvDir, str(tmp_path / 'geometry.mcmgeo')))
+
+    return {'bundle': bundle, 'dict': pd.GeometryData(csvDir, consInputVars)}
+
+
+@pytest.mark.parametrize('source', ['bundle', 'dict'])
+def test_geometry_source_breakdown(source, tmp_path):
+    geometry = GeometrySources(tmp_path)[source]
+    ClearGeometryCache()
+
+    assert isinstance(geometry, Mapping)
+
+    parts = Parts()
+    StructuralBreakdown(parts, geometry, consInputVars, materialVars)
+
+    assert ScaleVars(parts) == reference
+
+    for name in partDefinitions:
+        comp, = Parts([name])
+        ScalingVariables(comp, geometry, consInputVars, materialVars)
+
+        assert comp.scaleVars == reference[name]
+
+    # Geometry held in memory is not added to the csv cache
+    assert len(pd.geometryCache) == 0
+
+
+@pytest.mark.parametrize('blockSize', [1, 2, 3, 7, 10000])
+def test_block_breakdown(blockSize):
+    parts = Parts()
+    StructuralBreakdown(parts, csvDir, consInputVars, materialVars, blockSize)
+
+    assert ScaleVars(parts) == reference
+
+
+@pytest.mark.parametrize('blockSize', [0, -1])
+def test_block_size_below_one(blockSize, wingDir):
+    with pytest.raises(ValueError):
+        StructuralBreakdown(Parts(), csvDir, consInputVars, materialVars, blockSize)
+
+    with pytest.raises(ValueError):
+        Manufacture(wingDir, '', processName='VI', productName='wing', scaleFile='ScalingVariables.xml', scaleOptions={'blockSize': blockSize})
+
+
+@pytest.mark.parametrize('blockSize', [None, 4])
+def test_parallel_breakdown(blockSize):
+    parts = Parts()
+    StructuralBreakdown(parts, csvDir, consInputVars, materialVars, blockSize, workers=2)
+
+    assert ScaleVars(parts) == reference
+
+
+def test_breakdown_pool_reused():
+    pool = pd.BreakdownPool(2)
+
+    try:
+        parts = Parts()
+        StructuralBreakdown(parts, csvDir, consInputVars, materialVars, workers=pool)
+
+        assert ScaleVars(parts) == reference
+
+        # The workers are reused for the same inputs
+        executor = pool.executor
+
+        parts = Parts(['web Fore', 'skin Upper'])
+        StructuralBreakdown(parts, csvDir, consInputVars, materialVars, workers=pool)
+
+        assert pool.executor is executor
+        assert ScaleVars(parts) == {name: reference[name] for name in ['web Fore', 'skin Upper']}
+
+        # The workers are restarted for a different block size
+        parts = Parts()
+        StructuralBreakdown(parts, csvDir, consInputVars, materialVars, 3, pool)
+
+        assert pool.executor is not executor
+        assert ScaleVars(parts) == reference
+
+    finally:
+        pool.Shutdown()
+
+    assert pool.executor is None
+
+
+def test_breakdown_pool_keyed_on_file_signatures(tmp_path, monkeypatch):
+    direct = shutil.copytree(csvDir, str(tmp_path / 'CSV Files')) + os.sep
+    pool = pd.BreakdownPool(2)
+
+    def GeometryContents(*args):
+        raise AssertionError('csv files read')
+
+    try:
+        parts = Parts(['spar'])
+        StructuralBreakdown(parts, direct, consInputVars, materialVars, workers=pool)
+
+        executor = pool.executor
+
+        # The pool is reused without reading the csv files again
+        monkeypatch.setattr(pd, 'GeometryContents', GeometryContents)
+
+        parts = Parts()
+        StructuralBreakdown(parts, direct, consInputVars, materialVars, workers=pool)
+
+        assert pool.executor is executor
+        assert ScaleVars(parts) == reference
+
+        # A changed csv file restarts the pool
+        stat = os.stat(direct + 'Chord.csv')
+        os.utime(direct + 'Chord.csv', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        parts = Parts()
+        StructuralBreakdown(parts, direct, consInputVars, materialVars, workers=pool)
+
+        assert pool.executor is not executor
+        assert ScaleVars(parts) == reference
+
+    finally:
+        pool.Shutdown()
+
+
+@pytest.fixture
+def breakdownCalls(monkeypatch):
+    """
+    Names of the parts of each structural breakdown.
+    """
+
+    calls = []
+    Breakdown = pd.StructuralBreakdown
+
+    def CountedBreakdown(parts, *args, **kwargs):
+        calls.append([comp.name for comp in parts])
+        Breakdown(parts, *args, **kwargs)
+
+    monkeypatch.setattr(pd, 'StructuralBreakdown', CountedBreakdown)
+
+    return calls
+
+
+def test_cached_breakdown(tmp_path, breakdownCalls):
+    cacheDir = str(tmp_path / 'cache')
+
+    for i in range(2):
+        parts = Parts()
+        pd.CachedBreakdown(parts, csvDir, consInputVars, materialVars, cacheDir)
+
+        assert ScaleVars(parts) == reference
+
+    # The second run is loaded from the cache
+    assert breakdownCalls == [list(partDefinitions)]
+
+    # Only the parts using the core are determined again
+    coreVars = copy.deepcopy(materialVars)
+    coreVars['core'][coreName]['width'] = 400.0
+
+    parts = Parts()
+    pd.CachedBreakdown(parts, csvDir, consInputVars, coreVars, cacheDir)
+
+    assert breakdownCalls[1] == ['skin Upper', 'web Aft']
+
+    fresh = Parts()
+    StructuralBreakdown(fresh, csvDir, consInputVars, coreVars)
+
+    assert ScaleVars(parts) == ScaleVars(fresh)
+
+    assert ScaleVars(parts)['skin Upper'] != reference['skin Upper']
+
+    for comp in parts:
+        if comp.name in ['spar', 'skin Lower', 'web Fore']:
+            assert comp.scaleVars == reference[comp.name]
+
+
+def test_cached_breakdown_key_reused(tmp_path, breakdownCalls, monkeypatch):
+    cacheDir = str(tmp_path / 'cache')
+    direct = shutil.copytree(csvDir, str(tmp_path / 'CSV Files')) + os.sep
+
+    pd.CachedBreakdown(Parts(), direct, consInputVars, materialVars, cacheDir)
+
+    contents = []
+    GeometryContents = pd.GeometryContents
+
+    def CountedContents(*args):
+        contents.append(args[0])
+        return GeometryContents(*args)
+
+    monkeypatch.setattr(pd, 'GeometryContents', CountedContents)
+
+    # The csv contents are not read again for unchanged files
+    parts = Parts()
+    pd.CachedBreakdown(parts, direct, consInputVars, materialVars, cacheDir)
+
+    assert ScaleVars(parts) == reference
+    assert contents == []
+    assert len(breakdownCalls) == 1
+
+    # A touched csv file is read again, and the unchanged contents give the
+    # same cache key
+    stat = os.stat(direct + 'Chord.csv')
+    os.utime(direct + 'Chord.csv', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    parts = Parts()
+    pd.CachedBreakdown(parts, direct, consInputVars, materialVars, cacheDir)
+
+    assert ScaleVars(parts) == reference
+    assert contents == [direct]
+    assert len(breakdownCalls) == 1
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that pricing a quantity takeoff, or evaluating its cost plan, gives the
+results of a full analysis with the same prices.
+"""
+import pytest
+from numpy import linspace, broadcast_to
+
+from ManuCostModel.Pricing import CostPlan
+
+from conftest import wingCosts, testCosts, costNames, Analysis
+
+resultNames = costNames + ['costs_consumables', 'costs_overheads']
+
+# Price books of the example wing, by category and material name or by
+# material name for all categories
+priceBooks = [{'salary': 42.5},
+              {'materials': {('fabric', 'Optimat MD3 BIAX Fabric'): 9.5}},
+              {'materials': {('resin', 'Araldite LY1564'): 5.0, ('consumables', 'Peel ply'): 1.25}, 'salary': 20.0},
+              {'materials': {'Saertex Zoltek PX35 Fabric': 11.0, 'Vacuum film': 0.35, ('hardener', 'Araldite XP3416'): 30.0}, 'salary': 60.0}]
+
+
+def PriceResults(results):
+    return {name: float(results[name]) for name in resultNames}
+
+
+def ScalarAnalysis(model, priceBook):
+    """
+    Results of a full analysis with the prices of a price book. The database
+    values of the Manufacture object are restored after the analysis.
+    """
+
+    matCosts = priceBook.get('materials', {})
+    general = model.productionVars['General']
+
+    replaced = [(general['salary'], 'value', general['salary']['value'])]
+
+    # Prices by material name first, so that category prices replace them
+    for key in sorted(matCosts, key=lambda key: type(key) is tuple):
+        if type(key) is tuple:
+            matKeys = [key]
+        else:
+            matKeys = [(catName, key) for catName, catParams in model.materialVars.items() if key in catParams]
+
+        for catName, matName in matKeys:
+            matParams = model.materialVars[catName][matName]
+
+            replaced.append((matParams, 'cost', matParams['cost']))
+            matParams['cost'] = matCosts[key]
+
+    general['salary']['value'] = priceBook.get('salary', general['salary']['value'])
+
+    model.ProductionAnalysis(scaling=False, reSet=True)
+
+    for params, key, value in reversed(replaced):
+        params[key] = value
+
+    return {name: float(getattr(model, name)) for name in resultNames}
+
+
+@pytest.fixture
+def takeoff(wingDir):
+    return Analysis(wingDir).Takeoff()
+
+
+@pytest.mark.parametrize('directory, costs', [('wingDir', wingCosts), ('testDir', testCosts)])
+def test_takeoff_prices_match_analysis(directory, costs, request):
+    model = Analysis(request.getfixturevalue(directory))
+    takeoff = model.Takeoff()
+
+    assert PriceResults(takeoff.Price()) == {name: float(getattr(model, name)) for name in resultNames}
+    assert PriceResults(takeoff.Price(takeoff.PriceBook())) == PriceResults(takeoff.Price())
+    assert tuple(PriceResults(takeoff.Price())[name] for name in costNames) == costs
+
+
+@pytest.mark.parametrize('priceBook', priceBooks, ids=str)
+def test_price_matches_scalar_analysis(priceBook, takeoff, wingDir):
+    assert PriceResults(takeoff.Price(priceBook)) == ScalarAnalysis(Analysis(wingDir), priceBook)
+
+
+def test_prices_by_category(wingDir):
+    model = Analysis(wingDir)
+
+    # Hardener with the name of the resin of the parts
+    hardener = dict(model.materialVars['hardener']['Araldite XP3416'])
+    hardener['cost'] = 9.0
+
+    model.materialVars['hardener']['Araldite LY1564'] = hardener
+
+    for partName in ['spar', 'web', 'skin']:
+        model.Update(('manufacturingDB', 'wing', partName, 'hardener'), 'Araldite LY1564')
+
+    model.Recompute()
+
+    takeoff = model.Takeoff()
+
+    assert takeoff.prices[('resin', 'Araldite LY1564')] != takeoff.prices[('hardener', 'Araldite LY1564')]
+    assert PriceResults(takeoff.Price()) == {name: float(getattr(model, name)) for name in resultNames}
+
+    for priceBook in [{'materials': {('hardener', 'Araldite LY1564'): 20.0}},
+                      {'materials': {'Araldite LY1564': 5.0}},
+                      {'materials': {'Araldite LY1564': 5.0, ('hardener', 'Araldite LY1564'): 20.0}},
+                      {'materials': {('hardener', 'Araldite LY1564'): 20.0, 'Araldite LY1564': 5.0}}]:
+
+        prices = PriceResults(takeoff.Price(priceBook))
+
+        # A category price takes precedence over the price by name
+        assert prices == ScalarAnalysis(model, priceBook)
+
+        results = model.BatchAnalysis(materialCosts=priceBook['materials'])
+
+        assert {name: float(results[name]) for name in costNames} == {name: prices[name] for name in costNames}
+
+
+def PlanResults(results, expected):
+    """
+    Cost plan results, compared with the expected results to rounding (the
+    plan sums the costs in a different order).
+    """
+
+    return {name: pytest.approx(expected[name], rel=4e-16, abs=0.0) for name in resultNames} == PriceResults(results)
+
+
+@pytest.mark.parametrize('priceBook', [{}] + priceBooks, ids=str)
+def test_cost_plan_matches_scalar_analysis(priceBook, takeoff, wingDir):
+    plan = CostPlan(takeoff)
+
+    assert PlanResults(plan.Evaluate(priceBook), ScalarAnalysis(Analysis(wingDir), priceBook))
+
+
+def ScenarioResults(results, i, numScenarios):
+    """
+    Results of a scenario of a price book of arrays (costs independent of the
+    prices, e.g. equipment costs, are not arrays).
+    """
+
+    return {name: broadcast_to(results[name], (numScenarios,))[i] for name in resultNames}
+
+
+def test_vector_price_books(takeoff):
+    plan = CostPlan(takeoff)
+
+    fabricCosts = linspace(3.0, 12.0, 5)
+    peelPlyCosts = linspace(0.5, 2.0, 5)
+    salary = linspace(20.0, 60.0, 5)
+
+    priceBook = {'materials': {('fabric', 'Optimat MD3 BIAX Fabric'): fabricCosts, 'Peel ply': peelPlyCosts, ('resin', 'Araldite LY1564'): 5.0},
+                 'salary': salary}
+
+    prices = takeoff.Price(priceBook)
+    planPrices = plan.Evaluate(priceBook)
+
+    for i in range(5):
+        scalarBook = {'materials': {('fabric', 'Optimat MD3 BIAX Fabric'): fabricCosts[i], 'Peel ply': peelPlyCosts[i], ('resin', 'Araldite LY1564'): 5.0},
+                      'salary': salary[i]}
+
+        expected = PriceResults(takeoff.Price(scalarBook))
+
+        assert PriceResults(ScenarioResults(prices, i, 5)) == expected
+        assert PlanResults(ScenarioResults(planPrices, i, 5), expected)